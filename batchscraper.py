@@ -0,0 +1,160 @@
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from typing import Deque, Dict, Iterable, Iterator, Set, Tuple
+
+from course import Course
+from huji_he_coursescraper import HujiHebrewCourseScraper
+from journal import RunJournal, dedupe_ids
+from transport import HttpTransport
+
+
+def scrape_course(course_id: str, year: int,
+                  transport: HttpTransport|None = None,
+                  parser: str = 'lxml',
+                  fields: Set[str]|None = None,
+                  scraper_options: Dict|None = None) -> Course:
+    """scrape a single course into a new Course object, only fetching the
+    pages needed for the given fields. scraper_options are passed on to
+    HujiHebrewCourseScraper (e.g. catalog_base_url)"""
+    course = Course()
+    scraper = HujiHebrewCourseScraper(course_id, year,
+                                      transport=transport, parser=parser,
+                                      **(scraper_options or {}))
+    scraper.update_course(course, fields)
+    return course
+
+
+def scrape_many(course_ids: Iterable[str], year: int, concurrency: int = 8,
+                transport: HttpTransport|None = None,
+                parser: str = 'lxml',
+                fields: Set[str]|None = None,
+                journal: RunJournal|None = None,
+                scraper_options: Dict|None = None,
+                max_pending: int = 64) -> Iterator[Course]:
+    """scrape the given courses concurrently.
+
+    Repeated ids are scraped once. Courses are yielded in the order of
+    course_ids, each as soon as it and every course before it are done.
+    At most max_pending courses are in flight, and a course is let go of
+    once yielded, so memory doesn't grow with the number of courses.
+    All scrapers share the given transport (or the default one), which
+    limits the concurrent requests per host. With a journal, courses it
+    already holds are not scraped again and new ones are added to it; a
+    course whose pages couldn't be fetched raises (e.g. HttpStatusError)
+    and isn't added, so a resumed run scrapes it again."""
+    course_ids = dedupe_ids(course_ids)
+    to_scrape = iter([course_id for course_id in course_ids
+                      if journal is None
+                      or not journal.is_done(course_id, year)])
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+
+        def submit(course_id: str) -> Future:
+            return executor.submit(scrape_course, course_id, year, transport,
+                                   parser, fields, scraper_options)
+
+        pending: Deque[Future] = deque(
+            submit(course_id) for course_id in islice(to_scrape, max_pending))
+        for course_id in course_ids:
+            if journal is not None and journal.is_done(course_id, year):
+                yield journal.get(course_id, year)
+                continue
+            course = pending.popleft().result()
+            for next_course_id in islice(to_scrape, 1):
+                pending.append(submit(next_course_id))
+            if journal is not None:
+                journal.append(course_id, year, course)
+            yield course
+
+
+def fetch_course_pages(course_id: str, year: int,
+                       transport: HttpTransport|None = None,
+                       scraper_options: Dict|None = None) \
+        -> Tuple[bytes, bytes]:
+    """return the raw (catalog, syllabus) pages of a course"""
+    scraper = HujiHebrewCourseScraper(course_id, year, transport=transport,
+                                      **(scraper_options or {}))
+    return scraper.fetch_catalog_content(), scraper.fetch_syllabus_content()
+
+
+def parse_course(course_id: str, year: int, catalog_content: bytes,
+                 syllabus_content: bytes, parser: str = 'lxml',
+                 fields: Set[str]|None = None,
+                 scraper_options: Dict|None = None) -> Course:
+    """build a Course from raw pages, without any network access"""
+    course = Course()
+    scraper = HujiHebrewCourseScraper(course_id, year, parser=parser,
+                                      catalog_content=catalog_content,
+                                      syllabus_content=syllabus_content,
+                                      **(scraper_options or {}))
+    scraper.update_course(course, fields)
+    return course
+
+
+def scrape_pipeline(course_ids: Iterable[str], year: int,
+                    fetch_concurrency: int = 8,
+                    parse_workers: int|None = None,
+                    max_pending: int = 64,
+                    transport: HttpTransport|None = None,
+                    parser: str = 'lxml',
+                    fields: Set[str]|None = None,
+                    journal: RunJournal|None = None,
+                    scraper_options: Dict|None = None) -> Iterator[Course]:
+    """scrape the given courses with separate fetch and parse stages.
+
+    Pages are fetched by fetch_concurrency threads and parsed by a pool of
+    parse_workers processes (one per core by default), so parsing isn't
+    serialised by the GIL. At most max_pending courses are in flight, which
+    bounds the raw pages held in memory. Courses are yielded in the order
+    of course_ids; repeated ids and ids done in the journal are handled as
+    in scrape_many. scraper_options are sent to the parse processes, so
+    they must be picklable."""
+    course_ids = dedupe_ids(course_ids)
+    to_scrape = iter([course_id for course_id in course_ids
+                      if journal is None
+                      or not journal.is_done(course_id, year)])
+    with ThreadPoolExecutor(max_workers=fetch_concurrency) as fetch_pool, \
+            ProcessPoolExecutor(max_workers=parse_workers) as parse_pool:
+
+        def submit(course_id: str) -> Future:
+            parsed = Future()
+
+            # parsed is resolved however its stages end, cancelled ones
+            # included, or the wait on it would never return
+            def on_parsed(parse_future: Future) -> None:
+                if parse_future.cancelled():
+                    parsed.cancel()
+                elif parse_future.exception() is not None:
+                    parsed.set_exception(parse_future.exception())
+                else:
+                    parsed.set_result(parse_future.result())
+
+            def on_fetched(fetch_future: Future) -> None:
+                if fetch_future.cancelled():
+                    parsed.cancel()
+                    return
+                try:
+                    catalog_content, syllabus_content = fetch_future.result()
+                    parse_pool.submit(parse_course, course_id, year,
+                                      catalog_content, syllabus_content,
+                                      parser, fields, scraper_options) \
+                        .add_done_callback(on_parsed)
+                except Exception as e:
+                    parsed.set_exception(e)
+
+            fetch_pool.submit(fetch_course_pages, course_id, year, transport,
+                              scraper_options).add_done_callback(on_fetched)
+            return parsed
+
+        pending: Deque[Future] = deque(
+            submit(course_id) for course_id in islice(to_scrape, max_pending))
+        for course_id in course_ids:
+            if journal is not None and journal.is_done(course_id, year):
+                yield journal.get(course_id, year)
+                continue
+            course = pending.popleft().result()
+            for next_course_id in islice(to_scrape, 1):
+                pending.append(submit(next_course_id))
+            if journal is not None:
+                journal.append(course_id, year, course)
+            yield course
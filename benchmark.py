@@ -0,0 +1,492 @@
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List
+
+from bs4 import BeautifulSoup as bs
+
+from batchscraper import parse_course, scrape_many, scrape_pipeline
+from course import Course
+from coursescraper import COURSE_FIELDS
+from huji_he_coursescraper import HujiHebrewCourseScraper, PARSERS, \
+    index_syllabus_sections
+from metrics import Metrics
+
+# the headers looked up by HujiHebrewCourseScraper's syllabus getters
+SYLLABUS_HEADERS = [
+    'שפת ההוראה',
+    'מורי הקורס',
+    'תאור כללי של הקורס',
+    'דרישות נוכחות',
+    'מורה אחראי על הקורס',
+    'דוא"ל של המורה האחראי על הקורס'
+]
+
+
+def _find_by_scan(syllabus_page: bs, header: str) -> str|None:
+    """the original lookup: scan every div and every bold in it"""
+    for tag in syllabus_page.find_all('div'):
+        for b_tag in tag.find_all('b'):
+            if header in b_tag.text:
+                ret_value = tag.text[len(b_tag.text)+1:]
+                ret_value = ret_value.replace('\n', '')
+                return ret_value
+    return None
+
+
+def _find_by_index(sections: Dict[str, str], header: str) -> str|None:
+    for b_header, section in sections.items():
+        if header in b_header:
+            return section.replace('\n', '')
+    return None
+
+
+def _load_syllabus_pages(fixtures_dir: str) -> Dict[str, bs]:
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(fixtures_dir,
+                                              '*.syllabus.html'))):
+        with open(path, 'rb') as page_file:
+            content = page_file.read()
+        pages[os.path.basename(path)] = \
+            bs(content.decode('windows-1255'), 'html5lib')
+    return pages
+
+
+def _load_course_pages(fixtures_dir: str) -> Dict[str, Dict[str, bytes]]:
+    """return {course id: {'catalog': bytes, 'syllabus': bytes}} of every
+    course that has both pages recorded"""
+    courses = {}
+    for path in sorted(glob.glob(os.path.join(fixtures_dir,
+                                              '*.catalog.html'))):
+        course_id = os.path.basename(path)[:-len('.catalog.html')]
+        syllabus_path = os.path.join(fixtures_dir,
+                                     course_id + '.syllabus.html')
+        if not os.path.exists(syllabus_path):
+            continue
+        with open(path, 'rb') as catalog_file, \
+                open(syllabus_path, 'rb') as syllabus_file:
+            courses[course_id] = {'catalog': catalog_file.read(),
+                                  'syllabus': syllabus_file.read()}
+    return courses
+
+
+def _course_from_pages(course_id: str, year: int, pages: Dict[str, bytes],
+                       parser: str, partial: bool = True) -> Course:
+    course = Course()
+    scraper = HujiHebrewCourseScraper(course_id, year, parser=parser,
+                                      catalog_content=pages['catalog'],
+                                      syllabus_content=pages['syllabus'],
+                                      partial=partial)
+    scraper.update_course(course)
+    return course
+
+
+def _time(func: Callable, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def bench_syllabus_index(fixtures_dir: str, repeat: int = 5) -> None:
+    """compare the per-header scan to the section index on recorded pages"""
+    pages = _load_syllabus_pages(fixtures_dir)
+    if not pages:
+        raise SystemExit('no *.syllabus.html pages in ' + fixtures_dir)
+
+    scan_total, index_total = 0.0, 0.0
+    mismatches: List[str] = []
+    for name, page in pages.items():
+        def scan() -> List[str|None]:
+            return [_find_by_scan(page, h) for h in SYLLABUS_HEADERS]
+
+        def index() -> List[str|None]:
+            sections = index_syllabus_sections(page)
+            return [_find_by_index(sections, h) for h in SYLLABUS_HEADERS]
+
+        if scan() != index():
+            mismatches.append(name)
+        scan_total += _time(scan, repeat)
+        index_total += _time(index, repeat)
+
+    print('pages: {}'.format(len(pages)))
+    print('scan:  {:8.2f} ms/page'.format(scan_total / len(pages) * 1000))
+    print('index: {:8.2f} ms/page'.format(index_total / len(pages) * 1000))
+    print('speedup: {:.1f}x'.format(scan_total / index_total))
+    if mismatches:
+        raise SystemExit('different output for: ' + ', '.join(mismatches))
+    print('output identical')
+
+
+def bench_parsers(fixtures_dir: str, year: int, parsers: List[str],
+                  partial: bool = True) -> None:
+    """parse recorded courses with every parser, report the time per course
+    and check all of them produce the same Course.to_dict()"""
+    courses = _load_course_pages(fixtures_dir)
+    if not courses:
+        raise SystemExit('no recorded courses in ' + fixtures_dir)
+
+    reference_parser = parsers[0]
+    reference: Dict[str, Dict] = {}
+    mismatches: List[str] = []
+    for parser in parsers:
+        start = time.perf_counter()
+        for course_id, pages in courses.items():
+            course_dict = _course_from_pages(course_id, year, pages,
+                                             parser, partial).to_dict()
+            if parser == reference_parser:
+                reference[course_id] = course_dict
+            elif course_dict != reference[course_id]:
+                mismatches.append('{} ({})'.format(course_id, parser))
+        elapsed = time.perf_counter() - start
+        print('{:12} {:8.2f} ms/course'.format(
+            parser, elapsed / len(courses) * 1000))
+    if mismatches:
+        raise SystemExit('different output from {} for: {}'.format(
+            reference_parser, ', '.join(mismatches)))
+    print('output identical for {} courses'.format(len(courses)))
+
+
+def bench_parse_workers(fixtures_dir: str, year: int, max_workers: int,
+                        parser: str = 'lxml', rounds: int = 3) -> None:
+    """parse the recorded courses with 1..max_workers processes, the parse
+    stage of scrape_pipeline, and report courses/sec for each"""
+    courses = _load_course_pages(fixtures_dir)
+    if not courses:
+        raise SystemExit('no recorded courses in ' + fixtures_dir)
+    # repeat the corpus so every run keeps all the workers busy
+    jobs = list(courses.items()) * rounds
+
+    single = None
+    for workers in range(1, max_workers + 1):
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            start = time.perf_counter()
+            list(pool.map(parse_course,
+                          [course_id for course_id, _ in jobs],
+                          [year] * len(jobs),
+                          [pages['catalog'] for _, pages in jobs],
+                          [pages['syllabus'] for _, pages in jobs],
+                          [parser] * len(jobs),
+                          chunksize=4))
+            rate = len(jobs) / (time.perf_counter() - start)
+        single = single or rate
+        print('{:3} workers {:9.1f} courses/sec  ({:.2f}x)'.format(
+            workers, rate, rate / single))
+
+
+def record_fixtures(course_ids: Iterable[str], year: int,
+                    fixtures_dir: str) -> None:
+    """download the raw catalog and syllabus pages of the given courses
+    into fixtures_dir, in the layout the benchmarks read"""
+    os.makedirs(fixtures_dir, exist_ok=True)
+    for course_id in course_ids:
+        scraper = HujiHebrewCourseScraper(course_id, year)
+        for source, content in [('catalog', scraper.fetch_catalog_content()),
+                                ('syllabus',
+                                 scraper.fetch_syllabus_content())]:
+            path = os.path.join(fixtures_dir,
+                                '{}.{}.html'.format(course_id, source))
+            with open(path, 'wb') as page_file:
+                page_file.write(content)
+        print('recorded', course_id)
+
+
+# every getter update_course calls on a HujiHebrewCourseScraper
+GETTERS = [getter for getter, _ in COURSE_FIELDS.values()] + \
+          ['get_coordinator', 'get_coordinator_mail']
+
+
+def _median_ms(samples: List[float]) -> float:
+    return statistics.median(samples) * 1000
+
+
+def run_suite(fixtures_dir: str, year: int, parser: str = 'lxml',
+              repeat: int = 5) -> Dict[str, float]:
+    """run every benchmark over the recorded courses and return
+    {metric: value}: median ms per page parse and per getter, end-to-end
+    courses/sec and peak traced memory of the end-to-end run"""
+    courses = _load_course_pages(fixtures_dir)
+    if not courses:
+        raise SystemExit('no recorded courses in ' + fixtures_dir)
+    results: Dict[str, float] = {}
+
+    parse_samples: Dict[str, List[float]] = {'catalog': [], 'syllabus': []}
+    getter_samples: Dict[str, List[float]] = {getter: [] for getter in GETTERS}
+    for course_id, pages in courses.items():
+        scraper = HujiHebrewCourseScraper(
+            course_id, year, parser=parser, catalog_content=pages['catalog'],
+            syllabus_content=pages['syllabus'])
+        parse_samples['catalog'].append(_time(
+            lambda: scraper._get_huji_he_course_catalog_page(course_id, year),
+            repeat))
+        parse_samples['syllabus'].append(_time(
+            lambda: index_syllabus_sections(
+                scraper._get_huji_he_course_syllabus_page(course_id, year)),
+            repeat))
+        scraper.scrape(course_id, year)
+        for getter in GETTERS:
+            getter_samples[getter].append(_time(getattr(scraper, getter),
+                                                repeat))
+    for source, samples in parse_samples.items():
+        results['parse.{}.ms'.format(source)] = _median_ms(samples)
+    for getter, samples in getter_samples.items():
+        results['getter.{}.ms'.format(getter)] = _median_ms(samples)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for course_id, pages in courses.items():
+        _course_from_pages(course_id, year, pages, parser)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results['end_to_end.courses_per_sec'] = len(courses) / elapsed
+    results['end_to_end.peak_memory_mb'] = peak / 2 ** 20
+    return results
+
+
+def compare_to_baseline(results: Dict[str, float],
+                        baseline: Dict[str, float],
+                        tolerance: float = 0.1) -> List[str]:
+    """print every metric next to its baseline value and return the
+    metrics that got worse by more than tolerance (a fraction)"""
+    regressions = []
+    for metric, value in results.items():
+        if metric not in baseline:
+            print('{:45} {:12.3f}  (new)'.format(metric, value))
+            continue
+        change = (value - baseline[metric]) / baseline[metric] \
+            if baseline[metric] else 0.0
+        # throughput should go up, everything else down
+        worse = -change if metric.endswith('per_sec') else change
+        # sub-10us timings are mostly noise
+        if metric.endswith('.ms') and abs(value - baseline[metric]) < 0.01:
+            worse = 0.0
+        print('{:45} {:12.3f}  {:+7.1%}{}'.format(
+            metric, value, change, '  REGRESSION' if worse > tolerance
+            else ''))
+        if worse > tolerance:
+            regressions.append(metric)
+    return regressions
+
+
+def load_test(courses_count: int, year: int, mode: str = 'threads',
+              concurrency: int = 16, fixtures_dir: str|None = None,
+              latency: float = 0.05, error_rate: float = 0.0,
+              throttle_rate: float = 0.0, bandwidth: float = 0,
+              capacity: int = 0) -> Dict:
+    """scrape courses_count courses from a local StandInServer with
+    scrape_many ('threads') or scrape_pipeline ('pipeline') and return
+    courses/sec plus the transport metrics"""
+    from standinserver import StandInServer
+    from transport import HttpTransport
+
+    metrics = Metrics()
+    server = StandInServer(fixtures_dir=fixtures_dir, latency=latency,
+                           error_rate=error_rate,
+                           throttle_rate=throttle_rate, bandwidth=bandwidth,
+                           capacity=capacity, seed=0).start()
+    transport = HttpTransport(backoff=0.05, max_backoff=1,
+                              max_per_host=concurrency, metrics=metrics)
+    scraper_options = {'catalog_base_url': server.base_url,
+                       'syllabus_base_url': server.base_url}
+    course_ids = [str(10000 + i) for i in range(courses_count)]
+    try:
+        start = time.perf_counter()
+        if mode == 'pipeline':
+            courses = scrape_pipeline(course_ids, year,
+                                      fetch_concurrency=concurrency,
+                                      transport=transport,
+                                      scraper_options=scraper_options)
+        else:
+            courses = scrape_many(course_ids, year, concurrency,
+                                  transport=transport,
+                                  scraper_options=scraper_options)
+        scraped = sum(1 for _ in courses)
+        elapsed = time.perf_counter() - start
+    finally:
+        transport.close()
+        server.stop()
+    return {'mode': mode, 'courses': scraped, 'seconds': elapsed,
+            'courses_per_sec': scraped / elapsed,
+            'metrics': metrics.summary()}
+
+
+# commands that should start without the heavy dependencies
+QUICK_COMMANDS = [['--help'], ['cache', 'stats'],
+                  ['inspect', '67579', '--db', 'courses.sqlite']]
+HEAVY_MODULES = {'requests', 'bs4', 'lxml', 'html5lib', 'pandas', 'numpy',
+                 'pyarrow', 'openpyxl'}
+
+
+def _imported_modules(args: List[str], cwd: str, env: Dict) -> set:
+    """return the top level modules a huji_scrape command imports"""
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-m', 'huji_scrape'] + args,
+        cwd=cwd, env=env, capture_output=True, text=True)
+    return {line.rsplit('|', 1)[1].strip().split('.')[0]
+            for line in process.stderr.splitlines()
+            if line.startswith('import time:') and '|' in line}
+
+
+def bench_startup(commands: List[List[str]]|None = None,
+                  repeat: int = 10) -> Dict[str, Dict]:
+    """run each huji_scrape command repeat times in a fresh interpreter
+    (in an empty directory holding only a course store) and return
+    {command: {'ms': median wall time, 'heavy_imports': [...]}}, the
+    heavy dependencies it imported"""
+    from coursestore import CourseStore
+
+    commands = commands or QUICK_COMMANDS
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        [package_dir] + [path for path in
+                         [os.environ.get('PYTHONPATH')] if path]))
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        CourseStore(os.path.join(work_dir, 'courses.sqlite')).close()
+        for args in commands:
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                subprocess.run([sys.executable, '-m', 'huji_scrape'] + args,
+                               cwd=work_dir, env=env,
+                               stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+                samples.append(time.perf_counter() - start)
+            results[' '.join(args)] = {
+                'ms': _median_ms(samples),
+                'heavy_imports': sorted(HEAVY_MODULES & _imported_modules(
+                    args, work_dir, env))}
+    # the floor: an interpreter doing nothing
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'])
+        samples.append(time.perf_counter() - start)
+    results['python -c pass'] = {'ms': _median_ms(samples),
+                                 'heavy_imports': []}
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='benchmarks over recorded catalog/syllabus pages')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    syllabus_parser = subparsers.add_parser(
+        'syllabus-index', help='section index vs. per-header scan')
+    syllabus_parser.add_argument('fixtures_dir')
+    syllabus_parser.add_argument('--repeat', type=int, default=5)
+
+    parsers_parser = subparsers.add_parser(
+        'parsers', help='parse time and output parity of the parsers')
+    parsers_parser.add_argument('fixtures_dir')
+    parsers_parser.add_argument('--year', type=int, default=2024)
+    parsers_parser.add_argument('--parsers', nargs='+', choices=PARSERS,
+                                default=['html5lib', 'lxml', 'html.parser'])
+    parsers_parser.add_argument('--full', action='store_true',
+                                help='build the whole catalog page tree')
+
+    workers_parser = subparsers.add_parser(
+        'parse-workers', help='parse throughput by number of processes')
+    workers_parser.add_argument('fixtures_dir')
+    workers_parser.add_argument('--year', type=int, default=2024)
+    workers_parser.add_argument('--max-workers', type=int,
+                                default=os.cpu_count())
+    workers_parser.add_argument('--parser', choices=PARSERS, default='lxml')
+
+    record_parser = subparsers.add_parser(
+        'record', help='download course pages into a fixture corpus')
+    record_parser.add_argument('fixtures_dir')
+    record_parser.add_argument('course_ids', nargs='+')
+    record_parser.add_argument('--year', type=int, default=2024)
+
+    run_parser = subparsers.add_parser(
+        'run', help='parse, getter, end-to-end and memory benchmarks')
+    run_parser.add_argument('fixtures_dir')
+    run_parser.add_argument('--year', type=int, default=2024)
+    run_parser.add_argument('--parser', choices=PARSERS, default='lxml')
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--save', metavar='BASELINE_JSON',
+                            help='save the results as a baseline')
+    run_parser.add_argument('--compare', metavar='BASELINE_JSON',
+                            help='compare the results to a saved baseline')
+    run_parser.add_argument('--tolerance', type=float, default=0.1)
+
+    load_parser = subparsers.add_parser(
+        'loadtest', help='end-to-end scrape against a local stand-in server')
+    load_parser.add_argument('--courses', type=int, default=200)
+    load_parser.add_argument('--year', type=int, default=2024)
+    load_parser.add_argument('--mode', choices=['threads', 'pipeline'],
+                             default='threads')
+    load_parser.add_argument('--concurrency', type=int, default=16)
+    load_parser.add_argument('--fixtures', help='serve these recorded pages')
+    load_parser.add_argument('--latency', type=float, default=0.05)
+    load_parser.add_argument('--error-rate', type=float, default=0.0)
+    load_parser.add_argument('--throttle-rate', type=float, default=0.0)
+    load_parser.add_argument('--bandwidth', type=float, default=0)
+    load_parser.add_argument('--capacity', type=int, default=0)
+
+    startup_parser = subparsers.add_parser(
+        'startup', help='start time and imports of the quick cli commands')
+    startup_parser.add_argument('--repeat', type=int, default=10)
+    startup_parser.add_argument('--max-ms', type=float, default=100,
+                                help='fail when a command takes this much '
+                                     'longer than an empty interpreter')
+
+    args = parser.parse_args()
+    if args.command == 'syllabus-index':
+        bench_syllabus_index(args.fixtures_dir, args.repeat)
+    elif args.command == 'parsers':
+        bench_parsers(args.fixtures_dir, args.year, args.parsers,
+                      partial=not args.full)
+    elif args.command == 'parse-workers':
+        bench_parse_workers(args.fixtures_dir, args.year, args.max_workers,
+                            args.parser)
+    elif args.command == 'record':
+        record_fixtures(args.course_ids, args.year, args.fixtures_dir)
+    elif args.command == 'run':
+        suite_results = run_suite(args.fixtures_dir, args.year, args.parser,
+                                  args.repeat)
+        if args.compare:
+            with open(args.compare) as baseline_file:
+                regressed = compare_to_baseline(suite_results,
+                                                json.load(baseline_file),
+                                                args.tolerance)
+        else:
+            for name, result in suite_results.items():
+                print('{:45} {:12.3f}'.format(name, result))
+            regressed = []
+        if args.save:
+            with open(args.save, 'w') as baseline_file:
+                json.dump(suite_results, baseline_file, indent=2)
+        if regressed:
+            raise SystemExit('regressed: ' + ', '.join(regressed))
+    elif args.command == 'loadtest':
+        print(json.dumps(load_test(args.courses, args.year, args.mode,
+                                   args.concurrency, args.fixtures,
+                                   args.latency, args.error_rate,
+                                   args.throttle_rate, args.bandwidth,
+                                   args.capacity),
+                         indent=2))
+    elif args.command == 'startup':
+        startup_results = bench_startup(repeat=args.repeat)
+        floor_ms = startup_results['python -c pass']['ms']
+        failures = []
+        for command, result in startup_results.items():
+            print('{:45} {:9.1f} ms {:+9.1f} ms  {}'.format(
+                command, result['ms'], result['ms'] - floor_ms,
+                ' '.join(result['heavy_imports'])))
+            if result['heavy_imports'] \
+                    or result['ms'] - floor_ms > args.max_ms:
+                failures.append(command)
+        if failures:
+            raise SystemExit('slow or heavy startup: ' + ', '.join(failures))
@@ -0,0 +1,181 @@
+import re
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, \
+    wait
+from threading import Lock
+from typing import Deque, Dict, Iterator, List, Set, Tuple
+from urllib.parse import parse_qs, urljoin, urlsplit
+
+from bs4 import BeautifulSoup as bs
+from bs4 import SoupStrainer
+
+from batchscraper import scrape_many
+from course import Course
+from huji_he_coursescraper import CATALOG_BASE_URL, DEFAULT_FACULTY
+from journal import RunJournal
+from metrics import Metrics, default_metrics
+from transport import HttpStatusError, HttpTransport, \
+    get_default_transport
+
+# where a crawl of the catalog starts: the list of faculties of a year
+FACULTIES_PATH = '/pages/wfrFaculties.aspx?year={year}'
+# links followed by the crawl: faculty, department and program listings.
+# The live catalog's listing urls aren't verified, override these (and
+# FACULTIES_PATH) to match the site being crawled
+LISTING_PATTERN = r'/pages/wfr\w*(Facult|Department|Chug|Maslul)\w*\.aspx'
+# links to course pages, the course id and faculty are read from the query
+COURSE_PATTERN = r'/pages/wfrCourse\.aspx'
+
+__links_strainer = SoupStrainer('a')
+
+
+class CrawlFrontier:
+    """thread safe queue of urls to visit, each url is queued only once"""
+
+    def __init__(self):
+        self.__lock = Lock()
+        self.__seen: Set[str] = set()
+        self.__queue: Deque[str] = deque()
+
+    def add(self, url: str) -> bool:
+        """queue url, return False if it was already queued before"""
+        # the fragment never changes the page
+        url = url.split('#', 1)[0]
+        with self.__lock:
+            if url in self.__seen:
+                return False
+            self.__seen.add(url)
+            self.__queue.append(url)
+            return True
+
+    def pop(self) -> str|None:
+        """return the next url to visit, None if there is none"""
+        with self.__lock:
+            return self.__queue.popleft() if self.__queue else None
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return len(self.__queue)
+
+
+def extract_links(content: bytes, page_url: str, listing_pattern: str,
+                  course_pattern: str) \
+        -> Tuple[List[str], List[Tuple[str, int]]]:
+    """return the listing urls and the (course id, faculty) of the course
+    links on a listing page"""
+    page = bs(content, 'lxml', parse_only=__links_strainer)
+    listings, courses = [], []
+    host = urlsplit(page_url).netloc
+    for link in page.find_all('a', href=True):
+        url = urljoin(page_url, link['href'])
+        split_url = urlsplit(url)
+        if split_url.netloc != host:
+            continue
+        if re.search(course_pattern, split_url.path):
+            query = parse_qs(split_url.query)
+            course_id = query.get('courseId', [''])[0].strip()
+            if course_id:
+                faculty = query.get('faculty', [''])[0]
+                courses.append((course_id, int(faculty) if faculty.isdigit()
+                                else DEFAULT_FACULTY))
+        elif re.search(listing_pattern, split_url.path):
+            listings.append(url)
+    return listings, courses
+
+
+def crawl_course_ids(year: int, transport: HttpTransport|None = None,
+                     concurrency: int = 8,
+                     catalog_base_url: str = CATALOG_BASE_URL,
+                     faculties_path: str = FACULTIES_PATH,
+                     listing_pattern: str = LISTING_PATTERN,
+                     course_pattern: str = COURSE_PATTERN,
+                     max_pages: int = 10000,
+                     metrics: Metrics|None = None) \
+        -> Iterator[Tuple[str, int]]:
+    """walk the catalog's listing pages of year and yield the (course id,
+    faculty) of every course found, each course id once and as soon as it
+    is found.
+
+    At most concurrency listing pages are fetched at once, through the
+    given transport (or the default one). The crawl stops following links
+    after max_pages pages."""
+    transport = transport if transport is not None \
+        else get_default_transport()
+    metrics = metrics if metrics is not None else default_metrics
+    frontier = CrawlFrontier()
+    frontier.add(catalog_base_url + faculties_path.format(year=year))
+    found: Set[str] = set()
+    visited = 0
+
+    def visit(url: str) -> Tuple[List[str], List[Tuple[str, int]]]:
+        with metrics.timer('crawl.page'):
+            try:
+                result = transport.fetch(url)
+            except HttpStatusError:
+                result = None
+            if result is None or result.status != 200:
+                metrics.increment('crawl.errors')
+                return [], []
+            return extract_links(result.content, url, listing_pattern,
+                                 course_pattern)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        in_flight: Set[Future] = set()
+        while True:
+            while len(in_flight) < concurrency and visited < max_pages:
+                url = frontier.pop()
+                if url is None:
+                    break
+                in_flight.add(executor.submit(visit, url))
+                visited += 1
+            if not in_flight:
+                break
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                listings, courses = future.result()
+                metrics.increment('crawl.pages')
+                for url in listings:
+                    frontier.add(url)
+                for course_id, faculty in courses:
+                    if course_id not in found:
+                        found.add(course_id)
+                        metrics.increment('crawl.courses')
+                        yield course_id, faculty
+
+
+def scrape_by_faculty(faculties: Dict[str, int], year: int,
+                      concurrency: int = 8,
+                      transport: HttpTransport|None = None,
+                      parser: str = 'lxml',
+                      fields: Set[str]|None = None,
+                      journal: RunJournal|None = None,
+                      scraper_options: Dict|None = None) -> Iterator[Course]:
+    """scrape the courses of a {course id: faculty} dict with scrape_many,
+    faculty by faculty"""
+    for faculty in sorted(set(faculties.values())):
+        yield from scrape_many(
+            [course_id for course_id, course_faculty in faculties.items()
+             if course_faculty == faculty],
+            year, concurrency, transport, parser, fields, journal,
+            dict(scraper_options or {}, faculty=faculty))
+
+
+def scrape_catalog(year: int, concurrency: int = 8,
+                   transport: HttpTransport|None = None,
+                   parser: str = 'lxml',
+                   fields: Set[str]|None = None,
+                   journal: RunJournal|None = None,
+                   scraper_options: Dict|None = None,
+                   crawl_options: Dict|None = None) -> Iterator[Course]:
+    """crawl the catalog of year for its course ids and scrape them all,
+    see scrape_by_faculty. crawl_options are passed on to crawl_course_ids,
+    the crawl uses the scrapers' catalog_base_url"""
+    scraper_options = scraper_options or {}
+    crawl_options = dict(crawl_options or {})
+    if 'catalog_base_url' in scraper_options:
+        crawl_options.setdefault('catalog_base_url',
+                                 scraper_options['catalog_base_url'])
+    faculties = dict(crawl_course_ids(year, transport, concurrency,
+                                      **crawl_options))
+    yield from scrape_by_faculty(faculties, year, concurrency, transport,
+                                 parser, fields, journal, scraper_options)
@@ -0,0 +1,245 @@
+import json
+import re
+import sqlite3
+from datetime import time
+from typing import Iterable, List, Tuple
+
+from course import Course
+
+# titles left out of a staff member's lookup key
+__staff_titles = re.compile(
+    r'^(?:(?:פרופ(?:\'|סור)?|ד"ר|דר\'|מר|גב\'|גברת|prof\.?|dr\.?|mr\.?|'
+    r'ms\.?|mrs\.?)\s+)+', re.IGNORECASE)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS courses (
+    course_id TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    name TEXT,
+    department TEXT,
+    credits INTEGER,
+    exam_type TEXT,
+    record TEXT NOT NULL,
+    PRIMARY KEY (course_id, year));
+CREATE INDEX IF NOT EXISTS courses_department ON courses (department);
+CREATE INDEX IF NOT EXISTS courses_credits ON courses (credits);
+
+CREATE TABLE IF NOT EXISTS semesters (
+    course_id TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    semester TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS semesters_semester
+    ON semesters (semester, course_id, year);
+CREATE INDEX IF NOT EXISTS semesters_course ON semesters (course_id, year);
+
+CREATE TABLE IF NOT EXISTS periods (
+    course_id TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    type TEXT,
+    weekday INTEGER NOT NULL,
+    start_minute INTEGER NOT NULL,
+    end_minute INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS periods_slot
+    ON periods (weekday, start_minute, end_minute, course_id, year);
+CREATE INDEX IF NOT EXISTS periods_course ON periods (course_id, year);
+
+CREATE TABLE IF NOT EXISTS staff (
+    course_id TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS staff_name_key ON staff (name_key, course_id, year);
+CREATE INDEX IF NOT EXISTS staff_course ON staff (course_id, year);
+
+CREATE TABLE IF NOT EXISTS exams (
+    course_id TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    semester TEXT,
+    moed TEXT);
+CREATE INDEX IF NOT EXISTS exams_date ON exams (date, course_id, year);
+CREATE INDEX IF NOT EXISTS exams_course ON exams (course_id, year);
+'''
+
+# tables holding rows per course besides courses itself
+DETAIL_TABLES = ('semesters', 'periods', 'staff', 'exams')
+
+
+def staff_names(course: Course) -> List[str]:
+    """return the staff members of a course: the lines of its staff section
+    when the scraper kept them (other_data['staff members']), otherwise its
+    get_staff string split on commas and semicolons"""
+    members = course.other_data.get('staff members')
+    if members is not None:
+        return [name.strip() for name in members if name.strip()]
+    staff = course.get_staff()
+    if not staff:
+        return []
+    return [name.strip() for name in re.split(r'[,;\n]', staff)
+            if name.strip()]
+
+
+def staff_key(name: str) -> str:
+    """return the lookup key of a staff member: no title, single spaces,
+    lower case"""
+    name = ' '.join(name.split())
+    return __staff_titles.sub('', name).lower()
+
+
+def _minutes(value: time|str) -> int:
+    if isinstance(value, str):
+        value = time.fromisoformat(value)
+    return value.hour * 60 + value.minute
+
+
+class CourseStore:
+    """sqlite database of courses, queryable by time slot, staff,
+    department, credits and semester.
+
+    Each course of a year is a row of courses (with its whole
+    Course.to_record()), its periods, staff members, semesters and exam
+    dates are rows of their own indexed tables."""
+
+    def __init__(self, path: str):
+        self.__db = sqlite3.connect(path)
+        self.__db.executescript(SCHEMA)
+
+    def add(self, course: Course, year: int) -> None:
+        """store a course of year, replacing an older version of it"""
+        self.add_many([course], year)
+
+    def add_many(self, courses: Iterable[Course], year: int) -> None:
+        """store many courses of year in a single transaction"""
+        course_rows, semester_rows, period_rows, staff_rows, exam_rows = \
+            [], [], [], [], []
+        for course in courses:
+            course_id = str(course.get_id())
+            key = (course_id, year)
+            course_rows.append(key + (
+                course.get_course_name(), course.get_department(),
+                course.get_credits(), course.get_exam_type(),
+                json.dumps(course.to_record(), ensure_ascii=False)))
+            semester_rows += [key + (semester,)
+                              for semester in course.get_semesters() or ()]
+            period_rows += [key + (period['type'], period['weekday'],
+                                   _minutes(period['start_time']),
+                                   _minutes(period['end_time']))
+                            for period in course.get_periods() or ()]
+            staff_rows += [key + (name, staff_key(name))
+                           for name in staff_names(course)]
+            exam_rows += [key + (exam_date.isoformat(),
+                                 ','.join(metadata['semester']),
+                                 metadata['MOED'])
+                          for exam_date, metadata
+                          in course.get_exam_dates() or ()]
+        with self.__db:
+            for table in DETAIL_TABLES:
+                self.__db.executemany(
+                    'DELETE FROM {} WHERE course_id = ? AND year = ?'
+                    .format(table), [row[:2] for row in course_rows])
+            self.__db.executemany(
+                'INSERT OR REPLACE INTO courses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                course_rows)
+            self.__db.executemany('INSERT INTO semesters VALUES (?, ?, ?)',
+                                  semester_rows)
+            self.__db.executemany(
+                'INSERT INTO periods VALUES (?, ?, ?, ?, ?, ?)', period_rows)
+            self.__db.executemany('INSERT INTO staff VALUES (?, ?, ?, ?)',
+                                  staff_rows)
+            self.__db.executemany('INSERT INTO exams VALUES (?, ?, ?, ?, ?)',
+                                  exam_rows)
+
+    def get(self, course_id, year: int) -> Course|None:
+        """return a stored course, or None"""
+        row = self.__db.execute(
+            'SELECT record FROM courses WHERE course_id = ? AND year = ?',
+            (str(course_id), year)).fetchone()
+        return Course.from_record(json.loads(row[0])) \
+            if row is not None else None
+
+    def query_ids(self, year: int|None = None,
+                  weekday: int|str|None = None,
+                  start: time|str|None = None, end: time|str|None = None,
+                  overlapping: bool = False, staff: str|None = None,
+                  department: str|None = None,
+                  min_credits: int|None = None, max_credits: int|None = None,
+                  semester: str|None = None) -> List[Tuple[str, int]]:
+        """return the (course id, year) of the courses matching every given
+        condition, sorted.
+
+        weekday is a number [1-7] or a hebrew symbol [א-ו,ש]. A course
+        matches the time slot when one of its periods on weekday lies
+        within start-end (or, with overlapping, intersects it). staff
+        matches a staff member by name, titles ignored. semester is one of
+        A, B or yearly."""
+        conditions, parameters = [], []
+        if year is not None:
+            conditions.append('c.year = ?')
+            parameters.append(year)
+        if weekday is not None or start is not None or end is not None:
+            slot, slot_parameters = [], []
+            if weekday is not None:
+                if isinstance(weekday, str):
+                    from huji_he_coursescraper import \
+                        hebrew_weekday_symbol_to_weekday_number
+
+                    weekday = hebrew_weekday_symbol_to_weekday_number(weekday)
+                slot.append('p.weekday = ?')
+                slot_parameters.append(weekday)
+            if start is not None:
+                slot.append('p.end_minute > ?' if overlapping
+                            else 'p.start_minute >= ?')
+                slot_parameters.append(_minutes(start))
+            if end is not None:
+                slot.append('p.start_minute < ?' if overlapping
+                            else 'p.end_minute <= ?')
+                slot_parameters.append(_minutes(end))
+            conditions.append(
+                '(c.course_id, c.year) IN (SELECT course_id, year '
+                'FROM periods p WHERE {})'.format(' AND '.join(slot)))
+            parameters += slot_parameters
+        if staff is not None:
+            conditions.append(
+                '(c.course_id, c.year) IN (SELECT course_id, year '
+                'FROM staff WHERE name_key = ?)')
+            parameters.append(staff_key(staff))
+        if department is not None:
+            conditions.append('c.department = ?')
+            parameters.append(department)
+        if min_credits is not None:
+            conditions.append('c.credits >= ?')
+            parameters.append(min_credits)
+        if max_credits is not None:
+            conditions.append('c.credits <= ?')
+            parameters.append(max_credits)
+        if semester is not None:
+            conditions.append(
+                '(c.course_id, c.year) IN (SELECT course_id, year '
+                'FROM semesters WHERE semester = ?)')
+            parameters.append(semester)
+        sql = 'SELECT c.course_id, c.year FROM courses c'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        return self.__db.execute(sql + ' ORDER BY c.course_id, c.year',
+                                 parameters).fetchall()
+
+    def query(self, **conditions) -> List[Course]:
+        """return the courses matching the conditions of query_ids"""
+        return [self.get(course_id, year)
+                for course_id, year in self.query_ids(**conditions)]
+
+    def departments(self, year: int|None = None) -> List[str]:
+        """return the distinct departments of the stored courses"""
+        return [department for department, in self.__db.execute(
+            'SELECT DISTINCT department FROM courses WHERE department IS NOT '
+            'NULL AND (? IS NULL OR year = ?) ORDER BY department',
+            (year, year))]
+
+    def close(self) -> None:
+        self.__db.close()
+
+    def __enter__(self) -> 'CourseStore':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
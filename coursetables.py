@@ -0,0 +1,129 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+import huji_he_coursescraper
+from course import COLUMNS, Course, courses_to_columns
+from outputsink import FLAT_COLUMNS
+
+# weekday number [0-7] -> hebrew symbol, '' for the unrecognized day 0
+WEEKDAY_SYMBOLS = np.array(
+    [huji_he_coursescraper.weekday_number_to_hebrew_weekday_symbol(number)
+     or '' for number in range(8)], dtype=object)
+
+
+def _semester_names(semester_lists: Sequence[List[str]]) -> List[str]:
+    """return the hebrew name of each semester symbols list, looking up
+    every distinct list once"""
+    names: Dict[tuple, str] = {}
+    return_names = []
+    for semesters in semester_lists:
+        key = tuple(semesters)
+        if key not in names:
+            names[key] = huji_he_coursescraper.symbol_to_huji_semester(
+                semesters)
+        return_names.append(names[key])
+    return return_names
+
+
+def periods_frame(courses: Sequence[Course]) -> pd.DataFrame:
+    """return one row per period of the given courses: course (position
+    in courses), type, weekday, and start/end as minutes since midnight"""
+    course_positions, types, weekdays, starts, ends = [], [], [], [], []
+    for position, course in enumerate(courses):
+        for period in course.get_periods() or ():
+            course_positions.append(position)
+            types.append(period['type'])
+            weekdays.append(period['weekday'])
+            start, end = period['start_time'], period['end_time']
+            starts.append(start.hour * 60 + start.minute)
+            ends.append(end.hour * 60 + end.minute)
+    return pd.DataFrame({
+        'course': np.array(course_positions, dtype=np.int64),
+        'type': pd.Series(types, dtype=object),
+        'weekday': np.array(weekdays, dtype=np.int8),
+        'start_minute': np.array(starts, dtype=np.int16),
+        'end_minute': np.array(ends, dtype=np.int16)
+    })
+
+
+def exams_frame(courses: Sequence[Course]) -> pd.DataFrame:
+    """return one row per exam date of the given courses: course (position
+    in courses), date as datetime64, hebrew semester name and moed"""
+    course_positions, dates, semesters, moeds = [], [], [], []
+    for position, course in enumerate(courses):
+        for exam_date, metadata in course.get_exam_dates() or ():
+            course_positions.append(position)
+            dates.append(exam_date)
+            semesters.append(metadata['semester'])
+            moeds.append(metadata['MOED'])
+    return pd.DataFrame({
+        'course': np.array(course_positions, dtype=np.int64),
+        'date': np.array(dates, dtype='datetime64[D]'),
+        'semester': pd.Series(_semester_names(semesters), dtype=object),
+        'moed': pd.Series(moeds, dtype=object)
+    })
+
+
+def _hhmm(minutes: pd.Series) -> pd.Series:
+    return (minutes // 60).astype(str).str.zfill(2) + ':' \
+        + (minutes % 60).astype(str).str.zfill(2)
+
+
+def periods_display(periods: pd.DataFrame, courses_count: int) -> pd.Series:
+    """return each course's periods joined into the output.xlsx string,
+    indexed by course position ('' for a course without periods)"""
+    timed = ': יום ' + pd.Series(WEEKDAY_SYMBOLS[periods['weekday']],
+                                 index=periods.index) \
+        + '\' ' + _hhmm(periods['start_minute']) + '-' \
+        + _hhmm(periods['end_minute'])
+    lines = periods['type'] + timed.where(periods['weekday'] != 0, '')
+    return lines.groupby(periods['course']).agg('\n'.join) \
+        .reindex(range(courses_count), fill_value='')
+
+
+def exams_display(exams: pd.DataFrame, courses_count: int) -> pd.Series:
+    """return each course's exam dates joined into the output.xlsx string,
+    indexed by course position ('' for a course without exams)"""
+    lines = 'סמסטר ' + exams['semester'] + ' מועד ' + exams['moed'] + ': ' \
+        + exams['date'].dt.strftime('%d/%m/%y') + '\r\n'
+    return lines.groupby(exams['course']).agg(''.join) \
+        .reindex(range(courses_count), fill_value='')
+
+
+def flat_frame(courses: Sequence[Course]) -> pd.DataFrame:
+    """return the output.xlsx table of many courses: the same values as
+    outputsink.flatten_course, with the list columns converted in bulk"""
+    columns = courses_to_columns(courses)
+    frame = pd.DataFrame({
+        COLUMNS[field]: columns[field]
+        for field in ['id', 'name', 'institute', 'department', 'credits',
+                      'teaching_languages', 'staff', 'description',
+                      'attendance_requirements', 'exam_type']
+    })
+
+    semesters = columns['semesters']
+    has_semesters = np.array([s is not None for s in semesters], dtype=bool)
+    frame['Semester'] = pd.Series(
+        _semester_names([s or [] for s in semesters]),
+        dtype=object).where(has_semesters)
+
+    has_periods = np.array([periods is not None
+                            for periods in columns['periods']], dtype=bool)
+    frame['Course Lectures & Exercises Periods'] = periods_display(
+        periods_frame(courses), len(courses)).where(has_periods)
+
+    has_exams = np.array([exam_dates is not None
+                          for exam_dates in columns['exam_dates']],
+                         dtype=bool)
+    frame['Final Exam Due Date'] = exams_display(
+        exams_frame(courses), len(courses)).where(has_exams)
+
+    other_data = pd.DataFrame(columns['other_data'], index=frame.index)
+    frame = pd.concat([frame, other_data], axis=1)
+
+    # like a list of flatten_course dicts: only columns some course has
+    ordered = [column for column in FLAT_COLUMNS if column in frame] + \
+              [column for column in frame if column not in FLAT_COLUMNS]
+    return frame[ordered].dropna(axis=1, how='all')
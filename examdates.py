@@ -0,0 +1,141 @@
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from course import Course
+from coursetables import exams_frame
+
+
+def exam_arrays(courses: Sequence[Course]) \
+        -> Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray]]:
+    """return {(hebrew semester name, moed): (course positions, dates)} of
+    the exam dates of the given courses, dates as datetime64[D] sorted
+    ascending. A course's repeated exam date is kept once."""
+    exams = _sorted_exams(courses)
+    return {group: (rows['course'].to_numpy(),
+                    rows['date'].to_numpy('datetime64[D]'))
+            for group, rows in exams.groupby(['semester', 'moed'],
+                                             sort=True)}
+
+
+def _sorted_exams(courses: Sequence[Course]) -> pd.DataFrame:
+    exams = exams_frame(courses).drop_duplicates(
+        ['course', 'semester', 'moed', 'date'])
+    return exams.sort_values(['semester', 'moed', 'date', 'course'],
+                             kind='stable').reset_index(drop=True)
+
+
+def _exam_keys(exams: pd.DataFrame, within_days: int) \
+        -> Tuple[np.ndarray, int]:
+    """return a sortable int key per exam, its day number offset by its
+    (semester, moed) group so that exams of different groups are always
+    more than within_days apart, and the offset between groups"""
+    days = exams['date'].to_numpy('datetime64[D]').astype(np.int64)
+    groups = exams.groupby(['semester', 'moed'], sort=True).ngroup() \
+        .to_numpy(np.int64)
+    first_day = days.min() if len(days) else 0
+    stride = int(days.max() - first_day if len(days) else 0) \
+        + within_days + 1
+    return groups * stride + (days - first_day), stride
+
+
+def exam_pairs(courses: Sequence[Course], within_days: int = 0) \
+        -> pd.DataFrame:
+    """return every pair of exams of different courses of the same semester
+    and moed at most within_days apart (0 for same day clashes): course_id
+    and other_course_id, semester, moed, date and other_date, days_apart.
+    The course of the earlier exam comes first.
+
+    Exams are sorted by (group, date) once; the exams up to within_days
+    after each one are a contiguous run found by np.searchsorted, and the
+    runs are expanded into pairs without a Python loop."""
+    exams = _sorted_exams(courses)
+    keys, _ = _exam_keys(exams, within_days)
+    positions = np.arange(len(keys))
+    ends = np.searchsorted(keys, keys + within_days, side='right')
+    counts = ends - positions - 1
+    firsts = np.repeat(positions, counts)
+    # position of each pair within its exam's run, plus one
+    run_offsets = np.arange(len(firsts)) - np.repeat(
+        np.cumsum(counts) - counts, counts) + 1
+    seconds = firsts + run_offsets
+    course_positions = exams['course'].to_numpy()
+    different = course_positions[firsts] != course_positions[seconds]
+    firsts, seconds = firsts[different], seconds[different]
+
+    # repeated strings as categoricals, built from codes without copies
+    id_codes, ids = pd.factorize(np.array(
+        [str(course.get_id()) for course in courses], dtype=object))
+    semesters = exams['semester'].astype('category')
+    moeds = exams['moed'].astype('category')
+    dates = exams['date'].to_numpy()
+    return pd.DataFrame({
+        'course_id': pd.Categorical.from_codes(
+            id_codes[course_positions[firsts]], categories=ids),
+        'other_course_id': pd.Categorical.from_codes(
+            id_codes[course_positions[seconds]], categories=ids),
+        'semester': pd.Categorical.from_codes(
+            semesters.cat.codes.to_numpy()[firsts],
+            categories=semesters.cat.categories),
+        'moed': pd.Categorical.from_codes(
+            moeds.cat.codes.to_numpy()[firsts],
+            categories=moeds.cat.categories),
+        'date': dates[firsts],
+        'other_date': dates[seconds],
+        'days_apart': (keys[seconds] - keys[firsts]).astype(np.int32)
+    })
+
+
+def exam_clashes(courses: Sequence[Course]) -> pd.DataFrame:
+    """return the pairs of courses with exams on the same day of the same
+    semester and moed, see exam_pairs"""
+    return exam_pairs(courses, 0)
+
+
+def nearest_exam_gaps(courses: Sequence[Course]) -> pd.DataFrame:
+    """return every exam (course_id, semester, moed, date) with gap_days,
+    the days to the nearest exam of another course of the same semester
+    and moed: 0 on a clash, NaN for an exam alone in its group"""
+    exams = _sorted_exams(courses)
+    keys, stride = _exam_keys(exams, 0)
+    course_positions = exams['course'].to_numpy()
+    # exams sorted by (key, course): the nearest exams of another course
+    # are the ones just before and after the run of the exam's own course
+    count = len(keys)
+    run_starts = np.flatnonzero(course_positions[1:]
+                                != course_positions[:-1]) + 1
+    firsts = np.zeros(count, dtype=np.int64)
+    firsts[run_starts] = run_starts
+    previous = np.maximum.accumulate(firsts) - 1
+    lasts = np.full(count, count - 1, dtype=np.int64)
+    lasts[run_starts - 1] = run_starts - 1
+    following = np.minimum.accumulate(lasts[::-1])[::-1] + 1
+    previous_keys = keys[np.maximum(previous, 0)]
+    following_keys = keys[np.minimum(following, count - 1)]
+    gaps_before = np.where((previous >= 0)
+                           & (previous_keys // stride == keys // stride),
+                           keys - previous_keys, np.inf)
+    gaps_after = np.where((following < count)
+                          & (following_keys // stride == keys // stride),
+                          following_keys - keys, np.inf)
+    gaps = np.minimum(gaps_before, gaps_after)
+    ids = np.array([str(course.get_id()) for course in courses],
+                   dtype=object)
+    return pd.DataFrame({
+        'course_id': ids[exams['course'].to_numpy()],
+        'semester': exams['semester'],
+        'moed': exams['moed'],
+        'date': exams['date'].to_numpy('datetime64[D]'),
+        'gap_days': np.where(np.isinf(gaps), np.nan, gaps)
+    })
+
+
+def spacing_report(courses: Sequence[Course],
+                   max_days: int = 7) -> pd.DataFrame:
+    """return the number of exam pairs of different courses 0 to max_days
+    apart, one row per (semester, moed) and one column per days apart"""
+    pairs = exam_pairs(courses, max_days)
+    return pairs.groupby(['semester', 'moed', 'days_apart']).size() \
+        .unstack('days_apart', fill_value=0) \
+        .reindex(columns=range(max_days + 1), fill_value=0)
@@ -0,0 +1,230 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+import zlib
+from threading import Lock
+from typing import Dict
+from urllib.parse import urlsplit
+
+from metrics import Metrics, default_metrics
+from transport import FetchResult, HttpTransport
+
+DAY = 24 * 60 * 60
+
+
+class OfflineCacheMiss(LookupError):
+    """raised in offline mode when a url isn't in the cache"""
+
+
+class CacheEntry:
+    """metadata of a cached response"""
+
+    def __init__(self, url: str, etag: str|None, last_modified: str|None,
+                 fetched_at: float, size: int):
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+        self.size = size                        # compressed size in bytes
+
+
+class HttpCache:
+    """on-disk cache of response bodies keyed by url.
+
+    Bodies are stored zlib compressed, one file each, and indexed in a small
+    sqlite database. When the stored bodies exceed max_bytes the least
+    recently used entries are evicted."""
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024):
+        self.__directory = directory
+        self.__max_bytes = max_bytes
+        self.__lock = Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.__db = sqlite3.connect(os.path.join(directory, 'index.sqlite'),
+                                    check_same_thread=False)
+        self.__db.execute('CREATE TABLE IF NOT EXISTS entries ('
+                          'key TEXT PRIMARY KEY, url TEXT, etag TEXT, '
+                          'last_modified TEXT, fetched_at REAL, '
+                          'last_used REAL, size INTEGER)')
+        self.__db.execute('CREATE INDEX IF NOT EXISTS entries_last_used '
+                          'ON entries (last_used)')
+        self.__db.commit()
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.__directory, key + '.z')
+
+    def lookup(self, url: str) -> CacheEntry|None:
+        """return the entry cached for url, or None"""
+        with self.__lock:
+            row = self.__db.execute(
+                'SELECT url, etag, last_modified, fetched_at, size '
+                'FROM entries WHERE key = ?', (self._key(url),)).fetchone()
+        return CacheEntry(*row) if row is not None else None
+
+    def read(self, url: str) -> bytes|None:
+        """return the cached body of url, or None if it isn't cached"""
+        key = self._key(url)
+        try:
+            with open(self._body_path(key), 'rb') as body_file:
+                content = zlib.decompress(body_file.read())
+        except FileNotFoundError:
+            return None
+        with self.__lock:
+            self.__db.execute('UPDATE entries SET last_used = ? '
+                              'WHERE key = ?', (time.time(), key))
+            self.__db.commit()
+        return content
+
+    def store(self, url: str, content: bytes, etag: str|None = None,
+              last_modified: str|None = None) -> None:
+        """cache the body of url, evicting old entries if needed"""
+        key = self._key(url)
+        compressed = zlib.compress(content)
+        now = time.time()
+        # the body is written aside and renamed over the old one, so a
+        # concurrent read sees either body whole
+        body_fd, temp_path = tempfile.mkstemp(dir=self.__directory,
+                                              suffix='.tmp')
+        try:
+            with os.fdopen(body_fd, 'wb') as body_file:
+                body_file.write(compressed)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        with self.__lock:
+            os.replace(temp_path, self._body_path(key))
+            self.__db.execute('INSERT OR REPLACE INTO entries '
+                              'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                              (key, url, etag, last_modified, now, now,
+                               len(compressed)))
+            self._evict()
+            self.__db.commit()
+
+    def revalidated(self, url: str) -> None:
+        """mark the entry of url as fresh again (after a 304 response)"""
+        now = time.time()
+        with self.__lock:
+            self.__db.execute('UPDATE entries SET fetched_at = ?, '
+                              'last_used = ? WHERE key = ?',
+                              (now, now, self._key(url)))
+            self.__db.commit()
+
+    def _evict(self) -> None:
+        total, = self.__db.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()
+        if total <= self.__max_bytes:
+            return
+        rows = self.__db.execute('SELECT key, size FROM entries '
+                                 'ORDER BY last_used').fetchall()
+        for key, size in rows:
+            if total <= self.__max_bytes:
+                break
+            self.__db.execute('DELETE FROM entries WHERE key = ?', (key,))
+            try:
+                os.remove(self._body_path(key))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self) -> None:
+        """remove every cached entry"""
+        with self.__lock:
+            for key, in self.__db.execute('SELECT key FROM entries'):
+                try:
+                    os.remove(self._body_path(key))
+                except FileNotFoundError:
+                    pass
+            self.__db.execute('DELETE FROM entries')
+            self.__db.commit()
+
+    def stats(self) -> Dict[str, float|None]:
+        """return the number of cached entries, their compressed size in
+        bytes and when the oldest and newest of them were fetched"""
+        with self.__lock:
+            entries, size, oldest, newest = self.__db.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0), MIN(fetched_at), '
+                'MAX(fetched_at) FROM entries').fetchone()
+        return {'entries': entries, 'bytes': size, 'oldest': oldest,
+                'newest': newest}
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__db.close()
+
+    def __enter__(self) -> 'HttpCache':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class CachedTransport:
+    """transport serving pages from an HttpCache.
+
+    Fresh entries (younger than their host's ttl) are served without any
+    request, stale ones are revalidated with If-None-Match /
+    If-Modified-Since. In offline mode only the cache is used, stale or
+    not, and a missing page raises OfflineCacheMiss."""
+
+    def __init__(self, transport: HttpTransport, cache: HttpCache,
+                 ttls: Dict[str, float]|None = None,
+                 default_ttl: float = DAY, offline: bool = False,
+                 metrics: Metrics|None = None):
+        self.__transport = transport
+        self.__metrics = metrics if metrics is not None else default_metrics
+        self.__cache = cache
+        self.__ttls = ttls if ttls is not None else {}
+        self.__default_ttl = default_ttl
+        self.__offline = offline
+
+    def _ttl(self, url: str) -> float:
+        return self.__ttls.get(urlsplit(url).netloc, self.__default_ttl)
+
+    def _cached_result(self, url: str) -> FetchResult|None:
+        content = self.__cache.read(url)
+        if content is None:
+            return None
+        return FetchResult(url, 200, content, {}, from_cache=True)
+
+    def fetch(self, url: str, headers: Dict|None = None) -> FetchResult:
+        """return the page at url, from the cache when possible"""
+        entry = self.__cache.lookup(url)
+        if entry is not None and (self.__offline or
+                                  time.time() - entry.fetched_at
+                                  < self._ttl(url)):
+            result = self._cached_result(url)
+            if result is not None:
+                self.__metrics.increment('cache.hit')
+                return result
+        if self.__offline:
+            self.__metrics.increment('cache.offline_miss')
+            raise OfflineCacheMiss(url)
+
+        request_headers = dict(headers) if headers is not None else {}
+        if entry is not None and entry.etag is not None:
+            request_headers['If-None-Match'] = entry.etag
+        if entry is not None and entry.last_modified is not None:
+            request_headers['If-Modified-Since'] = entry.last_modified
+        result = self.__transport.fetch(url, headers=request_headers)
+
+        if result.status == 304 and entry is not None:
+            cached = self._cached_result(url)
+            if cached is not None:
+                self.__metrics.increment('cache.revalidated')
+                self.__cache.revalidated(url)
+                cached.elapsed = result.elapsed
+                return cached
+            # body vanished from disk, fetch it again unconditionally
+            result = self.__transport.fetch(url, headers=headers)
+        self.__metrics.increment('cache.miss')
+        if result.status == 200:
+            self.__cache.store(url, result.content,
+                               result.headers.get('ETag'),
+                               result.headers.get('Last-Modified'))
+        return result
@@ -1,279 +1,479 @@
-from collections import defaultdict
-from datetime import datetime, time
-
-from course import Course
-from coursescraper import CourseScraper
-from bs4 import BeautifulSoup as bs
-import requests
-from typing import List, Dict
-from re import search
-
-__huji_semesters_symbols = {
-    'א\'': ['A'],
-    'ב\'': ['B'],
-    'א\' או ב\'': ['A', 'B'],
-    'קורס שנתי': ['yearly']
-}
-
-def huji_semester_to_symbol(hebrew_semester: str) -> List[str]:
-    """return A/B/yearly as a list, or given argument if it isn't recognize"""
-    if hebrew_semester in __huji_semesters_symbols.keys():
-        return __huji_semesters_symbols[hebrew_semester]
-    else:
-        return [hebrew_semester]
-
-def symbol_to_huji_semester(symbol_semester_list: List[str]) -> str:
-    """return hebrew semester name from A/B/yearly symbols list"""
-    for key in __huji_semesters_symbols.keys():
-        if sorted(__huji_semesters_symbols[key]) == \
-                sorted(symbol_semester_list):
-            return key
-    else:
-        return ','.join(symbol_semester_list)
-
-
-__hebrew_weekday_symbols = {
-    'א': 1,
-    'ב': 2,
-    'ג': 3,
-    'ד': 4,
-    'ה': 5,
-    'ו': 6,
-    'ש': 7,
-    'ז': 7
-}
-
-def hebrew_weekday_symbol_to_weekday_number(symbol: str) -> int:
-    """return equivalent weekday number [1-7] to hebrew symbol [א-ו,ש]
-    or 0 if unrecognized"""
-    if symbol in __hebrew_weekday_symbols.keys():
-        return __hebrew_weekday_symbols[symbol]
-    else:
-        return 0
-
-def weekday_number_to_hebrew_weekday_symbol(weekday_number: int) -> str|None:
-    """return equivalent hebrew symbol [א-ו,ש] to weekday number [1-7]
-        or None if unrecognized"""
-    for key in __hebrew_weekday_symbols.keys():
-        if __hebrew_weekday_symbols[key] == weekday_number:
-            return key
-    return None
-
-class HujiHebrewCourseScraper(CourseScraper):
-
-    def __init__(self, course_id: str, year: int):
-        self.__catalog_url = f"https://catalog.huji.ac.il/pages/wfrCourse.aspx?" \
-                             "year={year}&faculty=12&courseId={course_id}" \
-            .format(year=year, course_id=course_id)
-        self.__syllabus_url = f"https://shnaton.huji.ac.il/index.php/NewSyl/" \
-                              "{course_id}/1/{year}/" \
-            .format(year=year, course_id=course_id)
-
-        self.__syllabus_page = None
-        self.__catalog_page = None
-        self.scrape(course_id, year)
-
-        self.__id = course_id
-        self.__institute = 'האוניברסיטה העברית בירושלים'
-
-    def update_course(self, course: Course) -> None:
-        super().update_course(course)
-
-        course.other_data.update({
-            'catalog_url': self.__catalog_url,
-            'syllabus_url': self.__syllabus_url,
-            'coordinator': self.get_coordinator(),
-            'coordinator mail': self.get_coordinator_mail()
-        })
-
-
-    def scrape(self, course_id: str, year: int):
-        self.__syllabus_page = \
-            self._get_huji_he_course_syllabus_page(course_id, year)
-        self.__catalog_page = \
-            self._get_huji_he_course_catalog_page(course_id, year)
-
-    def _get_huji_he_course_catalog_page(self, course_id: str, year: int):
-        catalog_data = requests.get(self.__catalog_url)
-        catalog_soup = bs(catalog_data.content.decode('utf-8'), 'html5lib')
-        return catalog_soup
-
-    def _get_huji_he_course_syllabus_page(self, course_id: str, year: int) -> bs:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_10_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/39.0.2171.95 Safari/537.36'}
-        syllabus_data = requests.get(self.__syllabus_url, headers=headers)
-        syllabus_soup = bs(syllabus_data.content.decode('windows-1255'), 'html5lib')
-        return syllabus_soup
-
-    def _find_in_text_syllabus_by_header(self, header: str):
-        for tag in self.__syllabus_page.find_all('div'):
-            for b_tag in tag.find_all('b'):
-                if header in b_tag.text:
-                    # remove header & newlines
-                    ret_value = tag.text[len(b_tag.text)+1:]
-                    ret_value = ret_value.replace('\n', '')
-                    return ret_value
-        return None
-
-    def get_course_id(self) -> str|None:
-        """return given course id"""
-        return self.__id
-
-    def get_institute(self) -> str|None:
-        """return given course institute"""
-        return self.__institute
-
-    def get_name(self) -> str|None:
-        """scrape course name"""
-        name_tag = self.__catalog_page.find(name='span',
-                            attrs={'id': 'lblCourseName'})
-        return name_tag.text if name_tag is not None else None
-
-    def get_department(self) -> str|None:
-        """scrape course department"""
-        department_tag = self.__catalog_page.find(name='span',
-                            attrs={'class': 'toarTitle'})
-        return department_tag.text if department_tag is not None else None
-
-    def get_credits(self) -> int|None:
-        """scrape course credits"""
-        credits_tag = self.__catalog_page.find(name='span',
-                            attrs={'id': 'lblPoints'})
-        return int(credits_tag.text) if credits_tag is not None else None
-
-    def get_semesters(self) -> List[str]|None:
-        """scrape semester"""
-        semester_tag = self.__catalog_page.find(name='span',
-                            attrs={'id': 'lblSemester'})
-        if semester_tag is not None:
-            semester_text = semester_tag.text
-            return huji_semester_to_symbol(semester_text)
-        else:
-            return None
-
-    def get_periods(self) -> List[Dict]|None:
-        """scrape lectures & exercises periods"""
-        periods = []
-        periods_table = self.__catalog_page.find(name='table',
-                            attrs={'id': 'grdMoadim'})
-        if periods_table is None: return None
-
-        periods_tag_list = periods_table.find_all(name='tr',
-                            class_=lambda x: x != 'courseTabHeader')
-        if periods_tag_list is None: return None
-
-        for period_tag in periods_tag_list:
-            class_type_tag = \
-                period_tag.find(name='span', id=lambda x: 'lblGroupType' in x)
-            class_start_time_tag = \
-                period_tag.find(name='span', id=lambda x: 'lblFrom' in x)
-            class_end_time_tag = \
-                period_tag.find(name='span', id=lambda x: 'lblTo' in x)
-            class_day_tag = \
-                period_tag.find(name='span', id=lambda x: 'lblDay' in x)
-
-            period_dict = {
-                'type': class_type_tag.text,
-                'weekday': hebrew_weekday_symbol_to_weekday_number(
-                               class_day_tag.text)
-            }
-
-            # period stat time
-            try:
-                period_dict['start_time'] = datetime.strptime(
-                    class_start_time_tag.text, "%H:%M").time()
-            except ValueError:
-                period_dict['start_time'] = time()
-
-            # period end time
-            try:
-                period_dict['end_time'] = datetime.strptime(
-                    class_end_time_tag.text, "%H:%M").time()
-            except ValueError:
-                period_dict['end_time'] = time()
-
-            # add to periods list
-            if period_dict not in periods:
-                periods.append(period_dict)
-
-        return periods
-
-    def get_teaching_languages(self):
-        """scrape teaching languages"""
-        teaching_languages = self._find_in_text_syllabus_by_header('שפת ההוראה')
-        return teaching_languages
-
-    def get_staff(self):
-        """scrape course staff"""
-        staff = self._find_in_text_syllabus_by_header('מורי הקורס')
-        return staff
-
-    def get_description(self):
-        """scrape course description"""
-        description = self._find_in_text_syllabus_by_header('תאור כללי של הקורס')
-        return description
-
-    def get_attendance_requirements(self):
-        """scrape attendance requirements"""
-        requirements_text = self._find_in_text_syllabus_by_header('דרישות נוכחות')
-        if requirements_text is None:
-            return None
-        if 'אין' in requirements_text:
-            return 0
-        elif requirements_text.isnumeric():
-            return int(requirements_text)/100
-        else:
-            return None
-
-    def get_exam_type(self):
-        """scrape exam type"""
-        teaching_languages_tag = self.__catalog_page.find(name='span',
-                                                          id='lblExamType')
-        return teaching_languages_tag.text if teaching_languages_tag \
-                                              is not None else None
-
-    def get_exam_dates(self):
-        """scrape exam dates"""
-        dates = []
-        exam_dates_table = self.__catalog_page.find(name='table',
-                                                    id='grdBhinot')
-        if exam_dates_table is None:
-            return None
-        exam_dates_line_list = exam_dates_table.find_all(name='tr',
-                                                attrs={'class': 'conditions'})
-        for exam_dates_line in exam_dates_line_list:
-
-            date_tag = exam_dates_line.find(name='span',
-                                            id=lambda x: 'lblBhinotDate' in x)
-            match = search('\d{2}/\d{2}/\d{4}', date_tag.text)
-            if match.group(0) is None:
-                return None
-            date = datetime.strptime(match.group(0), '%d/%m/%Y').date()
-            # get metadata
-            semester_tag = exam_dates_line.find(name='span',
-                                        id=lambda x: 'lblBhinotSemeste' in x)
-            MOED_tag = exam_dates_line.find(name='span',
-                                        id=lambda x: 'lblBhinotMoed' in x)
-
-            metadata = {
-                'semester': huji_semester_to_symbol(semester_tag.text),
-                'MOED': MOED_tag.text
-            }
-            # push to array
-            dates.append((date, metadata))
-
-        return dates
-
-
-    def get_coordinator(self):
-        """scrape course coordinator"""
-        coordinator = self \
-            ._find_in_text_syllabus_by_header('מורה אחראי על הקורס')
-        return coordinator
-    
-    
-    def get_coordinator_mail(self):
-        """scrape course coordinator mail"""
-        coordinator_mail = self \
-            ._find_in_text_syllabus_by_header('דוא"ל של המורה האחראי על הקורס')
+from collections import defaultdict
+from datetime import datetime, time
+
+from course import Course
+from coursescraper import CourseScraper
+from metrics import Metrics, default_metrics
+from transport import HttpTransport, get_default_transport
+from bs4 import BeautifulSoup as bs, SoupStrainer
+from typing import List, Dict, Set, Tuple
+from re import search
+
+try:
+    from bs4.filter import ElementFilter
+except ImportError:
+    # beautifulsoup4 < 4.13, parse_only takes a SoupStrainer
+    ElementFilter = None
+
+__huji_semesters_symbols = {
+    'א\'': ['A'],
+    'ב\'': ['B'],
+    'א\' או ב\'': ['A', 'B'],
+    'קורס שנתי': ['yearly']
+}
+
+def huji_semester_to_symbol(hebrew_semester: str) -> List[str]:
+    """return A/B/yearly as a list, or given argument if it isn't recognize"""
+    if hebrew_semester in __huji_semesters_symbols.keys():
+        return __huji_semesters_symbols[hebrew_semester]
+    else:
+        return [hebrew_semester]
+
+# reverse lookup: sorted symbols -> hebrew semester name
+__symbols_huji_semesters = {
+    tuple(sorted(symbols)): hebrew_semester
+    for hebrew_semester, symbols in __huji_semesters_symbols.items()
+}
+
+def symbol_to_huji_semester(symbol_semester_list: List[str]) -> str:
+    """return hebrew semester name from A/B/yearly symbols list"""
+    key = tuple(sorted(symbol_semester_list))
+    if key in __symbols_huji_semesters:
+        return __symbols_huji_semesters[key]
+    else:
+        return ','.join(symbol_semester_list)
+
+
+__hebrew_weekday_symbols = {
+    'א': 1,
+    'ב': 2,
+    'ג': 3,
+    'ד': 4,
+    'ה': 5,
+    'ו': 6,
+    'ש': 7,
+    'ז': 7
+}
+
+def hebrew_weekday_symbol_to_weekday_number(symbol: str) -> int:
+    """return equivalent weekday number [1-7] to hebrew symbol [א-ו,ש]
+    or 0 if unrecognized"""
+    if symbol in __hebrew_weekday_symbols.keys():
+        return __hebrew_weekday_symbols[symbol]
+    else:
+        return 0
+
+# reverse lookup: weekday number -> first hebrew symbol of that day
+__weekday_numbers_hebrew_symbols = {
+    number: symbol
+    for symbol, number in reversed(__hebrew_weekday_symbols.items())
+}
+
+def weekday_number_to_hebrew_weekday_symbol(weekday_number: int) -> str|None:
+    """return equivalent hebrew symbol [א-ו,ש] to weekday number [1-7]
+        or None if unrecognized"""
+    return __weekday_numbers_hebrew_symbols.get(weekday_number)
+
+def index_syllabus_sections(syllabus_page: bs) -> Dict[str, str]:
+    """return {bold header text: section text} of a syllabus page.
+
+    A section is the text of the outermost div holding the header, without
+    the header itself, its line breaks kept as '\n'. Headers are kept in
+    document order and a repeated header keeps its first section, so
+    scanning the keys gives the same match as scanning every div and every
+    bold in it."""
+    sections: Dict[str, str] = {}
+    div_texts: Dict[int, str] = {}
+    for b_tag in syllabus_page.find_all('b'):
+        header = b_tag.text
+        if header in sections:
+            continue
+        div_tag = None
+        for parent in b_tag.parents:
+            if parent.name == 'div':
+                div_tag = parent
+        if div_tag is None:
+            continue
+        if id(div_tag) not in div_texts:
+            div_texts[id(div_tag)] = div_tag.text
+        # remove header (html.parser keeps the \r of crlf)
+        section = div_texts[id(div_tag)][len(header)+1:]
+        sections[header] = section.replace('\r', '')
+    return sections
+
+# where the pages are served from, overridable e.g. for a local stand-in
+CATALOG_BASE_URL = 'https://catalog.huji.ac.il'
+SYLLABUS_BASE_URL = 'https://shnaton.huji.ac.il'
+# faculty the catalog urls point at when not told otherwise
+DEFAULT_FACULTY = 12
+
+def page_key_from_url(url: str) -> Tuple[str, int, str]|None:
+    """return the (course id, year, 'catalog' / 'syllabus') of a course
+    page url built by the scraper, or None for any other url"""
+    catalog_match = search(r'/pages/wfrCourse\.aspx\?(?=.*\byear=(\d+))'
+                           r'(?=.*\bcourseId=(\w+))', url)
+    if catalog_match is not None:
+        return catalog_match.group(2), int(catalog_match.group(1)), 'catalog'
+    syllabus_match = search(r'/index\.php/NewSyl/(\w+)/1/(\d+)/', url)
+    if syllabus_match is not None:
+        return syllabus_match.group(1), int(syllabus_match.group(2)), \
+            'syllabus'
+    return None
+
+# page -> the update_course fields (other_data keys included) read from it
+PAGE_FIELDS: Dict[str, Set[str]] = {
+    'catalog': {'name', 'department', 'credits', 'semesters', 'periods',
+                'exam_type', 'exam_dates'},
+    'syllabus': {'teaching_languages', 'staff', 'description',
+                 'attendance_requirements', 'coordinator', 'coordinator mail',
+                 'staff members'}
+}
+
+# BeautifulSoup tree builders the scraper can parse pages with
+PARSERS = ('lxml', 'html.parser', 'html5lib')
+
+# the only catalog elements the getters read, with everything inside them
+__catalog_element_ids = {'lblCourseName', 'lblPoints', 'lblSemester',
+                         'lblExamType', 'grdMoadim', 'grdBhinot'}
+__catalog_element_class = 'toarTitle'
+
+def is_catalog_element(attrs: Dict) -> bool:
+    """return True for catalog page elements read by the scraper, by the
+    attributes of their start tag"""
+    if attrs.get('id') in __catalog_element_ids:
+        return True
+    classes = attrs.get('class') or []
+    if isinstance(classes, str):
+        classes = classes.split()
+    return __catalog_element_class in classes
+
+if ElementFilter is not None:
+    class CatalogElementFilter(ElementFilter):
+        """parse_only filter building only the catalog elements the
+        scraper reads, each with its whole subtree"""
+
+        def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+            return is_catalog_element(attrs or {})
+
+        def allow_string_creation(self, string: str) -> bool:
+            # only called for strings outside of the kept elements
+            return False
+
+    catalog_strainer = CatalogElementFilter()
+else:
+    # before 4.13 a SoupStrainer calls a name function with the tag's name
+    # and attributes, and keeps the whole subtree of a tag it matched
+    catalog_strainer = SoupStrainer(
+        lambda name, attrs: is_catalog_element(attrs or {}))
+
+class HujiHebrewCourseScraper(CourseScraper):
+
+    def __init__(self, course_id: str, year: int,
+                 transport: HttpTransport|None = None,
+                 parser: str = 'lxml',
+                 catalog_content: bytes|None = None,
+                 syllabus_content: bytes|None = None,
+                 partial: bool = True,
+                 metrics: Metrics|None = None,
+                 catalog_base_url: str = CATALOG_BASE_URL,
+                 syllabus_base_url: str = SYLLABUS_BASE_URL,
+                 faculty: int = DEFAULT_FACULTY):
+        """scraper of course_id of the given year. Nothing is fetched until
+        a getter needs its page.
+
+        parser is one of PARSERS. With partial, only the catalog elements
+        the getters read are built into a tree (html5lib always builds the
+        whole page). Pages given as catalog_content /
+        syllabus_content (raw response bodies) are parsed instead of
+        fetched, otherwise they are fetched from the given base urls.
+        faculty is the catalog faculty the course is listed under."""
+        if parser not in PARSERS:
+            raise ValueError('unknown parser {!r}, expected one of {}'
+                             .format(parser, ', '.join(PARSERS)))
+        self.__catalog_url = f"{catalog_base_url}/pages/wfrCourse.aspx?" \
+                             "year={year}&faculty={faculty}&" \
+                             "courseId={course_id}" \
+            .format(year=year, faculty=faculty, course_id=course_id)
+        self.__syllabus_url = f"{syllabus_base_url}/index.php/NewSyl/" \
+                              "{course_id}/1/{year}/" \
+            .format(year=year, course_id=course_id)
+
+        self.__transport = transport
+        self.__parser = parser
+        self.__partial = partial
+        self.__metrics = metrics if metrics is not None else default_metrics
+        self.__catalog_content = catalog_content
+        self.__syllabus_content = syllabus_content
+        # pages are fetched & parsed on first use, see scrape()
+        self.__syllabus_page = None
+        self.__syllabus_sections: Dict[str, str]|None = None
+        self.__catalog_page = None
+
+        self.__id = course_id
+        self.__year = year
+        self.__institute = 'האוניברסיטה העברית בירושלים'
+
+    def update_course(self, course: Course,
+                      fields: Set[str]|None = None) -> None:
+        super().update_course(course, fields)
+
+        other_data = {
+            'catalog_url': lambda: self.__catalog_url,
+            'syllabus_url': lambda: self.__syllabus_url,
+            'coordinator': self.get_coordinator,
+            'coordinator mail': self.get_coordinator_mail,
+            'staff members': self.get_staff_members
+        }
+        course.other_data.update({
+            key: get_value() for key, get_value in other_data.items()
+            if fields is None or key in fields
+        })
+
+    def scrape(self, course_id: str, year: int):
+        """fetch & parse both pages now instead of on first use"""
+        with self.__metrics.timer('scrape'):
+            self.__syllabus_page = \
+                self._get_huji_he_course_syllabus_page(course_id, year)
+            self.__syllabus_sections = \
+                index_syllabus_sections(self.__syllabus_page)
+            self.__catalog_page = \
+                self._get_huji_he_course_catalog_page(course_id, year)
+
+    def get_metrics(self) -> Metrics:
+        return self.__metrics
+
+    def _transport(self) -> HttpTransport:
+        if self.__transport is None:
+            self.__transport = get_default_transport()
+        return self.__transport
+
+    def _catalog_page(self) -> bs:
+        if self.__catalog_page is None:
+            self.__catalog_page = \
+                self._get_huji_he_course_catalog_page(self.__id, self.__year)
+        return self.__catalog_page
+
+    def _syllabus_sections(self) -> Dict[str, str]:
+        if self.__syllabus_sections is None:
+            self.__syllabus_page = \
+                self._get_huji_he_course_syllabus_page(self.__id, self.__year)
+            self.__syllabus_sections = \
+                index_syllabus_sections(self.__syllabus_page)
+        return self.__syllabus_sections
+
+    def fetch_catalog_content(self) -> bytes:
+        """return the raw catalog page, fetching it if it wasn't given"""
+        if self.__catalog_content is None:
+            with self.__metrics.timer('fetch.catalog'):
+                self.__catalog_content = \
+                    self._transport().fetch(self.__catalog_url).content
+        return self.__catalog_content
+
+    def fetch_syllabus_content(self) -> bytes:
+        """return the raw syllabus page, fetching it if it wasn't given"""
+        if self.__syllabus_content is None:
+            headers = {
+                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_10_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/39.0.2171.95 Safari/537.36'}
+            with self.__metrics.timer('fetch.syllabus'):
+                self.__syllabus_content = self._transport().fetch(
+                    self.__syllabus_url, headers=headers).content
+        return self.__syllabus_content
+
+    def _get_huji_he_course_catalog_page(self, course_id: str, year: int):
+        catalog_content = self.fetch_catalog_content()
+        with self.__metrics.timer('parse.catalog'):
+            catalog_soup = bs(catalog_content, self.__parser,
+                              from_encoding='utf-8',
+                              parse_only=catalog_strainer
+                              if self.__partial
+                              and self.__parser != 'html5lib' else None)
+        return catalog_soup
+
+    def _get_huji_he_course_syllabus_page(self, course_id: str, year: int) -> bs:
+        syllabus_content = self.fetch_syllabus_content()
+        with self.__metrics.timer('parse.syllabus'):
+            syllabus_soup = bs(syllabus_content, self.__parser,
+                               from_encoding='windows-1255')
+        return syllabus_soup
+
+    def _find_in_text_syllabus_by_header(self, header: str):
+        lines = self._find_lines_in_text_syllabus_by_header(header)
+        return ''.join(lines) if lines is not None else None
+
+    def _find_lines_in_text_syllabus_by_header(self, header: str) \
+            -> List[str]|None:
+        """return the lines of the section under header, or None"""
+        for b_header, section in self._syllabus_sections().items():
+            if header in b_header:
+                return section.split('\n')
+        return None
+
+    def get_course_id(self) -> str|None:
+        """return given course id"""
+        return self.__id
+
+    def get_institute(self) -> str|None:
+        """return given course institute"""
+        return self.__institute
+
+    def get_name(self) -> str|None:
+        """scrape course name"""
+        name_tag = self._catalog_page().find(name='span',
+                            attrs={'id': 'lblCourseName'})
+        return name_tag.text if name_tag is not None else None
+
+    def get_department(self) -> str|None:
+        """scrape course department"""
+        department_tag = self._catalog_page().find(name='span',
+                            attrs={'class': 'toarTitle'})
+        return department_tag.text if department_tag is not None else None
+
+    def get_credits(self) -> int|None:
+        """scrape course credits"""
+        credits_tag = self._catalog_page().find(name='span',
+                            attrs={'id': 'lblPoints'})
+        return int(credits_tag.text) if credits_tag is not None else None
+
+    def get_semesters(self) -> List[str]|None:
+        """scrape semester"""
+        semester_tag = self._catalog_page().find(name='span',
+                            attrs={'id': 'lblSemester'})
+        if semester_tag is not None:
+            semester_text = semester_tag.text
+            return huji_semester_to_symbol(semester_text)
+        else:
+            return None
+
+    def get_periods(self) -> List[Dict]|None:
+        """scrape lectures & exercises periods"""
+        periods = []
+        periods_table = self._catalog_page().find(name='table',
+                            attrs={'id': 'grdMoadim'})
+        if periods_table is None: return None
+
+        periods_tag_list = periods_table.find_all(name='tr',
+                            class_=lambda x: x != 'courseTabHeader')
+        if periods_tag_list is None: return None
+
+        for period_tag in periods_tag_list:
+            class_type_tag = \
+                period_tag.find(name='span', id=lambda x: 'lblGroupType' in x)
+            class_start_time_tag = \
+                period_tag.find(name='span', id=lambda x: 'lblFrom' in x)
+            class_end_time_tag = \
+                period_tag.find(name='span', id=lambda x: 'lblTo' in x)
+            class_day_tag = \
+                period_tag.find(name='span', id=lambda x: 'lblDay' in x)
+
+            period_dict = {
+                'type': class_type_tag.text,
+                'weekday': hebrew_weekday_symbol_to_weekday_number(
+                               class_day_tag.text)
+            }
+
+            # period stat time
+            try:
+                period_dict['start_time'] = datetime.strptime(
+                    class_start_time_tag.text, "%H:%M").time()
+            except ValueError:
+                period_dict['start_time'] = time()
+
+            # period end time
+            try:
+                period_dict['end_time'] = datetime.strptime(
+                    class_end_time_tag.text, "%H:%M").time()
+            except ValueError:
+                period_dict['end_time'] = time()
+
+            # add to periods list
+            if period_dict not in periods:
+                periods.append(period_dict)
+
+        return periods
+
+    def get_teaching_languages(self):
+        """scrape teaching languages"""
+        teaching_languages = self._find_in_text_syllabus_by_header('שפת ההוראה')
+        return teaching_languages
+
+    def get_staff(self):
+        """scrape course staff"""
+        staff = self._find_in_text_syllabus_by_header('מורי הקורס')
+        return staff
+
+    def get_staff_members(self) -> List[str]|None:
+        """scrape course staff, one member per line of the section"""
+        lines = self._find_lines_in_text_syllabus_by_header('מורי הקורס')
+        if lines is None:
+            return None
+        return [line.strip() for line in lines if line.strip()]
+
+    def get_description(self):
+        """scrape course description"""
+        description = self._find_in_text_syllabus_by_header('תאור כללי של הקורס')
+        return description
+
+    def get_attendance_requirements(self):
+        """scrape attendance requirements"""
+        requirements_text = self._find_in_text_syllabus_by_header('דרישות נוכחות')
+        if requirements_text is None:
+            return None
+        if 'אין' in requirements_text:
+            return 0
+        elif requirements_text.isnumeric():
+            return int(requirements_text)/100
+        else:
+            return None
+
+    def get_exam_type(self):
+        """scrape exam type"""
+        teaching_languages_tag = self._catalog_page().find(name='span',
+                                                           id='lblExamType')
+        return teaching_languages_tag.text if teaching_languages_tag \
+                                              is not None else None
+
+    def get_exam_dates(self):
+        """scrape exam dates"""
+        dates = []
+        exam_dates_table = self._catalog_page().find(name='table',
+                                                     id='grdBhinot')
+        if exam_dates_table is None:
+            return None
+        exam_dates_line_list = exam_dates_table.find_all(name='tr',
+                                                attrs={'class': 'conditions'})
+        for exam_dates_line in exam_dates_line_list:
+
+            date_tag = exam_dates_line.find(name='span',
+                                            id=lambda x: 'lblBhinotDate' in x)
+            match = search('\d{2}/\d{2}/\d{4}', date_tag.text)
+            if match.group(0) is None:
+                return None
+            date = datetime.strptime(match.group(0), '%d/%m/%Y').date()
+            # get metadata
+            semester_tag = exam_dates_line.find(name='span',
+                                        id=lambda x: 'lblBhinotSemeste' in x)
+            MOED_tag = exam_dates_line.find(name='span',
+                                        id=lambda x: 'lblBhinotMoed' in x)
+
+            metadata = {
+                'semester': huji_semester_to_symbol(semester_tag.text),
+                'MOED': MOED_tag.text
+            }
+            # push to array
+            dates.append((date, metadata))
+
+        return dates
+
+
+    def get_coordinator(self):
+        """scrape course coordinator"""
+        coordinator = self \
+            ._find_in_text_syllabus_by_header('מורה אחראי על הקורס')
+        return coordinator
+    
+    
+    def get_coordinator_mail(self):
+        """scrape course coordinator mail"""
+        coordinator_mail = self \
+            ._find_in_text_syllabus_by_header('דוא"ל של המורה האחראי על הקורס')
         return coordinator_mail
\ No newline at end of file
@@ -0,0 +1,359 @@
+import argparse
+import json
+import os
+import re
+import sys
+from contextlib import ExitStack
+from typing import Iterable, List
+
+# heavy dependencies (requests, bs4, lxml, pandas, pyarrow) are imported
+# inside the commands that need them, so the others start in milliseconds
+
+DEFAULT_OUTPUTS = ['output.xlsx', 'output.jsonl', 'courses.sqlite']
+
+
+def read_ids_file(path: str) -> List[str]:
+    """return the course ids listed in a file, separated by whitespace or
+    commas, a '#' starting a comment"""
+    with open(path, encoding='utf-8') as ids_file:
+        return [course_id for line in ids_file
+                for course_id in re.split(r'[\s,]+', line.split('#')[0])
+                if course_id]
+
+
+def _open_output(path: str, year: int):
+    from outputsink import open_sink
+
+    if os.path.splitext(path)[1].lower() == '.sqlite':
+        return open_sink(path, year=year)
+    return open_sink(path)
+
+
+def scrape(course_ids: Iterable, year: int,
+           outputs: List[str]|None = None, crawl: bool = False,
+           incremental: bool = False, reparse: bool = False,
+           concurrency: int = 16, cache_dir: str = '.cache',
+           archive_dir: str = 'archive',
+           metrics_path: str = 'metrics.json') -> None:
+    """scrape the given courses (or, with crawl, every course listed in the
+    catalog) of year into the outputs.
+
+    With incremental, only the courses that changed since the last
+    incremental run are written, with their diff, to changes_<year>.jsonl.
+    With reparse, the output is rebuilt from the archived pages of the year
+    without any network access."""
+    from catalogcrawler import crawl_course_ids, scrape_by_faculty
+    from httpcache import DAY, CachedTransport, HttpCache
+    from huji_he_coursescraper import DEFAULT_FACULTY
+    from incremental import PageHashStore, scrape_changes
+    from journal import RunJournal, dedupe_ids
+    from metrics import ProgressReporter, default_metrics
+    from pagearchive import ArchivingTransport, PageArchive, reparse_archive
+    from transport import HttpTransport
+
+    outputs = outputs or DEFAULT_OUTPUTS
+    # the cache, archive and journal are closed however the run ends
+    with ExitStack() as stack:
+        http_transport = HttpTransport()
+        # pages rarely change within a semester, keep them for a while
+        cache = stack.enter_context(HttpCache(cache_dir))
+        transport = CachedTransport(http_transport, cache,
+                                    ttls={'catalog.huji.ac.il': DAY,
+                                          'shnaton.huji.ac.il': 7 * DAY})
+        # every page version fetched is kept, for reparsing after a fix
+        if not reparse:
+            archive = stack.enter_context(PageArchive(archive_dir))
+            transport = ArchivingTransport(transport, archive)
+        if crawl:
+            # (course id, faculty) of every course listed in the catalog
+            faculties = dict(crawl_course_ids(year, transport,
+                                              concurrency=concurrency))
+            course_ids = list(faculties)
+        course_ids = dedupe_ids(course_ids)
+        if not crawl:
+            faculties = {str(course_id): DEFAULT_FACULTY
+                         for course_id in course_ids}
+
+        if incremental:
+            # unchanged pages aren't parsed, a new course is diffed against
+            # its version of the year before
+            with PageHashStore('pages.db') as store, \
+                    open('changes_{}.jsonl'.format(year), 'w',
+                         encoding='utf-8') as changes_file:
+                for faculty in sorted(set(faculties.values())):
+                    for change in scrape_changes(
+                            [course_id for course_id in faculties
+                             if faculties[course_id] == faculty],
+                            year, store, concurrency=concurrency,
+                            transport=transport,
+                            scraper_options={'faculty': faculty},
+                            baseline_year=year - 1):
+                        changes_file.write(json.dumps(
+                            dict(change.to_record(),
+                                 record=change.course.to_record()),
+                            ensure_ascii=False) + '\n')
+        else:
+            if reparse:
+                with PageArchive(archive_dir, writable=False) as archived:
+                    course_ids = archived.courses(year)
+                journal = None
+                courses = reparse_archive(archive_dir, year)
+            else:
+                # an interrupted run resumes from the courses already in
+                # the journal
+                journal_path = 'journal_{}.jsonl'.format(year)
+                journal = stack.enter_context(RunJournal(journal_path))
+                courses = scrape_by_faculty(faculties, year,
+                                            concurrency=concurrency,
+                                            transport=transport,
+                                            journal=journal)
+            output_sinks = [_open_output(path, year) for path in outputs]
+            progress = ProgressReporter(len(course_ids))
+            for course in courses:
+                with default_metrics.timer('output.write'):
+                    for output_sink in output_sinks:
+                        output_sink.write(course)
+                progress.update(course.get_id())
+
+            with default_metrics.timer('output.close'):
+                for output_sink in output_sinks:
+                    output_sink.close()
+            if journal is not None:
+                journal.close()
+                # the run is complete, the next one starts over
+                os.remove(journal_path)
+
+    for name, value in http_transport.connection_stats().items():
+        default_metrics.set_gauge('http.connections.' + name, value)
+    with open(metrics_path, 'w') as metrics_file:
+        metrics_file.write(default_metrics.to_json())
+
+
+def _scrape_command(args: argparse.Namespace) -> None:
+    course_ids = list(args.ids or [])
+    if args.ids_file:
+        course_ids += read_ids_file(args.ids_file)
+    if not course_ids and not args.crawl and not args.reparse:
+        raise SystemExit('no courses to scrape, pass --ids, --ids-file, '
+                         '--crawl or --reparse')
+    scrape(course_ids, args.year, args.out, crawl=args.crawl,
+           incremental=args.incremental, reparse=args.reparse,
+           concurrency=args.concurrency, cache_dir=args.cache_dir,
+           archive_dir=args.archive_dir, metrics_path=args.metrics)
+
+
+def _cache_command(args: argparse.Namespace) -> None:
+    from httpcache import HttpCache
+    from pagearchive import PageArchive, remove_archive
+
+    if args.action == 'clear':
+        if os.path.isdir(args.cache_dir):
+            with HttpCache(args.cache_dir) as cache:
+                cache.clear()
+        # the archive is the only copy of past page versions, it's only
+        # removed when asked for
+        if args.with_archive:
+            remove_archive(args.archive_dir)
+        return
+    stats = {}
+    if os.path.isdir(args.cache_dir):
+        with HttpCache(args.cache_dir) as cache:
+            stats['http_cache'] = cache.stats()
+    if os.path.exists(os.path.join(args.archive_dir, 'pages.idx')):
+        with PageArchive(args.archive_dir, writable=False) as archive:
+            stats['archive'] = archive.stats()
+    print(json.dumps(stats, indent=2))
+
+
+def _inspect_command(args: argparse.Namespace) -> None:
+    from coursestore import CourseStore
+
+    if not os.path.exists(args.db):
+        raise SystemExit('no course store at ' + args.db)
+    with CourseStore(args.db) as store:
+        course = store.get(args.course_id, args.year)
+    if course is None:
+        raise SystemExit('course {} of {} is not in {}'.format(
+            args.course_id, args.year, args.db))
+    record = course.to_record()
+    if args.fields:
+        record = {field: record.get(field) for field in args.fields}
+    print(json.dumps(record, ensure_ascii=False, indent=2))
+    if args.archive_dir and os.path.exists(
+            os.path.join(args.archive_dir, 'pages.idx')):
+        from pagearchive import PageArchive
+
+        with PageArchive(args.archive_dir, writable=False) as archive:
+            for source in ('catalog', 'syllabus'):
+                archived = archive.get_record(args.course_id, args.year,
+                                              source)
+                if archived is not None:
+                    header, _ = archived
+                    print(json.dumps({field: header[field] for field in
+                                      ('source', 'url', 'fetched_at',
+                                       'sha1')}))
+
+
+def _export_command(args: argparse.Namespace) -> None:
+    from coursestore import CourseStore
+
+    if not os.path.exists(args.db):
+        raise SystemExit('no course store at ' + args.db)
+    output_sinks = [_open_output(path, args.year) for path in args.out]
+    with CourseStore(args.db) as store:
+        for course_id, year in store.query_ids(year=args.year,
+                                               department=args.department,
+                                               semester=args.semester):
+            course = store.get(course_id, year)
+            for output_sink in output_sinks:
+                output_sink.write(course)
+    for output_sink in output_sinks:
+        output_sink.close()
+
+
+def _queue_command(args: argparse.Namespace) -> None:
+    from workqueue import WorkQueue, run_worker, run_workers
+
+    if args.action == 'work':
+        worker_options = {'concurrency': args.concurrency,
+                          'lease_seconds': args.lease,
+                          'max_attempts': args.max_attempts}
+        if args.processes > 1:
+            counts = run_workers(args.queue, args.processes,
+                                 worker_id=args.worker_id, **worker_options)
+        else:
+            counts = run_worker(args.queue, args.worker_id, **worker_options)
+        print(json.dumps(counts))
+        return
+    with WorkQueue(args.queue, args.lease, args.max_attempts) as queue:
+        if args.action == 'add':
+            faculties = None
+            course_ids = list(args.ids or [])
+            if args.ids_file:
+                course_ids += read_ids_file(args.ids_file)
+            if args.crawl:
+                from catalogcrawler import crawl_course_ids
+                from transport import HttpTransport
+
+                faculties = dict(crawl_course_ids(args.year, HttpTransport(),
+                                                  concurrency=16))
+                course_ids += list(faculties)
+            print(json.dumps({'added': queue.add(course_ids, args.year,
+                                                 faculties)}))
+        elif args.action == 'status':
+            print(json.dumps(queue.counts()))
+            for course_id, year, error in queue.failures():
+                print('failed {} {}: {}'.format(course_id, year, error))
+        elif args.action == 'retry':
+            print(json.dumps({'retried': queue.retry_failed()}))
+        elif args.action == 'merge':
+            output_sinks = [_open_output(path, args.year)
+                            for path in args.out or ['output.jsonl']]
+            for course in queue.results(args.year):
+                for output_sink in output_sinks:
+                    output_sink.write(course)
+            for output_sink in output_sinks:
+                output_sink.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='huji_scrape',
+        description='scrape the courses of the Hebrew University catalog')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    scrape_parser = subparsers.add_parser(
+        'scrape', help='scrape courses into output files')
+    scrape_parser.add_argument('--year', type=int, default=2024)
+    scrape_parser.add_argument('--ids', nargs='+', metavar='COURSE_ID')
+    scrape_parser.add_argument('--ids-file',
+                               help='file of course ids, separated by '
+                                    'whitespace or commas')
+    scrape_parser.add_argument('--crawl', action='store_true',
+                               help='scrape every course found in the '
+                                    'catalog')
+    scrape_parser.add_argument('--out', action='append',
+                               help='output file, by its extension one of '
+                                    '.xlsx, .jsonl, .csv, .parquet, .sqlite '
+                                    '(repeatable, default: {})'
+                               .format(', '.join(DEFAULT_OUTPUTS)))
+    scrape_parser.add_argument('--incremental', action='store_true',
+                               help='write only the courses that changed '
+                                    'since the last incremental run, with '
+                                    'their diff, to changes_<year>.jsonl')
+    scrape_parser.add_argument('--reparse', action='store_true',
+                               help='rebuild the output from the archived '
+                                    'pages of the year, without any network '
+                                    'access')
+    scrape_parser.add_argument('--concurrency', type=int, default=16)
+    scrape_parser.add_argument('--cache-dir', default='.cache')
+    scrape_parser.add_argument('--archive-dir', default='archive')
+    scrape_parser.add_argument('--metrics', default='metrics.json')
+    scrape_parser.set_defaults(handler=_scrape_command)
+
+    cache_parser = subparsers.add_parser(
+        'cache', help='show or clear the http cache and page archive')
+    cache_parser.add_argument('action', choices=['stats', 'clear'])
+    cache_parser.add_argument('--cache-dir', default='.cache')
+    cache_parser.add_argument('--archive-dir', default='archive')
+    cache_parser.add_argument('--with-archive', action='store_true',
+                              help='clear: also delete the page archive, '
+                                   'which scrape --reparse reads')
+    cache_parser.set_defaults(handler=_cache_command)
+
+    inspect_parser = subparsers.add_parser(
+        'inspect', help='print a stored course')
+    inspect_parser.add_argument('course_id')
+    inspect_parser.add_argument('--year', type=int, default=2024)
+    inspect_parser.add_argument('--db', default='courses.sqlite')
+    inspect_parser.add_argument('--fields', nargs='+',
+                                help='print only these record fields')
+    inspect_parser.add_argument('--archive-dir', default='archive',
+                                help='also print the archived pages of the '
+                                     'course')
+    inspect_parser.set_defaults(handler=_inspect_command)
+
+    export_parser = subparsers.add_parser(
+        'export', help='write stored courses into output files')
+    export_parser.add_argument('--db', default='courses.sqlite')
+    export_parser.add_argument('--year', type=int, default=2024)
+    export_parser.add_argument('--out', action='append', required=True,
+                               help='output file (repeatable)')
+    export_parser.add_argument('--department')
+    export_parser.add_argument('--semester', choices=['A', 'B', 'yearly'])
+    export_parser.set_defaults(handler=_export_command)
+
+    queue_parser = subparsers.add_parser(
+        'queue', help='scrape through a work queue shared by worker '
+                      'processes, on this machine or others')
+    queue_parser.add_argument(
+        'action', choices=['add', 'status', 'work', 'retry', 'merge'],
+        help='add: queue courses, status: count tasks by status, work: run '
+             'workers until the queue is done, retry: queue failed tasks '
+             'again, merge: write the scraped courses into output files')
+    queue_parser.add_argument('--queue', default='queue.sqlite')
+    queue_parser.add_argument('--year', type=int, default=2024)
+    queue_parser.add_argument('--ids', nargs='+', metavar='COURSE_ID')
+    queue_parser.add_argument('--ids-file')
+    queue_parser.add_argument('--crawl', action='store_true')
+    queue_parser.add_argument('--processes', type=int, default=1)
+    queue_parser.add_argument('--concurrency', type=int, default=8,
+                              help='courses scraped at once per process')
+    queue_parser.add_argument('--worker-id')
+    queue_parser.add_argument('--lease', type=float, default=60,
+                              help='seconds a claimed task is leased for')
+    queue_parser.add_argument('--max-attempts', type=int, default=3)
+    queue_parser.add_argument('--out', action='append',
+                              help='merge output file (repeatable, '
+                                   'default: output.jsonl)')
+    queue_parser.set_defaults(handler=_queue_command)
+    return parser
+
+
+def main(argv: List[str]|None = None) -> None:
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
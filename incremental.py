@@ -0,0 +1,202 @@
+import hashlib
+import json
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+from course import Course
+from huji_he_coursescraper import HujiHebrewCourseScraper, PAGE_FIELDS
+from journal import dedupe_ids
+from metrics import Metrics, default_metrics
+from transport import HttpTransport
+
+# ASP.NET state fields, regenerated on every request of an unchanged page
+__volatile_inputs = re.compile(
+    rb'(<input[^>]*name="__(?:VIEWSTATE|VIEWSTATEGENERATOR|EVENTVALIDATION)"'
+    rb'[^>]*value=")[^"]*(")')
+
+
+def content_hash(content: bytes) -> str:
+    """return the sha256 of a page, ignoring its ASP.NET state fields"""
+    return hashlib.sha256(__volatile_inputs.sub(rb'\1\2', content)) \
+        .hexdigest()
+
+
+def diff_records(old: Dict|None, new: Dict) -> Dict[str, Dict]:
+    """return the fields that differ between two Course.to_record() dicts
+    as {field: {'old': ..., 'new': ...}}. List fields (e.g. periods, exam
+    dates) also get the 'added' and 'removed' items; other_data keys are
+    compared one by one, as 'other_data.<key>'."""
+    old = old or {}
+    diff = {}
+    old_values = dict(old, **{'other_data.' + key: value for key, value
+                              in old.get('other_data', {}).items()})
+    new_values = dict(new, **{'other_data.' + key: value for key, value
+                              in new.get('other_data', {}).items()})
+    for field in list(new_values) + [field for field in old_values
+                                     if field not in new_values]:
+        if field == 'other_data':
+            continue
+        old_value, new_value = old_values.get(field), new_values.get(field)
+        if old_value == new_value:
+            continue
+        change = {'old': old_value, 'new': new_value}
+        if isinstance(old_value, list) or isinstance(new_value, list):
+            old_items, new_items = old_value or [], new_value or []
+            change['added'] = [item for item in new_items
+                               if item not in old_items]
+            change['removed'] = [item for item in old_items
+                                 if item not in new_items]
+        diff[field] = change
+    return diff
+
+
+class CourseChange:
+    """a course whose scraped fields changed since the stored version.
+    status is 'new' when the course wasn't stored for the scraped year,
+    its diff then against its baseline year version if there is one"""
+
+    def __init__(self, course_id: str, year: int, course: Course,
+                 status: str, diff: Dict[str, Dict]):
+        self.course_id = course_id
+        self.year = year
+        self.course = course
+        self.status = status
+        self.diff = diff
+
+    def to_record(self) -> Dict:
+        return {'course_id': self.course_id, 'year': self.year,
+                'status': self.status, 'diff': self.diff}
+
+
+class PageHashStore:
+    """sqlite store of the content hash of each (course, year, page) and
+    the course record last built from those pages"""
+
+    def __init__(self, path: str):
+        self.__db = sqlite3.connect(path)
+        self.__db.executescript('''
+            CREATE TABLE IF NOT EXISTS pages (
+                course_id TEXT, year INTEGER, source TEXT, hash TEXT,
+                checked_at REAL, PRIMARY KEY (course_id, year, source));
+            CREATE TABLE IF NOT EXISTS courses (
+                course_id TEXT, year INTEGER, record TEXT, updated_at REAL,
+                PRIMARY KEY (course_id, year));
+        ''')
+
+    def get_hashes(self, course_id, year: int) -> Dict[str, str]:
+        """return {page source: hash} of the stored pages of a course"""
+        return dict(self.__db.execute(
+            'SELECT source, hash FROM pages WHERE course_id = ? AND year = ?',
+            (str(course_id), year)))
+
+    def get_record(self, course_id, year: int) -> Dict|None:
+        """return the stored Course.to_record() of a course, or None"""
+        row = self.__db.execute(
+            'SELECT record FROM courses WHERE course_id = ? AND year = ?',
+            (str(course_id), year)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def get_course(self, course_id, year: int) -> Course|None:
+        record = self.get_record(course_id, year)
+        return Course.from_record(record) if record is not None else None
+
+    def save(self, course_id, year: int, hashes: Dict[str, str],
+             course: Course|None = None) -> None:
+        """store the page hashes of a course, and its record if given"""
+        now = time.time()
+        with self.__db:
+            self.__db.executemany(
+                'INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)',
+                [(str(course_id), year, source, page_hash, now)
+                 for source, page_hash in hashes.items()])
+            if course is not None:
+                self.__db.execute(
+                    'INSERT OR REPLACE INTO courses VALUES (?, ?, ?, ?)',
+                    (str(course_id), year,
+                     json.dumps(course.to_record(), ensure_ascii=False),
+                     now))
+
+    def close(self) -> None:
+        self.__db.close()
+
+    def __enter__(self) -> 'PageHashStore':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _rescrape(course_id: str, year: int, stored_hashes: Dict[str, str],
+              stored_record: Dict|None, transport: HttpTransport|None,
+              parser: str, scraper_options: Dict|None, metrics: Metrics) \
+        -> Tuple[Dict[str, str], Course|None]:
+    """fetch the pages of a course and parse only those whose hash
+    changed, over the stored course. Return the new hashes and the updated
+    course, or None when no page changed."""
+    scraper = HujiHebrewCourseScraper(course_id, year, transport=transport,
+                                      parser=parser,
+                                      **(scraper_options or {}))
+    hashes = {'catalog': content_hash(scraper.fetch_catalog_content()),
+              'syllabus': content_hash(scraper.fetch_syllabus_content())}
+    if stored_record is None:
+        course = Course()
+        scraper.update_course(course)
+        return hashes, course
+
+    changed = [source for source in hashes
+               if hashes[source] != stored_hashes.get(source)]
+    if not changed:
+        metrics.increment('incremental.unchanged')
+        return hashes, None
+    fields: Set[str] = set()
+    for source in changed:
+        metrics.increment('incremental.changed.' + source)
+        fields |= PAGE_FIELDS[source]
+    course = Course.from_record(stored_record)
+    scraper.update_course(course, fields)
+    return hashes, course
+
+
+def scrape_changes(course_ids: Iterable[str], year: int,
+                   store: PageHashStore, concurrency: int = 8,
+                   transport: HttpTransport|None = None,
+                   parser: str = 'lxml',
+                   scraper_options: Dict|None = None,
+                   baseline_year: int|None = None,
+                   metrics: Metrics|None = None) -> Iterator[CourseChange]:
+    """re-scrape the given courses and yield only those that changed since
+    they were stored, in the order of course_ids.
+
+    Every page is fetched (cheaply, through a CachedTransport revalidating
+    with ETags) but only pages whose content hash changed are parsed, and
+    an unchanged course isn't parsed at all. A course not stored for year
+    is diffed against its baseline_year version when there is one. The
+    store is updated as courses are yielded."""
+    metrics = metrics if metrics is not None else default_metrics
+    course_ids = [str(course_id) for course_id in dedupe_ids(course_ids)]
+    stored: List[Tuple[Dict[str, str], Dict|None]] = [
+        (store.get_hashes(course_id, year), store.get_record(course_id, year))
+        for course_id in course_ids]
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(_rescrape, course_id, year, hashes,
+                                   record, transport, parser,
+                                   scraper_options, metrics)
+                   for course_id, (hashes, record)
+                   in zip(course_ids, stored)]
+        for course_id, (_, record), future in zip(course_ids, stored,
+                                                  futures):
+            hashes, course = future.result()
+            if course is None:
+                store.save(course_id, year, hashes)
+                continue
+            status = 'changed' if record is not None else 'new'
+            if record is None and baseline_year is not None:
+                record = store.get_record(course_id, baseline_year)
+            diff = diff_records(record, course.to_record())
+            store.save(course_id, year, hashes, course)
+            if diff:
+                metrics.increment('incremental.emitted')
+                yield CourseChange(course_id, year, course, status, diff)
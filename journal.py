@@ -0,0 +1,74 @@
+import json
+import os
+from typing import Dict, Iterable, List, Tuple
+
+from course import Course
+
+
+def dedupe_ids(course_ids: Iterable) -> List:
+    """return course_ids without repetitions, keeping the first occurrence"""
+    seen = set()
+    unique_ids = []
+    for course_id in course_ids:
+        if str(course_id) not in seen:
+            seen.add(str(course_id))
+            unique_ids.append(course_id)
+    return unique_ids
+
+
+class RunJournal:
+    """append-only JSONL log of the courses a run has completed.
+
+    Every line holds one scraped course of a year, so a run that died can
+    be restarted and skip whatever is already in the journal. A partially
+    written last line (from a crash mid-write) is ignored."""
+
+    def __init__(self, path: str):
+        self.__path = path
+        self.__records: Dict[Tuple[str, int], Dict] = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as journal_file:
+                for line in journal_file:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.__records[(entry['course_id'], entry['year'])] = \
+                        entry['record']
+        self.__file = open(path, 'a', encoding='utf-8')
+        if self.__file.tell() > 0 and not self._ends_with_newline():
+            self.__file.write('\n')
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.__path, 'rb') as journal_file:
+            journal_file.seek(-1, os.SEEK_END)
+            return journal_file.read(1) == b'\n'
+
+    def is_done(self, course_id, year: int) -> bool:
+        """return True if the course is in the journal"""
+        return (str(course_id), year) in self.__records
+
+    def get(self, course_id, year: int) -> Course|None:
+        """return the journaled course, or None"""
+        record = self.__records.get((str(course_id), year))
+        return Course.from_record(record) if record is not None else None
+
+    def append(self, course_id, year: int, course: Course) -> None:
+        """record a completed course, flushed to disk right away"""
+        record = course.to_record()
+        self.__file.write(json.dumps({'course_id': str(course_id),
+                                      'year': year,
+                                      'record': record},
+                                     ensure_ascii=False) + '\n')
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+        self.__records[(str(course_id), year)] = record
+
+    def close(self) -> None:
+        self.__file.close()
+
+    def __enter__(self) -> 'RunJournal':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
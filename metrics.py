@@ -0,0 +1,150 @@
+import json
+import math
+import sys
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Dict, Iterator, List, TextIO
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _quantile(sorted_samples: List[float], quantile: float) -> float:
+    """nearest-rank quantile of already sorted samples"""
+    rank = max(1, math.ceil(quantile * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+class Metrics:
+    """thread safe collector of per-stage durations and event counters"""
+
+    def __init__(self):
+        self.__lock = Lock()
+        self.__durations: Dict[str, List[float]] = {}
+        self.__counters: Dict[str, float] = {}
+        self.__gauges: Dict[str, float] = {}
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """record one duration of stage"""
+        with self.__lock:
+            self.__durations.setdefault(stage, []).append(seconds)
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """record the duration of the with block as stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def increment(self, counter: str, amount: float = 1) -> None:
+        """add amount to counter"""
+        with self.__lock:
+            self.__counters[counter] = self.__counters.get(counter, 0) + amount
+
+    def set_gauge(self, gauge: str, value: float) -> None:
+        """set gauge to its current value"""
+        with self.__lock:
+            self.__gauges[gauge] = value
+
+    def counter(self, counter: str) -> float:
+        """return the current value of counter"""
+        with self.__lock:
+            return self.__counters.get(counter, 0)
+
+    def summary(self) -> Dict:
+        """return {'stages': {stage: count/total/p50/p95/p99 in seconds},
+        'counters': {...}, 'gauges': {...}}"""
+        with self.__lock:
+            durations = {stage: sorted(samples)
+                         for stage, samples in self.__durations.items()}
+            counters = dict(self.__counters)
+            gauges = dict(self.__gauges)
+        stages = {}
+        for stage, samples in sorted(durations.items()):
+            stages[stage] = {'count': len(samples), 'total': sum(samples)}
+            for quantile in QUANTILES:
+                stages[stage]['p{:g}'.format(quantile * 100)] = \
+                    _quantile(samples, quantile)
+        return {'stages': stages, 'counters': dict(sorted(counters.items())),
+                'gauges': dict(sorted(gauges.items()))}
+
+    def to_json(self) -> str:
+        return json.dumps(self.summary(), indent=2)
+
+    def to_prometheus(self, prefix: str = 'huji_scrape') -> str:
+        """return the summary in the Prometheus text exposition format"""
+        summary = self.summary()
+        lines = ['# TYPE {}_stage_seconds summary'.format(prefix)]
+        for stage, stats in summary['stages'].items():
+            for quantile in QUANTILES:
+                lines.append('{}_stage_seconds{{stage="{}",quantile="{}"}} {}'
+                             .format(prefix, stage, quantile,
+                                     stats['p{:g}'.format(quantile * 100)]))
+            lines.append('{}_stage_seconds_sum{{stage="{}"}} {}'
+                         .format(prefix, stage, stats['total']))
+            lines.append('{}_stage_seconds_count{{stage="{}"}} {}'
+                         .format(prefix, stage, stats['count']))
+        lines.append('# TYPE {}_events_total counter'.format(prefix))
+        for counter, value in summary['counters'].items():
+            lines.append('{}_events_total{{event="{}"}} {}'
+                         .format(prefix, counter, value))
+        lines.append('# TYPE {}_gauge gauge'.format(prefix))
+        for gauge, value in summary['gauges'].items():
+            lines.append('{}_gauge{{name="{}"}} {}'
+                         .format(prefix, gauge, value))
+        return '\n'.join(lines) + '\n'
+
+
+# metrics of every component that wasn't given its own Metrics
+default_metrics = Metrics()
+
+
+class ProgressReporter:
+    """progress of a batch run: a redrawn status line on a terminal, one
+    json object per update otherwise (e.g. when redirected to a log)"""
+
+    def __init__(self, total: int, metrics: Metrics|None = None,
+                 stream: TextIO|None = None):
+        self.__total = total
+        self.__done = 0
+        self.__failed = 0
+        self.__start = time.perf_counter()
+        self.__metrics = metrics if metrics is not None else default_metrics
+        self.__stream = stream if stream is not None else sys.stderr
+        self.__is_tty = self.__stream.isatty()
+
+    def update(self, course_id, ok: bool = True) -> None:
+        """report one more course as done (or failed)"""
+        self.__done += 1
+        self.__failed += 0 if ok else 1
+        elapsed = time.perf_counter() - self.__start
+        rate = self.__done / elapsed if elapsed > 0 else 0.0
+        eta = (self.__total - self.__done) / rate if rate > 0 else 0.0
+        hits = self.__metrics.counter('cache.hit')
+        lookups = hits + self.__metrics.counter('cache.miss') \
+            + self.__metrics.counter('cache.revalidated')
+        status = {
+            'done': self.__done,
+            'total': self.__total,
+            'failed': self.__failed,
+            'course_id': str(course_id),
+            'courses_per_sec': round(rate, 2),
+            'eta_sec': round(eta, 1),
+            'cache_hit_ratio': round(hits / lookups, 3) if lookups else None,
+            'bytes_downloaded': self.__metrics.counter('http.bytes')
+        }
+        if self.__is_tty:
+            width = 30
+            filled = int(width * self.__done / max(self.__total, 1))
+            self.__stream.write(
+                '\r[{}{}] {}/{} {:6.2f}% {} {:.1f} courses/s eta {:.0f}s'
+                .format('#' * filled, '.' * (width - filled), self.__done,
+                        self.__total, self.__done / max(self.__total, 1) * 100,
+                        course_id, rate, eta))
+            if self.__done == self.__total:
+                self.__stream.write('\n')
+        else:
+            self.__stream.write(json.dumps(status) + '\n')
+        self.__stream.flush()
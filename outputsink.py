@@ -0,0 +1,279 @@
+import csv
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, List
+
+import huji_he_coursescraper
+from course import Course
+
+# columns of flatten_course, in the order they appear in output.xlsx
+FLAT_COLUMNS = [
+    'Course id',
+    'Course name',
+    'Course Parent Institute',
+    'Course Department',
+    'Course Credits Amount',
+    'Course Teaching Language',
+    'Course Staff Members',
+    'The Course Description',
+    'Attendance Requirements',
+    'Final Exam Type',
+    'Semester',
+    'Course Lectures & Exercises Periods',
+    'Final Exam Due Date',
+    'catalog_url',
+    'syllabus_url',
+    'coordinator',
+    'coordinator mail'
+]
+
+
+def flatten_course(course: Course) -> Dict:
+    """return the course as a flat dict of the output.xlsx columns: lists
+    are turned into display strings, credits and attendance stay numbers"""
+    course_dict = course.to_dict()
+
+    # semester: from list to string
+    semester = course_dict.pop('Semester [A, B, yearly or other]', None)
+    if semester is not None:
+        semester_str = \
+            huji_he_coursescraper.symbol_to_huji_semester(semester)
+        course_dict.update({'Semester': semester_str})
+
+    # periods to strings
+    periods_list = course_dict.pop('Course Lectures & Exercises Periods', None)
+    if periods_list is not None:
+        periods_str = ''
+
+        for period in periods_list:
+            periods_str += period['type']
+            weekday = period['weekday']
+            if weekday != 0:
+                start, end = period['start_time'], period['end_time']
+                periods_str += ': יום ' + huji_he_coursescraper \
+                    .weekday_number_to_hebrew_weekday_symbol(weekday) \
+                    + '\' ' + start.strftime('%H:%M') + '-' \
+                    + end.strftime('%H:%M')
+            periods_str += '\n'
+        course_dict.update({
+            'Course Lectures & Exercises Periods':
+                periods_str[0:-1] # without the last newline
+        })
+
+    # exams due dates to strings
+    due_dates_list = course_dict.pop('Final Exam Due Date', None)
+    if due_dates_list is not None:
+        due_dates_str = ''
+        for (date, metadata) in due_dates_list:
+            due_dates_str += 'סמסטר ' \
+                    + huji_he_coursescraper \
+                        .symbol_to_huji_semester(metadata['semester']) \
+                    + ' מועד ' + metadata['MOED'] + ': ' \
+                    + date.strftime('%d/%m/%y') + '\r\n'
+        course_dict.update({'Final Exam Due Date': due_dates_str})
+
+    # other_data: insert normally to dict
+    course_dict.update(course_dict.pop('other_data'))
+    return course_dict
+
+
+class OutputSink(ABC):
+    """destination of scraped courses, written as they complete"""
+
+    @abstractmethod
+    def write(self, course: Course) -> None:
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> 'OutputSink':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class JsonlSink(OutputSink):
+    """one Course.to_record() json object per line"""
+
+    def __init__(self, path: str):
+        self.__file = open(path, 'w', encoding='utf-8')
+
+    def write(self, course: Course) -> None:
+        self.__file.write(json.dumps(course.to_record(),
+                                     ensure_ascii=False) + '\n')
+        self.__file.flush()
+
+    def close(self) -> None:
+        self.__file.close()
+
+
+class CsvSink(OutputSink):
+    """flatten_course rows under a fixed FLAT_COLUMNS header"""
+
+    def __init__(self, path: str):
+        # utf-8-sig so Excel detects the hebrew text
+        self.__file = open(path, 'w', encoding='utf-8-sig', newline='')
+        self.__writer = csv.DictWriter(self.__file, FLAT_COLUMNS,
+                                       extrasaction='ignore')
+        self.__writer.writeheader()
+
+    def write(self, course: Course) -> None:
+        self.__writer.writerow(flatten_course(course))
+        self.__file.flush()
+
+    def close(self) -> None:
+        self.__file.close()
+
+
+class ParquetSink(OutputSink):
+    """typed parquet columns, written one row group per row_group_size
+    courses. Periods and exam dates are kept as lists of structs with real
+    time/date values. Requires pyarrow."""
+
+    def __init__(self, path: str, row_group_size: int = 1000):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.__pa = pa
+        self.__schema = pa.schema([
+            ('id', pa.string()),
+            ('name', pa.string()),
+            ('institute', pa.string()),
+            ('department', pa.string()),
+            ('credits', pa.int64()),
+            ('semesters', pa.list_(pa.string())),
+            ('teaching_languages', pa.string()),
+            ('staff', pa.string()),
+            ('description', pa.string()),
+            ('attendance_requirements', pa.float64()),
+            ('periods', pa.list_(pa.struct([
+                ('type', pa.string()),
+                ('weekday', pa.int8()),
+                ('start_time', pa.time32('s')),
+                ('end_time', pa.time32('s'))]))),
+            ('exam_type', pa.string()),
+            ('exam_dates', pa.list_(pa.struct([
+                ('date', pa.date32()),
+                ('semester', pa.list_(pa.string())),
+                ('moed', pa.string())]))),
+            ('catalog_url', pa.string()),
+            ('syllabus_url', pa.string()),
+            ('coordinator', pa.string()),
+            ('coordinator_mail', pa.string())
+        ])
+        self.__writer = pq.ParquetWriter(path, self.__schema)
+        self.__row_group_size = row_group_size
+        self.__rows: List[Dict] = []
+
+    @staticmethod
+    def _row(course: Course) -> Dict:
+        exam_dates = course.get_exam_dates()
+        if exam_dates is not None:
+            exam_dates = [{'date': exam_date,
+                           'semester': metadata['semester'],
+                           'moed': metadata['MOED']}
+                          for exam_date, metadata in exam_dates]
+        course_id = course.get_id()
+        return {
+            'id': str(course_id) if course_id is not None else None,
+            'name': course.get_course_name(),
+            'institute': course.get_institute(),
+            'department': course.get_department(),
+            'credits': course.get_credits(),
+            'semesters': course.get_semesters(),
+            'teaching_languages': course.get_teaching_languages(),
+            'staff': course.get_staff(),
+            'description': course.get_description(),
+            'attendance_requirements': course.get_attendance_requirements(),
+            'periods': course.get_periods(),
+            'exam_type': course.get_exam_type(),
+            'exam_dates': exam_dates,
+            'catalog_url': course.other_data.get('catalog_url'),
+            'syllabus_url': course.other_data.get('syllabus_url'),
+            'coordinator': course.other_data.get('coordinator'),
+            'coordinator_mail': course.other_data.get('coordinator mail')
+        }
+
+    def write(self, course: Course) -> None:
+        self.__rows.append(self._row(course))
+        if len(self.__rows) >= self.__row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self.__rows:
+            self.__writer.write_table(self.__pa.Table.from_pylist(
+                self.__rows, schema=self.__schema))
+            self.__rows = []
+
+    def close(self) -> None:
+        self._flush()
+        self.__writer.close()
+
+
+class ExcelSink(OutputSink):
+    """the output.xlsx table (see flatten_course), written on close.
+    Keeps every course in memory until then and flattens them in bulk."""
+
+    def __init__(self, path: str):
+        self.__path = path
+        self.__courses: List[Course] = []
+
+    def write(self, course: Course) -> None:
+        self.__courses.append(course)
+
+    def close(self) -> None:
+        from coursetables import flat_frame
+
+        flat_frame(self.__courses).to_excel(self.__path)
+
+
+class SqliteSink(OutputSink):
+    """a queryable CourseStore of the courses of year, committed every
+    batch_size courses"""
+
+    def __init__(self, path: str, year: int, batch_size: int = 500):
+        from coursestore import CourseStore
+
+        self.__store = CourseStore(path)
+        self.__year = year
+        self.__batch_size = batch_size
+        self.__courses: List[Course] = []
+
+    def write(self, course: Course) -> None:
+        self.__courses.append(course)
+        if len(self.__courses) >= self.__batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        self.__store.add_many(self.__courses, self.__year)
+        self.__courses = []
+
+    def close(self) -> None:
+        self._flush()
+        self.__store.close()
+
+
+__sinks_by_extension = {
+    '.jsonl': JsonlSink,
+    '.csv': CsvSink,
+    '.parquet': ParquetSink,
+    '.xlsx': ExcelSink,
+    '.sqlite': SqliteSink
+}
+
+
+def open_sink(path: str, **options) -> OutputSink:
+    """return the output sink matching the extension of path, made with the
+    given options (e.g. year for .sqlite)"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in __sinks_by_extension:
+        raise ValueError('unsupported output format {!r}, expected one of {}'
+                         .format(extension, ', '.join(__sinks_by_extension)))
+    if extension == '.sqlite' and options.get('year') is None:
+        raise ValueError('a .sqlite output stores courses by year, open it '
+                         'with open_sink({!r}, year=...)'.format(path))
+    return __sinks_by_extension[extension](path, **options)
@@ -0,0 +1,342 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from threading import Lock
+from typing import Dict, Iterator, List, Set, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from course import Course
+from metrics import Metrics, default_metrics
+from transport import FetchResult, HttpTransport
+
+RECORD_MAGIC = b'HSREC '
+INDEX_MAGIC = b'HSIDX001'
+# index header: magic, capacity, count, archive bytes covered by the index
+INDEX_HEADER = struct.Struct('<8sQQQ')
+# index slot: key hash (0 for an empty slot), offset, length, body digest
+INDEX_SLOT = struct.Struct('<QQQ8s')
+INITIAL_CAPACITY = 1024
+
+
+def _key_hash(course_id, year: int, source: str) -> int:
+    digest = hashlib.blake2b('{}\0{}\0{}'.format(course_id, year, source)
+                             .encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+def _compress(content: bytes) -> Tuple[str, bytes]:
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=10).compress(content)
+    return 'zlib', zlib.compress(content, 9)
+
+
+def _decompress(codec: str, body: bytes) -> bytes:
+    if codec == 'zlib':
+        return zlib.decompress(body)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('page archived with zstd, install zstandard '
+                               'to read it')
+        return zstandard.ZstdDecompressor().decompress(body)
+    raise ValueError('unknown archive codec {!r}'.format(codec))
+
+
+class PageArchive:
+    """append-only archive of raw course pages, WARC-like.
+
+    pages.arc holds one record per archived response: a json header line
+    (course id, year, source, url, time, codec, sha1) and the compressed
+    body, zstd when the zstandard package is installed and zlib otherwise.
+    pages.idx is a memory-mapped open addressing hash table from (course
+    id, year, source) to the newest record, so get is O(1). An index left
+    behind by a crash is caught up from the records appended after it.
+    Only one process may append at a time."""
+
+    def __init__(self, directory: str, writable: bool = True):
+        self.__directory = directory
+        self.__writable = writable
+        self.__lock = Lock()
+        if writable:
+            os.makedirs(directory, exist_ok=True)
+        data_path = os.path.join(directory, 'pages.arc')
+        if writable and not os.path.exists(data_path):
+            open(data_path, 'wb').close()
+        self.__data = open(data_path, 'r+b' if writable else 'rb')
+        self.__index_path = os.path.join(directory, 'pages.idx')
+        self.__index_file = None
+        self.__index: mmap.mmap|None = None
+        self._open_index()
+
+    # index
+
+    def _open_index(self) -> None:
+        if not os.path.exists(self.__index_path):
+            if not self.__writable:
+                raise FileNotFoundError(self.__index_path)
+            self._write_empty_index(self.__index_path, INITIAL_CAPACITY)
+        self.__index_file = open(self.__index_path,
+                                 'r+b' if self.__writable else 'rb')
+        self.__index = mmap.mmap(self.__index_file.fileno(), 0,
+                                 access=mmap.ACCESS_WRITE if self.__writable
+                                 else mmap.ACCESS_READ)
+        magic, self.__capacity, self.__count, covered = \
+            INDEX_HEADER.unpack_from(self.__index, 0)
+        if magic != INDEX_MAGIC:
+            raise ValueError('not a page archive index: ' + self.__index_path)
+        data_size = os.fstat(self.__data.fileno()).st_size
+        if covered < data_size and self.__writable:
+            self._recover(covered, data_size)
+
+    @staticmethod
+    def _write_empty_index(path: str, capacity: int) -> None:
+        with open(path, 'wb') as index_file:
+            index_file.write(INDEX_HEADER.pack(INDEX_MAGIC, capacity, 0, 0))
+            index_file.truncate(INDEX_HEADER.size
+                                + capacity * INDEX_SLOT.size)
+
+    def _slot_offset(self, slot: int) -> int:
+        return INDEX_HEADER.size + slot * INDEX_SLOT.size
+
+    def _find_slot(self, key_hash: int) -> Tuple[int, Tuple|None]:
+        """return the slot of key_hash and its entry, or the empty slot it
+        would go into and None"""
+        mask = self.__capacity - 1
+        slot = key_hash & mask
+        while True:
+            entry = INDEX_SLOT.unpack_from(self.__index,
+                                           self._slot_offset(slot))
+            if entry[0] == 0:
+                return slot, None
+            if entry[0] == key_hash:
+                return slot, entry
+            slot = (slot + 1) & mask
+
+    def _index_put(self, key_hash: int, offset: int, length: int,
+                   digest: bytes) -> None:
+        if (self.__count + 1) * 2 > self.__capacity:
+            self._grow()
+        slot, entry = self._find_slot(key_hash)
+        INDEX_SLOT.pack_into(self.__index, self._slot_offset(slot),
+                             key_hash, offset, length, digest)
+        if entry is None:
+            self.__count += 1
+
+    def _set_covered(self, covered: int) -> None:
+        INDEX_HEADER.pack_into(self.__index, 0, INDEX_MAGIC,
+                               self.__capacity, self.__count, covered)
+
+    def _grow(self) -> None:
+        """rehash into an index of twice the capacity"""
+        entries = [INDEX_SLOT.unpack_from(self.__index,
+                                          self._slot_offset(slot))
+                   for slot in range(self.__capacity)]
+        covered = INDEX_HEADER.unpack_from(self.__index, 0)[3]
+        new_path = self.__index_path + '.new'
+        self._write_empty_index(new_path, self.__capacity * 2)
+        self.__index.close()
+        self.__index_file.close()
+        os.replace(new_path, self.__index_path)
+        self.__index_file = open(self.__index_path, 'r+b')
+        self.__index = mmap.mmap(self.__index_file.fileno(), 0)
+        self.__capacity *= 2
+        self.__count = 0
+        for entry in entries:
+            if entry[0] != 0:
+                self._index_put(*entry)
+        self._set_covered(covered)
+
+    # records
+
+    def _read_header(self, offset: int) -> Tuple[Dict, int]|None:
+        """return the header of the record at offset and its size, None
+        past the last complete record"""
+        self.__data.seek(offset)
+        line = self.__data.readline()
+        if not line.startswith(RECORD_MAGIC) or not line.endswith(b'\n'):
+            return None
+        try:
+            return json.loads(line[len(RECORD_MAGIC):]), len(line)
+        except json.JSONDecodeError:
+            return None
+
+    def _recover(self, offset: int, data_size: int) -> None:
+        """index the records appended after the index was last saved and
+        cut off a torn last record"""
+        while offset < data_size:
+            header = self._read_header(offset)
+            if header is None or offset + header[1] \
+                    + header[0]['length'] > data_size:
+                break
+            header, header_size = header
+            length = header_size + header['length']
+            self._index_put(_key_hash(header['course_id'], header['year'],
+                                      header['source']),
+                            offset, length, bytes.fromhex(header['sha1'])[:8])
+            offset += length
+        self.__data.truncate(offset)
+        self._set_covered(offset)
+        self.__index.flush()
+
+    def append(self, course_id, year: int, source: str, url: str,
+               content: bytes) -> bool:
+        """archive a page, unless it is the same as its newest record.
+        Return True if a record was appended"""
+        sha1 = hashlib.sha1(content).hexdigest()
+        key_hash = _key_hash(course_id, year, source)
+        with self.__lock:
+            _, entry = self._find_slot(key_hash)
+            if entry is not None and entry[3] == bytes.fromhex(sha1)[:8]:
+                return False
+            codec, body = _compress(content)
+            header = RECORD_MAGIC + json.dumps({
+                'course_id': str(course_id), 'year': year, 'source': source,
+                'url': url, 'fetched_at': time.time(), 'codec': codec,
+                'sha1': sha1, 'length': len(body)}).encode('utf-8') + b'\n'
+            self.__data.seek(0, os.SEEK_END)
+            offset = self.__data.tell()
+            self.__data.write(header + body)
+            self.__data.flush()
+            self._index_put(key_hash, offset, len(header) + len(body),
+                            bytes.fromhex(sha1)[:8])
+            self._set_covered(offset + len(header) + len(body))
+        return True
+
+    def get(self, course_id, year: int, source: str) -> bytes|None:
+        """return the newest archived page, or None"""
+        record = self.get_record(course_id, year, source)
+        return record[1] if record is not None else None
+
+    def get_record(self, course_id, year: int, source: str) \
+            -> Tuple[Dict, bytes]|None:
+        """return the header and page of the newest record, or None"""
+        with self.__lock:
+            _, entry = self._find_slot(_key_hash(course_id, year, source))
+            if entry is None:
+                return None
+            _, offset, length, _ = entry
+            record = os.pread(self.__data.fileno(), length, offset)
+        header_end = record.index(b'\n') + 1
+        header = json.loads(record[len(RECORD_MAGIC):header_end])
+        if (header['course_id'], header['year'], header['source']) != \
+                (str(course_id), year, source):
+            return None
+        return header, _decompress(header['codec'], record[header_end:])
+
+    def records(self) -> Iterator[Dict]:
+        """yield the header of every record, oldest first"""
+        offset = 0
+        while True:
+            with self.__lock:
+                header = self._read_header(offset)
+            if header is None:
+                return
+            header, header_size = header
+            yield header
+            offset += header_size + header['length']
+
+    def courses(self, year: int|None = None) -> List[Tuple[str, int]]:
+        """return the (course id, year) of every archived course"""
+        seen: Dict[Tuple[str, int], None] = {}
+        for header in self.records():
+            if year is None or header['year'] == year:
+                seen[(header['course_id'], header['year'])] = None
+        return list(seen)
+
+    def stats(self) -> Dict[str, int]:
+        """return the number of archived pages (newest versions only) and
+        the size of the archive in bytes"""
+        return {'pages': self.__count,
+                'bytes': os.fstat(self.__data.fileno()).st_size}
+
+    def close(self) -> None:
+        if self.__writable:
+            self.__index.flush()
+        self.__index.close()
+        self.__index_file.close()
+        self.__data.close()
+
+    def __enter__(self) -> 'PageArchive':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def remove_archive(directory: str) -> None:
+    """delete the page archive in directory, if there is one"""
+    for name in ('pages.arc', 'pages.idx'):
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+
+class ArchivingTransport:
+    """transport archiving every course page it fetches into a PageArchive.
+    Other pages (e.g. catalog listings) are passed through as is."""
+
+    def __init__(self, transport: HttpTransport, archive: PageArchive,
+                 metrics: Metrics|None = None):
+        self.__transport = transport
+        self.__archive = archive
+        self.__metrics = metrics if metrics is not None else default_metrics
+
+    def fetch(self, url: str, headers: Dict|None = None) -> FetchResult:
+        from huji_he_coursescraper import page_key_from_url
+
+        result = self.__transport.fetch(url, headers=headers)
+        page_key = page_key_from_url(url)
+        if result.status == 200 and page_key is not None:
+            with self.__metrics.timer('archive.append'):
+                if self.__archive.append(*page_key, url, result.content):
+                    self.__metrics.increment('archive.records')
+        return result
+
+
+# archives opened by the reparse processes, one per directory
+__worker_archives: Dict[str, PageArchive] = {}
+
+
+def _reparse_course(directory: str, course_id: str, year: int,
+                    parser: str, fields: Set[str]|None) -> Course:
+    from batchscraper import parse_course
+
+    if directory not in __worker_archives:
+        __worker_archives[directory] = PageArchive(directory, writable=False)
+    archive = __worker_archives[directory]
+    pages = {source: archive.get_record(course_id, year, source)
+             or ({}, b'') for source in ('catalog', 'syllabus')}
+    course = parse_course(course_id, year, pages['catalog'][1],
+                          pages['syllabus'][1], parser, fields)
+    # the urls the pages were really fetched from
+    for source, (header, _) in pages.items():
+        if source + '_url' in course.other_data and 'url' in header:
+            course.other_data[source + '_url'] = header['url']
+    return course
+
+
+def reparse_archive(directory: str, year: int|None = None,
+                    parser: str = 'lxml', fields: Set[str]|None = None,
+                    workers: int|None = None) -> Iterator[Course]:
+    """rebuild the Course of every course in the archive (of year, or of
+    all years) from its newest pages, without any network access. Courses
+    are parsed by a pool of workers processes, each reading the archive
+    on its own, and yielded in archive order."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    with PageArchive(directory, writable=False) as archive:
+        courses = archive.courses(year)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_reparse_course, [directory] * len(courses),
+                            [course_id for course_id, _ in courses],
+                            [course_year for _, course_year in courses],
+                            [parser] * len(courses),
+                            [fields] * len(courses), chunksize=16)
@@ -0,0 +1,184 @@
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from course import Course
+from coursetables import periods_frame
+
+# resolution of the weekly timetable
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+# weekdays 1-7, the unrecognized weekday 0 takes no slots
+WEEK_SLOTS = 7 * SLOTS_PER_DAY
+
+# cells of the overlap matrix computed at once, bounding the memory of
+# clash detection (16MB of float32) for any number of courses
+CLASH_BLOCK_CELLS = 1 << 22
+
+# semester symbol -> the halves of the year it takes
+__semester_halves = {'A': (0,), 'B': (1,), 'yearly': (0, 1)}
+
+
+def week_matrix(courses: Sequence[Course]) -> np.ndarray:
+    """return a (courses, WEEK_SLOTS) bool matrix of the slots each course's
+    periods take, a period from start to end taking every slot it touches"""
+    periods = periods_frame(courses)
+    periods = periods[periods['weekday'] > 0]
+    day_start = (periods['weekday'].to_numpy(np.int64) - 1) * SLOTS_PER_DAY
+    starts = day_start + periods['start_minute'].to_numpy(np.int64) \
+        // SLOT_MINUTES
+    ends = day_start + -(-periods['end_minute'].to_numpy(np.int64)
+                         // SLOT_MINUTES)
+    rows = periods['course'].to_numpy(np.int64)
+    valid = ends > starts
+    # +1 where a period starts, -1 where it ends, summed along the week
+    steps = np.zeros((len(courses), WEEK_SLOTS + 1), dtype=np.int32)
+    np.add.at(steps, (rows[valid], starts[valid]), 1)
+    np.add.at(steps, (rows[valid], ends[valid]), -1)
+    return np.cumsum(steps, axis=1)[:, :WEEK_SLOTS] > 0
+
+
+def week_mask(course: Course) -> int:
+    """return the slots of a course's periods as a WEEK_SLOTS bits int"""
+    bits = np.packbits(week_matrix([course])[0], bitorder='little')
+    return int.from_bytes(bits.tobytes(), 'little')
+
+
+def semester_codes(courses: Sequence[Course]) -> np.ndarray:
+    """return the halves of the year each course takes place in as bits (1
+    for the first, 2 for the second); a course without known semesters
+    takes both"""
+    codes = np.zeros(len(courses), dtype=np.uint8)
+    for position, course in enumerate(courses):
+        for semester in course.get_semesters() or ():
+            for half in __semester_halves.get(semester, ()):
+                codes[position] |= 1 << half
+    codes[codes == 0] = 3
+    return codes
+
+
+def _overlap_blocks(courses: Sequence[Course], by_semester: bool) \
+        -> Iterator[Tuple[int, np.ndarray]]:
+    """yield (first row, block) of the (courses, courses) matrix of the
+    slots each two courses share, 0 on the diagonal, a block of rows at a
+    time so that memory stays bounded however many courses there are"""
+    week = week_matrix(courses)
+    # only the slots some course takes, each block as one matrix product
+    used = week[:, week.any(axis=0)].astype(np.float32)
+    codes = semester_codes(courses) if by_semester else None
+    count = len(courses)
+    rows = max(1, CLASH_BLOCK_CELLS // max(count, 1))
+    for start in range(0, count, rows):
+        stop = min(start + rows, count)
+        overlaps = used[start:stop] @ used.T
+        if codes is not None:
+            overlaps *= (codes[start:stop, None] & codes[None, :]) != 0
+        overlaps[np.arange(stop - start), np.arange(start, stop)] = 0
+        yield start, overlaps
+
+
+def overlap_matrix(courses: Sequence[Course],
+                   by_semester: bool = True) -> np.ndarray:
+    """return a symmetric (courses, courses) matrix of the minutes each two
+    courses overlap in a week, 0 on the diagonal. With by_semester,
+    courses of different semesters never overlap."""
+    overlaps = np.zeros((len(courses), len(courses)), dtype=np.int32)
+    for start, block in _overlap_blocks(courses, by_semester):
+        overlaps[start:start + len(block)] = block * SLOT_MINUTES
+    return overlaps
+
+
+def conflict_matrix(courses: Sequence[Course],
+                    by_semester: bool = True) -> np.ndarray:
+    """return a symmetric (courses, courses) bool matrix of the courses
+    whose periods clash, see overlap_matrix"""
+    clashes = np.zeros((len(courses), len(courses)), dtype=bool)
+    for start, block in _overlap_blocks(courses, by_semester):
+        clashes[start:start + len(block)] = block > 0
+    return clashes
+
+
+def conflicting_pairs(courses: Sequence[Course], by_semester: bool = True) \
+        -> List[Tuple[str, str, int]]:
+    """return (course id, course id, overlap minutes) of every clashing
+    pair of courses, without building the whole conflict matrix"""
+    ids = [course.get_id() for course in courses]
+    pairs = []
+    for start, block in _overlap_blocks(courses, by_semester):
+        firsts, seconds = np.nonzero(block)
+        later = seconds > firsts + start
+        firsts, seconds = firsts[later], seconds[later]
+        minutes = (block[firsts, seconds] * SLOT_MINUTES).astype(int)
+        pairs += [(ids[first], ids[second], overlap)
+                  for first, second, overlap
+                  in zip((firsts + start).tolist(), seconds.tolist(),
+                         minutes.tolist())]
+    return pairs
+
+
+def conflict_free_schedules(courses: Sequence[Course],
+                            required: Iterable[str] = (),
+                            min_courses: int = 1,
+                            max_courses: int|None = None,
+                            by_semester: bool = True,
+                            limit: int|None = None) \
+        -> Iterator[List[Course]]:
+    """yield every set of the given courses without clashes that holds
+    all the required course ids and min_courses to max_courses courses.
+
+    Courses are added by depth first search over the conflict graph, kept
+    as bitsets: each step only considers the later courses that clash with
+    none already chosen, and a branch stops as soon as those can't reach
+    min_courses. At most limit schedules are yielded. A required id that
+    isn't one of the courses raises ValueError."""
+    courses = list(courses)
+    count = len(courses)
+    # bit j of compatible[i]: course j doesn't clash with course i
+    all_courses = (1 << count) - 1
+    compatible = [all_courses & ~int.from_bytes(
+        np.packbits(row > 0, bitorder='little').tobytes(), 'little')
+        for _, block in _overlap_blocks(courses, by_semester)
+        for row in block]
+    positions: Dict[str, int] = {str(course.get_id()): position
+                                 for position, course in enumerate(courses)}
+    # a course required twice is chosen once
+    required = list(dict.fromkeys(str(course_id) for course_id in required))
+    unknown = [course_id for course_id in required
+               if course_id not in positions]
+    if unknown:
+        raise ValueError('required courses not among the given courses: '
+                         + ', '.join(unknown))
+    required_positions = [positions[course_id] for course_id in required]
+    max_courses = count if max_courses is None else max_courses
+
+    chosen = 0
+    candidates = all_courses
+    for position in required_positions:
+        if not candidates >> position & 1:
+            return                          # the required courses clash
+        chosen |= 1 << position
+        candidates &= compatible[position] & ~(1 << position)
+    if bin(chosen).count('1') > max_courses:
+        return
+
+    yielded = 0
+
+    def search(chosen: int, candidates: int, size: int) -> Iterator[int]:
+        if size >= min_courses:
+            yield chosen
+        if size == max_courses \
+                or size + bin(candidates).count('1') < min_courses:
+            return
+        while candidates:
+            lowest = candidates & -candidates
+            position = lowest.bit_length() - 1
+            candidates ^= lowest
+            yield from search(chosen | lowest,
+                              candidates & compatible[position], size + 1)
+
+    for schedule in search(chosen, candidates, bin(chosen).count('1')):
+        yield [courses[position] for position in range(count)
+               if schedule >> position & 1]
+        yielded += 1
+        if limit is not None and yielded >= limit:
+            return
@@ -0,0 +1,335 @@
+import argparse
+import hashlib
+import os
+import random
+import re
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+# pages the real servers would serve, keyed by url path
+CATALOG_PATH = '/pages/wfrCourse.aspx'
+FACULTIES_PATH = '/pages/wfrFaculties.aspx'
+FACULTY_PATH = '/pages/wfrFaculty.aspx'
+DEPARTMENT_PATH = '/pages/wfrDepartment.aspx'
+# shape of the synthesized catalog listings
+LISTING_FACULTIES = 5
+LISTING_DEPARTMENTS = 4
+FIRST_COURSE_ID = 10000
+SYLLABUS_PATH = re.compile(r'^/index\.php/NewSyl/(\d+)/1/(\d+)/?$')
+
+__period_types = ['שיעור', 'תרגיל', 'מעבדה']
+__weekdays = ['א', 'ב', 'ג', 'ד', 'ה', 'ו']
+__semesters = ['א\'', 'ב\'', 'קורס שנתי']
+
+
+def synthesize_catalog_page(course_id: str, year: int) -> str:
+    """return a catalog page shaped like wfrCourse.aspx, with contents
+    derived from the course id"""
+    rand = random.Random('catalog{}{}'.format(course_id, year))
+    semester = rand.choice(__semesters)
+    periods = ''
+    for i in range(rand.randint(1, 4)):
+        start = rand.randint(8, 18)
+        periods += (
+            '<tr class="conditions">'
+            '<td><span id="grdMoadim_lblGroupType_{i}">{type}</span></td>'
+            '<td><span id="grdMoadim_lblDay_{i}">{day}</span></td>'
+            '<td><span id="grdMoadim_lblFrom_{i}">{start:02d}:00</span></td>'
+            '<td><span id="grdMoadim_lblTo_{i}">{end:02d}:00</span></td>'
+            '</tr>\n').format(i=i, type=rand.choice(__period_types),
+                              day=rand.choice(__weekdays), start=start,
+                              end=start + rand.randint(1, 3))
+    exams = ''
+    for i, moed in enumerate(['א', 'ב']):
+        exams += (
+            '<tr class="conditions">'
+            '<td><span id="grdBhinot_lblBhinotDate_{i}">{day:02d}/{month:02d}/'
+            '{year}</span></td>'
+            '<td><span id="grdBhinot_lblBhinotSemester_{i}">{semester}</span>'
+            '</td><td><span id="grdBhinot_lblBhinotMoed_{i}">{moed}</span>'
+            '</td></tr>\n').format(i=i, day=rand.randint(1, 28),
+                                   month=rand.choice([1, 2, 6, 7]),
+                                   year=year, semester=semester, moed=moed)
+    return (
+        '<html><head><meta charset="utf-8"><title>{course_id}</title></head>'
+        '<body><form><div class="header">'
+        '<span class="toarTitle">חוג {department}</span></div>\n'
+        '<span id="lblCourseName">קורס {course_id}</span>\n'
+        '<span id="lblPoints">{points}</span>\n'
+        '<span id="lblSemester">{semester}</span>\n'
+        '<span id="lblExamType">בחינה</span>\n'
+        '<table id="grdMoadim"><tr class="courseTabHeader"><td>סוג</td>'
+        '</tr>\n{periods}</table>\n'
+        '<table id="grdBhinot"><tr class="courseTabHeader"><td>תאריך</td>'
+        '</tr>\n{exams}</table>\n'
+        '<input type="hidden" name="__VIEWSTATE" value="{viewstate}"/>'
+        '</form></body></html>').format(
+            course_id=course_id, department=rand.randint(1, 40),
+            points=rand.randint(1, 6), semester=semester, periods=periods,
+            exams=exams, viewstate='x' * rand.randint(2000, 20000))
+
+
+def synthesize_syllabus_page(course_id: str, year: int) -> str:
+    """return a syllabus page shaped like NewSyl, with contents derived from
+    the course id"""
+    rand = random.Random('syllabus{}{}'.format(course_id, year))
+    sections = [
+        ('שפת ההוראה', 'עברית'),
+        ('מורי הקורס',
+         'ד"ר מרצה {}'.format(rand.randint(1, 500))),
+        ('מורה אחראי על הקורס',
+         'ד"ר מרצה {}'.format(rand.randint(1, 500))),
+        ('דוא"ל של המורה האחראי על הקורס',
+         'lecturer{}@mail.huji.ac.il'.format(rand.randint(1, 500))),
+        ('תאור כללי של הקורס',
+         'תיאור הקורס {}.\n'.format(course_id) * 20),
+        ('דרישות נוכחות (%)', str(rand.choice([0, 80, 100])))
+    ]
+    body = ''.join('<div><b>{}:</b>\n{}</div>\n'.format(header, text)
+                   for header, text in sections)
+    return ('<html><head><meta charset="windows-1255"></head><body>\n{}'
+            '</body></html>').format(body)
+
+
+def listing_page(links: List[Tuple[str, str]], year: int) -> str:
+    """return a listing page of the given (href, text) links, with a link
+    back to the faculties as on every catalog page"""
+    items = ''.join('<li><a href="{}">{}</a></li>\n'.format(
+        escape(href), escape(text)) for href, text in links)
+    return ('<html><head><meta charset="utf-8"></head><body>'
+            '<a href="wfrFaculties.aspx?year={}#top">פקולטות</a>'
+            '<a href="https://www.huji.ac.il/">האוניברסיטה</a>'
+            '<ul>\n{}</ul></body></html>').format(year, items)
+
+
+def catalog_listing(catalog_size: int, year: int, faculty: int|None = None,
+                    department: int|None = None) -> str:
+    """return the synthesized listing of all faculties, of the
+    departments of a faculty or of the courses of a department. Course
+    FIRST_COURSE_ID + i belongs to faculty i % LISTING_FACULTIES + 1, every
+    50th course is listed in two departments"""
+    if faculty is None:
+        return listing_page([
+            ('wfrFaculty.aspx?year={}&faculty={}'.format(year, number),
+             'פקולטה {}'.format(number))
+            for number in range(1, LISTING_FACULTIES + 1)], year)
+    if department is None:
+        return listing_page([
+            ('wfrDepartment.aspx?year={}&faculty={}&department={}'
+             .format(year, faculty, number), 'חוג {}'.format(number))
+            for number in range(1, LISTING_DEPARTMENTS + 1)], year)
+    links = []
+    for i in range(catalog_size):
+        if i % LISTING_FACULTIES + 1 != faculty:
+            continue
+        departments = {i // LISTING_FACULTIES % LISTING_DEPARTMENTS + 1}
+        if i % 50 == 0:
+            departments.add(len(departments) % LISTING_DEPARTMENTS + 1)
+        if department in departments:
+            course_id = FIRST_COURSE_ID + i
+            links.append(('wfrCourse.aspx?year={}&faculty={}&courseId={}'
+                          .format(year, faculty, course_id),
+                          str(course_id)))
+    return listing_page(links, year)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """serves catalog & syllabus pages, see StandInServer"""
+
+    server: 'StandInServer'
+
+    def log_message(self, format, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self) -> None:
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            overloaded = server.capacity and \
+                server.in_flight > server.capacity
+        try:
+            self._respond(overloaded)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _respond(self, overloaded: bool) -> None:
+        server = self.server
+        time.sleep(max(0.0, server.rand_gauss(server.latency,
+                                              server.latency / 4)))
+        if overloaded:
+            # a full request queue, like IIS / nginx, without Retry-After
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if server.rand_uniform() < server.throttle_rate:
+            self.send_response(429)
+            self.send_header('Retry-After', '1')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if server.rand_uniform() < server.error_rate:
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        page = self._page()
+        if page is None:
+            self.send_error(404)
+            return
+        content, content_type = page
+        etag = '"{}"'.format(hashlib.sha1(content).hexdigest())
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self._write_limited(content)
+
+    def _page(self) -> Tuple[bytes, str]|None:
+        url = urlsplit(self.path)
+        if url.path in (FACULTIES_PATH, FACULTY_PATH, DEPARTMENT_PATH):
+            query = {key: int(values[0]) for key, values
+                     in parse_qs(url.query).items() if values[0].isdigit()}
+            if 'year' not in query:
+                return None
+            return (catalog_listing(
+                self.server.catalog_size, query['year'],
+                query.get('faculty') if url.path != FACULTIES_PATH else None,
+                query.get('department')
+                if url.path == DEPARTMENT_PATH else None)
+                    .encode('utf-8'), 'text/html; charset=utf-8')
+        if url.path == CATALOG_PATH:
+            query = parse_qs(url.query)
+            if 'courseId' not in query or 'year' not in query:
+                return None
+            course_id, year = query['courseId'][0], int(query['year'][0])
+            return (self.server.page(course_id, year, 'catalog')
+                    .encode('utf-8'), 'text/html; charset=utf-8')
+        match = SYLLABUS_PATH.match(url.path)
+        if match is not None:
+            course_id, year = match.group(1), int(match.group(2))
+            return (self.server.page(course_id, year, 'syllabus')
+                    .encode('windows-1255', errors='replace'),
+                    'text/html; charset=windows-1255')
+        return None
+
+    def _write_limited(self, content: bytes) -> None:
+        bandwidth = self.server.bandwidth
+        if not bandwidth:
+            self.wfile.write(content)
+            return
+        chunk_size = max(1, int(bandwidth / 20))
+        for start in range(0, len(content), chunk_size):
+            self.wfile.write(content[start:start + chunk_size])
+            time.sleep(chunk_size / bandwidth)
+
+
+class StandInServer(ThreadingHTTPServer):
+    """local stand-in for catalog.huji.ac.il and shnaton.huji.ac.il.
+
+    Serves recorded pages from fixtures_dir (<id>.catalog.html /
+    <id>.syllabus.html) or synthesized ones for any other course id, with
+    the encodings of the real sites. latency is the mean delay per request
+    in seconds, error_rate / throttle_rate the fraction of 503 / 429
+    responses and bandwidth a per-response limit in bytes/sec (0 for
+    none). Requests beyond capacity concurrent ones (0 for no limit) are
+    answered with 503. The faculty / department listings hold catalog_size
+    courses, see catalog_listing."""
+
+    daemon_threads = True
+    # many scrapers connect at once, don't let their SYNs be dropped
+    request_queue_size = 128
+
+    def __init__(self, address: Tuple[str, int] = ('127.0.0.1', 0),
+                 fixtures_dir: str|None = None, latency: float = 0.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 bandwidth: float = 0, capacity: int = 0,
+                 catalog_size: int = 1000, seed: int|None = None,
+                 verbose: bool = False):
+        super().__init__(address, StandInHandler)
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.bandwidth = bandwidth
+        self.capacity = capacity
+        self.in_flight = 0
+        self.lock = Lock()
+        self.catalog_size = catalog_size
+        self.verbose = verbose
+        self.__random = random.Random(seed)
+        self.__thread: Thread|None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def rand_uniform(self) -> float:
+        return self.__random.random()
+
+    def rand_gauss(self, mu: float, sigma: float) -> float:
+        return self.__random.gauss(mu, sigma)
+
+    def page(self, course_id: str, year: int, source: str) -> str:
+        """return the recorded page of course_id, or a synthesized one"""
+        if self.fixtures_dir is not None:
+            path = os.path.join(self.fixtures_dir,
+                                '{}.{}.html'.format(course_id, source))
+            if os.path.exists(path):
+                with open(path, 'rb') as page_file:
+                    return page_file.read().decode(
+                        'utf-8' if source == 'catalog' else 'windows-1255')
+        if source == 'catalog':
+            return synthesize_catalog_page(course_id, year)
+        return synthesize_syllabus_page(course_id, year)
+
+    def start(self) -> 'StandInServer':
+        """serve from a background thread"""
+        self.__thread = Thread(target=self.serve_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='local stand-in for the HUJI catalog & syllabus sites')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--fixtures', help='directory of recorded pages')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='mean delay per request, in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--bandwidth', type=float, default=0,
+                        help='bytes/sec per response, 0 for unlimited')
+    parser.add_argument('--capacity', type=int, default=0,
+                        help='concurrent requests served before throttling')
+    parser.add_argument('--catalog-size', type=int, default=1000,
+                        help='courses in the catalog listings')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    server = StandInServer((args.host, args.port), args.fixtures,
+                           args.latency, args.error_rate, args.throttle_rate,
+                           args.bandwidth, args.capacity, args.catalog_size,
+                           verbose=args.verbose)
+    print('serving on', server.base_url)
+    server.serve_forever()
@@ -0,0 +1,59 @@
+import glob
+import os
+import sys
+
+import pytest
+
+# the modules are flat, at the top of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'fixtures')
+
+
+@pytest.fixture(scope='session')
+def fixture_courses():
+    """{course id: Course} of the 2024 course pages in tests/fixtures"""
+    from course import Course
+    from huji_he_coursescraper import HujiHebrewCourseScraper
+
+    courses = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES, '*.catalog.html'))):
+        course_id = os.path.basename(path).split('.')[0]
+        with open(path, 'rb') as catalog_file, \
+                open(os.path.join(FIXTURES, course_id + '.syllabus.html'),
+                     'rb') as syllabus_file:
+            scraper = HujiHebrewCourseScraper(
+                course_id, 2024, catalog_content=catalog_file.read(),
+                syllabus_content=syllabus_file.read())
+        course = Course()
+        scraper.update_course(course)
+        courses[course_id] = course
+    return courses
+
+
+@pytest.fixture
+def standin():
+    """a StandInServer serving the pages in tests/fixtures"""
+    from standinserver import StandInServer
+
+    server = StandInServer(fixtures_dir=FIXTURES).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def standin_options(standin):
+    """scraper_options pointing the scrapers at the stand-in server"""
+    return {'catalog_base_url': standin.base_url,
+            'syllabus_base_url': standin.base_url}
+
+
+@pytest.fixture
+def transport():
+    from metrics import Metrics
+    from transport import HttpTransport
+
+    transport = HttpTransport(retries=0, metrics=Metrics())
+    yield transport
+    transport.close()
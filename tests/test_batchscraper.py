@@ -0,0 +1,125 @@
+import gc
+import os
+import threading
+import weakref
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+
+import pytest
+
+import batchscraper
+from batchscraper import scrape_many, scrape_pipeline
+from course import Course
+from metrics import Metrics
+from transport import HttpStatusError, HttpTransport
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'fixtures')
+
+
+def fixture_pages(course_id, year, transport=None, scraper_options=None):
+    pages = []
+    for source in ('catalog', 'syllabus'):
+        with open(os.path.join(FIXTURES, '{}.{}.html'.format(course_id,
+                                                              source)),
+                  'rb') as page_file:
+            pages.append(page_file.read())
+    return tuple(pages)
+
+
+class CancellingPool(ThreadPoolExecutor):
+    """executor whose every task is cancelled before it runs"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.cancel()
+        return future
+
+
+def run_with_timeout(function, timeout: float = 10):
+    """return what function returned or raised, failing if it hangs"""
+    outcome = []
+
+    def run():
+        try:
+            outcome.append(function())
+        except BaseException as error:
+            outcome.append(error)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert outcome, 'hung'
+    return outcome[0]
+
+
+@pytest.fixture
+def recorded_pages(monkeypatch):
+    monkeypatch.setattr(batchscraper, 'fetch_course_pages', fixture_pages)
+
+
+def test_scrape_many(fixture_courses, transport, standin_options):
+    courses = list(scrape_many(['67504', '10001', '67101', '67504'], 2024,
+                               concurrency=3, transport=transport,
+                               scraper_options=standin_options))
+    # in order, repeated ids once, a course not recorded synthesized
+    assert [course.get_id() for course in courses] \
+        == ['67504', '10001', '67101']
+    assert courses[1].get_course_name() == 'קורס 10001'
+    for course in courses[::2]:
+        assert course.to_tuple() \
+            == fixture_courses[course.get_id()].to_tuple()
+        assert course.other_data['catalog_url'].startswith(
+            standin_options['catalog_base_url'])
+
+
+
+
+class TrackedCourse(Course):
+    """a Course that can be weakly referenced"""
+
+
+def test_scrape_many_bounds_the_courses_in_flight(monkeypatch):
+    started = []
+
+    def fake_scrape_course(course_id, *args):
+        started.append(course_id)
+        course = TrackedCourse()
+        course.set_id(course_id)
+        return course
+
+    monkeypatch.setattr(batchscraper, 'scrape_course', fake_scrape_course)
+    yielded = []
+    for course in scrape_many([str(number) for number in range(200)], 2024,
+                              concurrency=2, max_pending=5):
+        assert len(started) - len(yielded) <= 5
+        yielded.append(weakref.ref(course))
+    del course
+    gc.collect()
+    assert len(started) == 200
+    # yielded courses aren't held on to
+    assert all(course() is None for course in yielded)
+
+def test_error_pages_are_not_parsed(standin, standin_options):
+    standin.error_rate = 1.0
+    transport = HttpTransport(retries=1, backoff=0.01, metrics=Metrics())
+    with pytest.raises(HttpStatusError) as error:
+        list(scrape_many(['67504'], 2024, transport=transport,
+                         scraper_options=standin_options))
+    assert error.value.status == 503
+    transport.close()
+
+def test_pipeline(monkeypatch, recorded_pages):
+    # threads parse as the processes would, without forking the test run
+    monkeypatch.setattr(batchscraper, 'ProcessPoolExecutor',
+                        ThreadPoolExecutor)
+    courses = run_with_timeout(lambda: list(scrape_pipeline(
+        ['67504', '67101', '67504', '67392'], 2024, max_pending=2)))
+    assert [course.get_id() for course in courses] \
+        == ['67504', '67101', '67392']
+
+
+def test_cancelled_parse_is_not_waited_for(monkeypatch, recorded_pages):
+    monkeypatch.setattr(batchscraper, 'ProcessPoolExecutor', CancellingPool)
+    outcome = run_with_timeout(
+        lambda: list(scrape_pipeline(['67504'], 2024)))
+    assert isinstance(outcome, CancelledError)
@@ -0,0 +1,86 @@
+import os
+
+import pytest
+from bs4 import BeautifulSoup as bs
+
+from benchmark import GETTERS, SYLLABUS_HEADERS, _find_by_index, \
+    _find_by_scan, _load_course_pages, _load_syllabus_pages, bench_parsers, \
+    bench_syllabus_index, compare_to_baseline, run_suite
+from huji_he_coursescraper import index_syllabus_sections
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'fixtures')
+
+# nested divs, a header repeated and a header that's part of another
+TRICKY_PAGE = '''<html><body>
+<div><div><b>שפת ההוראה:</b>
+עברית
+</div></div>
+<div><b>מורי הקורס:</b>
+א
+<div><b>דרישות נוכחות (%):</b>
+80
+</div></div>
+<div><b>שפת ההוראה:</b>
+אנגלית
+</div>
+<div><b>מורה אחראי על הקורס:</b>
+ב
+</div>
+</body></html>'''
+
+
+def assert_index_matches_scan(page: bs) -> None:
+    sections = index_syllabus_sections(page)
+    assert [_find_by_index(sections, header) for header in SYLLABUS_HEADERS] \
+        == [_find_by_scan(page, header) for header in SYLLABUS_HEADERS]
+
+
+@pytest.mark.parametrize('parser', ('lxml', 'html5lib'))
+def test_index_matches_scan_on_fixtures(parser):
+    for name in os.listdir(FIXTURES):
+        if name.endswith('.syllabus.html'):
+            with open(os.path.join(FIXTURES, name), 'rb') as page_file:
+                assert_index_matches_scan(
+                    bs(page_file.read(), parser,
+                       from_encoding='windows-1255'))
+
+
+@pytest.mark.parametrize('parser', ('lxml', 'html5lib'))
+def test_index_matches_scan_on_nested_sections(parser):
+    assert_index_matches_scan(bs(TRICKY_PAGE, parser))
+
+
+def test_bench_syllabus_index(capsys):
+    assert len(_load_syllabus_pages(FIXTURES)) == 3
+    bench_syllabus_index(FIXTURES, repeat=1)
+    assert capsys.readouterr().out.endswith('output identical\n')
+
+
+def test_run_suite():
+    assert sorted(_load_course_pages(FIXTURES)) == ['67101', '67392', '67504']
+    results = run_suite(FIXTURES, 2024, repeat=1)
+    assert set(results) == {'parse.catalog.ms', 'parse.syllabus.ms',
+                            'end_to_end.courses_per_sec',
+                            'end_to_end.peak_memory_mb'} | \
+        {'getter.{}.ms'.format(getter) for getter in GETTERS}
+    assert all(value > 0 for value in results.values())
+
+
+def test_bench_parsers(capsys):
+    bench_parsers(FIXTURES, 2024, ['html5lib', 'lxml', 'html.parser'])
+    assert capsys.readouterr().out.endswith(
+        'output identical for 3 courses\n')
+
+
+def test_compare_to_baseline(capsys):
+    baseline = {'parse.catalog.ms': 2.0, 'getter.get_name.ms': 0.001,
+                'end_to_end.courses_per_sec': 100.0}
+    results = {'parse.catalog.ms': 2.5, 'getter.get_name.ms': 0.005,
+               'end_to_end.courses_per_sec': 80.0, 'new.ms': 1.0}
+    # slower parses and lower throughput regress, noise and new metrics
+    # don't
+    assert compare_to_baseline(results, baseline) \
+        == ['parse.catalog.ms', 'end_to_end.courses_per_sec']
+    assert compare_to_baseline(results, baseline, tolerance=0.3) == []
+    assert '(new)' in capsys.readouterr().out
@@ -0,0 +1,75 @@
+import pytest
+
+from catalogcrawler import CrawlFrontier, crawl_course_ids, extract_links, \
+    scrape_catalog
+from metrics import Metrics
+from standinserver import FIRST_COURSE_ID, LISTING_FACULTIES, StandInServer
+
+
+@pytest.fixture
+def catalog():
+    server = StandInServer(catalog_size=60).start()
+    yield server
+    server.stop()
+
+
+def test_frontier_queues_urls_once():
+    frontier = CrawlFrontier()
+    assert frontier.add('https://a/pages/x.aspx?year=1')
+    assert not frontier.add('https://a/pages/x.aspx?year=1#top')
+    assert frontier.add('https://a/pages/y.aspx')
+    assert len(frontier) == 2
+    assert frontier.pop() == 'https://a/pages/x.aspx?year=1'
+    assert frontier.pop() == 'https://a/pages/y.aspx'
+    assert frontier.pop() is None
+
+
+def test_extract_links():
+    page = ('<a href="wfrDepartment.aspx?year=2024&faculty=2&department=1">'
+            '</a><a href="wfrCourse.aspx?year=2024&faculty=2&courseId=67504">'
+            '</a><a href="wfrCourse.aspx?year=2024&courseId=67101"></a>'
+            '<a href="https://www.huji.ac.il/pages/wfrFaculty.aspx"></a>'
+            '<a href="wfrCourse.aspx?year=2024&courseId="></a>'
+            '<a href="/about.html"></a>').encode('utf-8')
+    listings, courses = extract_links(
+        page, 'https://catalog.huji.ac.il/pages/wfrFaculty.aspx?year=2024',
+        r'/pages/wfr\w*Department\w*\.aspx', r'/pages/wfrCourse\.aspx')
+    assert listings == ['https://catalog.huji.ac.il/pages/wfrDepartment.'
+                        'aspx?year=2024&faculty=2&department=1']
+    # a course without a faculty is under the default one
+    assert courses == [('67504', 2), ('67101', 12)]
+
+
+def test_crawl_finds_every_course_once(catalog, transport):
+    metrics = Metrics()
+    found = list(crawl_course_ids(2024, transport, concurrency=4,
+                                  catalog_base_url=catalog.base_url,
+                                  metrics=metrics))
+    assert sorted(found) == sorted(
+        (str(FIRST_COURSE_ID + i), i % LISTING_FACULTIES + 1)
+        for i in range(60))
+    # the faculties page, 5 faculties and their 4 departments each
+    assert metrics.counter('crawl.pages') == 1 + 5 + 5 * 4
+
+
+def test_crawl_stops_after_max_pages(catalog, transport):
+    assert list(crawl_course_ids(2024, transport,
+                                 catalog_base_url=catalog.base_url,
+                                 max_pages=6, metrics=Metrics())) == []
+
+
+def test_scrape_catalog(transport):
+    server = StandInServer(catalog_size=7).start()
+    try:
+        courses = list(scrape_catalog(
+            2024, concurrency=4, transport=transport,
+            scraper_options={'catalog_base_url': server.base_url,
+                             'syllabus_base_url': server.base_url},
+            crawl_options={'metrics': Metrics()}))
+    finally:
+        server.stop()
+    assert sorted(course.get_id() for course in courses) \
+        == [str(FIRST_COURSE_ID + i) for i in range(7)]
+    # scraped faculty by faculty, from their own catalog urls
+    assert [course.other_data['catalog_url'].split('faculty=')[1][0]
+            for course in courses] == ['1', '1', '2', '2', '3', '4', '5']
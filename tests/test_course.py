@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from course import COLUMN_NAMES, FIELDS, Course, courses_to_columns
+
+
+def test_to_dict_leaves_out_unset_fields():
+    course = Course()
+    course.set_id('1')
+    course.set_credits(0)
+    assert course.to_dict() == {'Course id': '1', 'Course Credits Amount': 0,
+                                'other_data': {}}
+
+
+def test_courses_have_no_instance_dict():
+    course = Course()
+    with pytest.raises(AttributeError):
+        course.extra = 1
+    assert not hasattr(course, '__dict__')
+
+
+def test_record_round_trip(fixture_courses):
+    for course in fixture_courses.values():
+        record = json.loads(json.dumps(course.to_record()))
+        assert Course.from_record(record).to_dict() == course.to_dict()
+        assert Course.from_tuple(course.to_tuple(), course.other_data) \
+            .to_dict() == course.to_dict()
+
+
+def test_to_dict_columns_follow_fields(fixture_courses):
+    course = fixture_courses['67504']
+    assert len(FIELDS) == len(COLUMN_NAMES) == len(course.to_tuple())
+    assert list(course.to_dict())[:-1] == [
+        column for column, value in zip(COLUMN_NAMES, course.to_tuple())
+        if value is not None]
+
+
+def test_courses_to_columns(fixture_courses):
+    courses = list(fixture_courses.values())
+    columns = courses_to_columns(courses)
+    assert list(columns) == list(FIELDS) + ['other_data']
+    assert columns['id'] == list(fixture_courses)
+    assert columns['credits'] == [course.get_credits() for course in courses]
+    assert columns['other_data'][0] is courses[0].other_data
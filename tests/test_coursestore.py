@@ -0,0 +1,35 @@
+import pytest
+
+from course import Course
+from coursestore import CourseStore, staff_key, staff_names
+from outputsink import open_sink
+
+
+def test_staff_listed_one_per_line(fixture_courses):
+    assert staff_names(fixture_courses['67504']) \
+        == ['ד"ר רונית כהן', "פרופ' אבי לוי", 'מר יוסי מזרחי']
+    assert staff_names(fixture_courses['67392']) \
+        == ['Dr. John Smith', 'ד"ר נועה פרץ']
+    # the staff column keeps its format
+    assert fixture_courses['67392'].get_staff() \
+        == 'Dr. John Smithד"ר נועה פרץ'
+    stored = Course()
+    stored.set_staff('Dr. John Smith, ד"ר נועה פרץ')
+    assert staff_names(stored) == ['Dr. John Smith', 'ד"ר נועה פרץ']
+    assert staff_key('  Dr.  John   Smith ') == 'john smith'
+
+
+def test_query_by_staff(tmp_path, fixture_courses):
+    with CourseStore(str(tmp_path / 'courses.sqlite')) as store:
+        store.add_many(fixture_courses.values(), 2024)
+        assert store.query_ids(staff='יוסי מזרחי') == [('67504', 2024)]
+        assert store.query_ids(staff='john smith') == [('67392', 2024)]
+        assert store.query_ids(staff='רונית כהן', min_credits=6) == []
+
+
+def test_sqlite_sink_needs_a_year(tmp_path):
+    path = str(tmp_path / 'courses.sqlite')
+    with pytest.raises(ValueError, match='year'):
+        open_sink(path)
+    sink = open_sink(path, year=2024)
+    sink.close()
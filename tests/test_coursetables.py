@@ -0,0 +1,32 @@
+import pandas as pd
+
+from course import Course
+from coursetables import exams_frame, flat_frame, periods_frame
+from outputsink import flatten_course
+
+
+def test_flat_frame_matches_flatten_course(fixture_courses):
+    courses = list(fixture_courses.values()) + [Course()]
+    expected = pd.DataFrame([flatten_course(course) for course in courses])
+    frame = flat_frame(courses)
+    assert list(frame.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(frame.astype(object),
+                                  expected.astype(object),
+                                  check_dtype=False)
+
+
+def test_periods_frame(fixture_courses):
+    periods = periods_frame(list(fixture_courses.values()))
+    # 67101, 67392 and 67504 hold 1, 1 and 4 periods
+    assert list(periods['course']) == [0, 1, 2, 2, 2, 2]
+    assert list(periods['weekday']) == [2, 4, 1, 3, 5, 7]
+    assert periods['start_minute'].iloc[0] == 8 * 60 + 30
+    assert periods['end_minute'].iloc[-1] == 0
+
+
+def test_exams_frame(fixture_courses):
+    exams = exams_frame(list(fixture_courses.values()))
+    assert list(exams['course']) == [0, 0, 2, 2, 2, 2]
+    assert list(exams['semester'].unique()) == ["א'", "ב'"]
+    assert str(exams['date'].iloc[0].date()) == '2024-02-12'
+    assert exams_frame([]).empty and periods_frame([Course()]).empty
@@ -0,0 +1,94 @@
+import math
+import random
+from datetime import date, timedelta
+from itertools import combinations
+
+from course import Course
+from examdates import exam_arrays, exam_clashes, exam_pairs, \
+    nearest_exam_gaps, spacing_report
+
+FIRST_DAY = date(2024, 1, 21)
+
+
+def random_courses(count, seed=0):
+    rng = random.Random(seed)
+    courses = []
+    for number in range(count):
+        course = Course()
+        course.set_id(str(10000 + number))
+        exams = []
+        for _ in range(rng.randint(0, 3)):
+            metadata = {'semester': [rng.choice('AB')],
+                        'MOED': rng.choice(['א', 'ב'])}
+            exams.append((FIRST_DAY + timedelta(days=rng.randint(0, 30)),
+                          metadata))
+        course.set_exam_dates(exams or None)
+        courses.append(course)
+    return courses
+
+
+def all_exams(courses):
+    """(course_id, semester symbol, moed, date) of every distinct exam"""
+    return sorted({(course.get_id(), metadata['semester'][0],
+                    metadata['MOED'], exam_date)
+                   for course in courses
+                   for exam_date, metadata in course.get_exam_dates() or ()})
+
+
+def test_exam_pairs_match_every_pair(fixture_courses):
+    courses = random_courses(60)
+    for within_days in (0, 1, 3):
+        expected = set()
+        for first, second in combinations(all_exams(courses), 2):
+            if first[0] != second[0] and first[1:3] == second[1:3] \
+                    and abs((second[3] - first[3]).days) <= within_days:
+                expected.add(frozenset([(first[0], first[3]),
+                                        (second[0], second[3])]))
+        pairs = exam_pairs(courses, within_days)
+        found = [frozenset([(row.course_id, row.date.date()),
+                            (row.other_course_id, row.other_date.date())])
+                 for row in pairs.itertuples()]
+        assert len(found) == len(set(found))
+        assert set(found) == expected
+        assert (pairs['date'] <= pairs['other_date']).all()
+        assert ((pairs['other_date'] - pairs['date']).dt.days
+                == pairs['days_apart']).all()
+    assert exam_clashes(courses).equals(exam_pairs(courses, 0))
+    # the fixture courses share no exam day
+    assert exam_clashes(list(fixture_courses.values())).empty
+    assert exam_pairs([Course()], 7).empty
+
+
+def test_nearest_exam_gaps():
+    courses = random_courses(40, seed=1)
+    exams = all_exams(courses)
+    gaps = nearest_exam_gaps(courses)
+    assert len(gaps) == len(exams)
+    for row in gaps.itertuples():
+        exam_date = row.date.date()
+        others = [abs((other[3] - exam_date).days) for other in exams
+                  if other[0] != row.course_id
+                  and other[2] == row.moed
+                  and other[1] == {"א'": 'A', "ב'": 'B'}[row.semester]]
+        if others:
+            assert row.gap_days == min(others)
+        else:
+            assert math.isnan(row.gap_days)
+
+
+def test_spacing_report():
+    courses = random_courses(50, seed=2)
+    report = spacing_report(courses, 4)
+    assert list(report.columns) == [0, 1, 2, 3, 4]
+    assert report.to_numpy().sum() == len(exam_pairs(courses, 4))
+    assert report.loc[:, 0].sum() == len(exam_clashes(courses))
+
+
+def test_exam_arrays():
+    courses = random_courses(30, seed=3)
+    arrays = exam_arrays(courses)
+    assert sum(len(dates) for _, dates in arrays.values()) \
+        == len(all_exams(courses))
+    for positions, dates in arrays.values():
+        assert len(positions) == len(dates)
+        assert (dates[1:] >= dates[:-1]).all()
@@ -0,0 +1,86 @@
+import os
+import threading
+
+import pytest
+
+from httpcache import CachedTransport, HttpCache, OfflineCacheMiss
+from metrics import Metrics
+
+URL = 'https://catalog.huji.ac.il/pages/wfrCourse.aspx?year=2024&courseId=1'
+
+
+def test_store_and_read(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    assert cache.read(URL) is None
+    cache.store(URL, b'page', etag='"1"')
+    assert cache.read(URL) == b'page'
+    assert cache.lookup(URL).etag == '"1"'
+    cache.store(URL, b'new page')
+    assert cache.read(URL) == b'new page'
+    # only the body and the index are left behind
+    assert sorted(os.listdir(str(tmp_path))) \
+        == sorted([HttpCache._key(URL) + '.z', 'index.sqlite'])
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    body = os.urandom(1000)
+    with HttpCache(str(tmp_path), max_bytes=2500) as cache:
+        cache.store(URL + '1', body)
+        cache.store(URL + '2', body)
+        cache.read(URL + '1')
+        cache.store(URL + '3', body)
+        assert cache.read(URL + '2') is None
+        assert cache.read(URL + '1') == cache.read(URL + '3') == body
+        assert cache.stats()['entries'] == 2
+
+
+def test_reads_never_see_a_partly_written_body(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    bodies = [os.urandom(256 * 1024), os.urandom(256 * 1024)]
+    cache.store(URL, bodies[0])
+    done = threading.Event()
+    seen = []
+
+    def read_while_storing():
+        while not done.is_set():
+            try:
+                seen.append(cache.read(URL))
+            except Exception as error:
+                seen.append(error)
+
+    reader = threading.Thread(target=read_while_storing)
+    reader.start()
+    try:
+        for number in range(200):
+            cache.store(URL, bodies[number % 2])
+    finally:
+        done.set()
+        reader.join()
+    assert seen and all(body in bodies for body in seen)
+
+
+def test_cached_transport(tmp_path, standin, transport):
+    url = standin.base_url + '/pages/wfrCourse.aspx?year=2024&courseId=67504'
+    metrics = Metrics()
+    with HttpCache(str(tmp_path)) as cache:
+        cached = CachedTransport(transport, cache, metrics=metrics)
+        first = cached.fetch(url)
+        assert first.status == 200 and not first.from_cache
+        # fresh, served without a request
+        second = cached.fetch(url)
+        assert second.from_cache and second.content == first.content
+        assert metrics.counter('cache.miss') == 1
+        assert metrics.counter('cache.hit') == 1
+
+        # stale, revalidated with its etag
+        stale = CachedTransport(transport, cache, default_ttl=0,
+                                metrics=metrics)
+        third = stale.fetch(url)
+        assert third.from_cache and third.content == first.content
+        assert metrics.counter('cache.revalidated') == 1
+
+        offline = CachedTransport(transport, cache, default_ttl=0,
+                                  offline=True, metrics=metrics)
+        assert offline.fetch(url).content == first.content
+        with pytest.raises(OfflineCacheMiss):
+            offline.fetch(url.replace('67504', '67101'))
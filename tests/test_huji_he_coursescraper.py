@@ -0,0 +1,68 @@
+import pytest
+
+from course import Course
+from huji_he_coursescraper import PAGE_FIELDS, HujiHebrewCourseScraper, \
+    huji_semester_to_symbol, page_key_from_url, symbol_to_huji_semester
+
+
+class RecordingTransport:
+    """passes fetches on, keeping the urls fetched"""
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.urls = []
+
+    def fetch(self, url, headers=None):
+        self.urls.append(url)
+        return self.transport.fetch(url, headers=headers)
+
+
+@pytest.fixture
+def recording(transport):
+    return RecordingTransport(transport)
+
+
+def scraper(recording, standin_options):
+    return HujiHebrewCourseScraper('67504', 2024, transport=recording,
+                                   **standin_options)
+
+
+@pytest.mark.parametrize('page', sorted(PAGE_FIELDS))
+def test_fields_fetch_only_their_page(page, recording, standin_options):
+    course_scraper = scraper(recording, standin_options)
+    assert recording.urls == []
+    course = Course()
+    course_scraper.update_course(course, PAGE_FIELDS[page])
+    assert [page_key_from_url(url) for url in recording.urls] \
+        == [('67504', 2024, page)]
+    # the page is fetched once, and only the given fields are set
+    course_scraper.update_course(Course(), PAGE_FIELDS[page])
+    assert len(recording.urls) == 1
+    assert course.get_id() is None
+
+
+def test_scrape_fetches_both_pages(recording, standin_options):
+    course_scraper = scraper(recording, standin_options)
+    course_scraper.scrape('67504', 2024)
+    course = Course()
+    course_scraper.update_course(course)
+    assert sorted(page_key_from_url(url)[2] for url in recording.urls) \
+        == ['catalog', 'syllabus']
+    assert course.get_course_name() == 'מבני נתונים'
+
+
+def test_page_key_from_url():
+    assert page_key_from_url('https://catalog.huji.ac.il/pages/wfrCourse.'
+                             'aspx?year=2024&faculty=12&courseId=67504') \
+        == ('67504', 2024, 'catalog')
+    assert page_key_from_url('https://shnaton.huji.ac.il/index.php/NewSyl/'
+                             '67504/1/2024/') == ('67504', 2024, 'syllabus')
+    assert page_key_from_url('https://catalog.huji.ac.il/pages/'
+                             'wfrFaculties.aspx?year=2024') is None
+
+
+def test_semester_symbols():
+    for hebrew in ("א'", "ב'", "א' או ב'", 'קורס שנתי'):
+        assert symbol_to_huji_semester(huji_semester_to_symbol(hebrew)) \
+            == hebrew
+    assert huji_semester_to_symbol('קיץ') == ['קיץ']
@@ -0,0 +1,108 @@
+import json
+import os
+
+import pytest
+
+import catalogcrawler
+from coursestore import CourseStore
+from httpcache import HttpCache
+from huji_scrape import main, read_ids_file, scrape
+from journal import RunJournal
+from pagearchive import PageArchive
+from workqueue import WorkQueue
+
+URL = 'https://shnaton.huji.ac.il/index.php/NewSyl/67504/1/2024/'
+
+
+def test_cache_stats_and_clear(tmp_path, capsys):
+    cache_dir = str(tmp_path / 'cache')
+    archive_dir = str(tmp_path / 'archive')
+    with HttpCache(cache_dir) as cache:
+        cache.store(URL, b'syllabus')
+    with PageArchive(archive_dir) as archive:
+        archive.append('67504', 2024, 'syllabus', URL, b'syllabus')
+    options = ['--cache-dir', cache_dir, '--archive-dir', archive_dir]
+
+    main(['cache', 'stats'] + options)
+    stats = json.loads(capsys.readouterr().out)
+    assert stats['http_cache']['entries'] == 1
+    assert stats['archive']['pages'] == 1
+
+    # the archive is kept unless asked for
+    main(['cache', 'clear'] + options)
+    main(['cache', 'stats'] + options)
+    assert json.loads(capsys.readouterr().out) \
+        == {'http_cache': {'entries': 0, 'bytes': 0, 'oldest': None,
+                           'newest': None},
+            'archive': stats['archive']}
+    main(['cache', 'clear', '--with-archive'] + options)
+    assert not os.path.exists(os.path.join(archive_dir, 'pages.arc'))
+    main(['cache', 'stats'] + options)
+    assert 'archive' not in json.loads(capsys.readouterr().out)
+
+
+
+def test_scrape_closes_its_stores_on_error(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    closed = []
+    for store_class in (HttpCache, PageArchive, RunJournal):
+        def close(self, close=store_class.close, name=store_class.__name__):
+            closed.append(name)
+            close(self)
+        monkeypatch.setattr(store_class, 'close', close)
+
+    def failing_scrape(*args, **kwargs):
+        raise RuntimeError('scrape failed')
+        yield
+
+    monkeypatch.setattr(catalogcrawler, 'scrape_by_faculty', failing_scrape)
+    with pytest.raises(RuntimeError):
+        scrape(['67504'], 2024, outputs=['courses.jsonl'])
+    assert sorted(set(closed)) == ['HttpCache', 'PageArchive', 'RunJournal']
+
+def test_read_ids_file(tmp_path):
+    path = tmp_path / 'ids.txt'
+    path.write_text('67101, 67392\n# skipped 1\n67504 # the last\n',
+                    encoding='utf-8')
+    assert read_ids_file(str(path)) == ['67101', '67392', '67504']
+
+
+def test_inspect_and_export(tmp_path, capsys, fixture_courses):
+    db = str(tmp_path / 'courses.sqlite')
+    archive_dir = str(tmp_path / 'archive')
+    with CourseStore(db) as store:
+        store.add_many(fixture_courses.values(), 2024)
+    with PageArchive(archive_dir) as archive:
+        archive.append('67504', 2024, 'syllabus', URL, b'syllabus')
+
+    main(['inspect', '67504', '--db', db, '--archive-dir', archive_dir,
+          '--fields', 'id', 'credits'])
+    record, archived = capsys.readouterr().out.split('}\n', 1)
+    assert json.loads(record + '}') \
+        == {'id': '67504', 'credits': fixture_courses['67504'].get_credits()}
+    assert json.loads(archived)['url'] == URL
+    with pytest.raises(SystemExit, match='not in'):
+        main(['inspect', '1', '--db', db])
+
+    out = str(tmp_path / 'courses.jsonl')
+    main(['export', '--db', db, '--out', out])
+    with open(out, encoding='utf-8') as exported:
+        assert sorted(json.loads(line)['id'] for line in exported) \
+            == sorted(fixture_courses)
+
+
+def test_queue_add_status_and_retry(tmp_path, capsys):
+    queue_path = str(tmp_path / 'queue.sqlite')
+    options = ['--queue', queue_path]
+    main(['queue', 'add', '--ids', '67101', '67392', '67101'] + options)
+    assert json.loads(capsys.readouterr().out) == {'added': 2}
+    with WorkQueue(queue_path, max_attempts=1) as queue:
+        queue.claim('worker')
+        queue.fail('worker', '67101', 2024, 'gone')
+
+    main(['queue', 'status'] + options)
+    counts, failure = capsys.readouterr().out.splitlines()
+    assert json.loads(counts)['failed'] == 1
+    assert failure == 'failed 67101 2024: gone'
+    main(['queue', 'retry'] + options)
+    assert json.loads(capsys.readouterr().out) == {'retried': 1}
@@ -0,0 +1,105 @@
+import os
+import shutil
+
+import pytest
+
+from incremental import PageHashStore, content_hash, diff_records, \
+    scrape_changes
+from metrics import Metrics
+from standinserver import StandInServer
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'fixtures')
+
+
+def test_content_hash_ignores_page_state():
+    page = b'<input type="hidden" name="__VIEWSTATE" value="{}" /><p>{}</p>'
+    assert content_hash(page.replace(b'{}', b'a', 1)) \
+        == content_hash(page.replace(b'{}', b'b', 1))
+    assert content_hash(page.replace(b'{}', b'a')) \
+        != content_hash(page.replace(b'{}', b'b'))
+
+
+def test_diff_records():
+    old = {'name': 'a', 'credits': 2, 'semesters': ['A'],
+           'other_data': {'coordinator': 'x', 'gone': 1}}
+    new = {'name': 'a', 'credits': 3, 'semesters': ['A', 'B'],
+           'other_data': {'coordinator': 'y'}}
+    assert diff_records(old, new) == {
+        'credits': {'old': 2, 'new': 3},
+        'semesters': {'old': ['A'], 'new': ['A', 'B'], 'added': ['B'],
+                      'removed': []},
+        'other_data.coordinator': {'old': 'x', 'new': 'y'},
+        'other_data.gone': {'old': 1, 'new': None}}
+    assert diff_records(new, new) == {}
+
+
+@pytest.fixture
+def pages_dir(tmp_path):
+    pages_dir = str(tmp_path / 'pages')
+    shutil.copytree(FIXTURES, pages_dir)
+    return pages_dir
+
+
+def edit_page(pages_dir, name, old, new):
+    path = os.path.join(pages_dir, name)
+    with open(path, 'rb') as page_file:
+        content = page_file.read()
+    assert old in content
+    with open(path, 'wb') as page_file:
+        page_file.write(content.replace(old, new))
+
+
+def test_only_changed_courses_are_emitted(tmp_path, pages_dir, transport):
+    server = StandInServer(fixtures_dir=pages_dir).start()
+    options = {'catalog_base_url': server.base_url,
+               'syllabus_base_url': server.base_url}
+    course_ids = ['67101', '67392', '67504']
+    try:
+        with PageHashStore(str(tmp_path / 'pages.db')) as store:
+            def run():
+                metrics = Metrics()
+                changes = list(scrape_changes(
+                    course_ids, 2024, store, transport=transport,
+                    scraper_options=options, metrics=metrics))
+                return changes, metrics
+
+            changes, _ = run()
+            assert [(change.course_id, change.status) for change in changes] \
+                == [(course_id, 'new') for course_id in course_ids]
+
+            changes, metrics = run()
+            assert changes == []
+            assert metrics.counter('incremental.unchanged') == 3
+
+            # new page state alone is no change, new attendance is
+            edit_page(pages_dir, '67504.catalog.html', b'ZGRk67504',
+                      b'ZXhh67504')
+            edit_page(pages_dir, '67504.syllabus.html', b'\r\n80\r\n',
+                      b'\r\n90\r\n')
+            changes, metrics = run()
+            change, = changes
+            assert change.to_record() == {
+                'course_id': '67504', 'year': 2024, 'status': 'changed',
+                'diff': {'attendance_requirements': {'old': 0.8,
+                                                     'new': 0.9}}}
+            assert metrics.counter('incremental.changed.syllabus') == 1
+            assert metrics.counter('incremental.changed.catalog') == 0
+            assert store.get_course('67504', 2024) \
+                .get_attendance_requirements() == 0.9
+    finally:
+        server.stop()
+
+
+def test_new_course_is_diffed_against_its_baseline_year(
+        tmp_path, fixture_courses, transport, standin_options):
+    with PageHashStore(str(tmp_path / 'pages.db')) as store:
+        last_year = fixture_courses['67504']
+        store.save('67504', 2023, {}, last_year)
+        change, = scrape_changes(['67504'], 2024, store, transport=transport,
+                                 scraper_options=standin_options,
+                                 baseline_year=2023, metrics=Metrics())
+    assert change.status == 'new'
+    # the same pages, only their urls differ
+    assert set(change.diff) == {'other_data.catalog_url',
+                                'other_data.syllabus_url'}
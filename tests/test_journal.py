@@ -0,0 +1,67 @@
+import functools
+
+import pytest
+
+from batchscraper import scrape_many, scrape_pipeline
+from course import Course
+from journal import RunJournal, dedupe_ids
+from transport import HttpStatusError
+
+
+def test_dedupe_ids():
+    assert dedupe_ids([3, '1', 1, '3', 2]) == [3, '1', 2]
+
+
+def test_journal_survives_a_torn_last_line(tmp_path, fixture_courses):
+    path = str(tmp_path / 'journal.jsonl')
+    with RunJournal(path) as journal:
+        journal.append('67504', 2024, fixture_courses['67504'])
+    # the run died halfway through writing a line
+    with open(path, 'a', encoding='utf-8') as journal_file:
+        journal_file.write('{"course_id": "67101", "ye')
+
+    with RunJournal(path) as journal:
+        assert journal.is_done(67504, 2024)
+        assert not journal.is_done('67504', 2023)
+        assert not journal.is_done('67101', 2024)
+        assert journal.get('67504', 2024).to_dict() \
+            == fixture_courses['67504'].to_dict()
+        journal.append('67101', 2024, fixture_courses['67101'])
+    with RunJournal(path) as journal:
+        assert journal.is_done('67101', 2024)
+
+
+def test_journaled_courses_are_not_scraped_again(tmp_path, transport,
+                                                 standin_options):
+    journaled = Course()
+    journaled.set_id('67504')
+    journaled.set_course_name('from the journal')
+    with RunJournal(str(tmp_path / 'journal.jsonl')) as journal:
+        journal.append('67504', 2024, journaled)
+        courses = list(scrape_many(['67504', '67101'], 2024,
+                                   transport=transport, journal=journal,
+                                   scraper_options=standin_options))
+        assert [course.get_course_name() for course in courses] \
+            == ['from the journal', 'מבוא למדעי המחשב']
+        assert journal.is_done('67101', 2024)
+
+
+@pytest.mark.parametrize('scrape', [
+    scrape_many, functools.partial(scrape_pipeline, parse_workers=1)])
+def test_failed_courses_are_scraped_on_resume(tmp_path, scrape, standin,
+                                              standin_options, transport):
+    path = str(tmp_path / 'journal.jsonl')
+    standin.error_rate = 1.0
+    with RunJournal(path) as journal:
+        with pytest.raises(HttpStatusError):
+            list(scrape(['67101'], 2024, transport=transport,
+                        journal=journal, scraper_options=standin_options))
+        assert not journal.is_done('67101', 2024)
+
+    standin.error_rate = 0.0
+    with RunJournal(path) as journal:
+        courses = list(scrape(['67101'], 2024, transport=transport,
+                              journal=journal,
+                              scraper_options=standin_options))
+        assert courses[0].get_course_name() == 'מבוא למדעי המחשב'
+        assert journal.is_done('67101', 2024)
@@ -0,0 +1,71 @@
+import io
+import json
+
+import pytest
+
+from metrics import Metrics, ProgressReporter
+
+
+class TtyStream(io.StringIO):
+    def isatty(self):
+        return True
+
+
+def test_summary():
+    metrics = Metrics()
+    for seconds in range(1, 101):
+        metrics.observe('parse', seconds / 1000)
+    with metrics.timer('fetch'):
+        pass
+    metrics.increment('http.bytes', 100)
+    metrics.increment('http.bytes', 50)
+    metrics.set_gauge('workers', 4)
+    summary = metrics.summary()
+    parse = summary['stages']['parse']
+    assert parse['count'] == 100
+    assert parse['total'] == pytest.approx(5.05)
+    assert (parse['p50'], parse['p95'], parse['p99']) == (0.05, 0.095, 0.099)
+    assert summary['stages']['fetch']['count'] == 1
+    assert summary['counters'] == {'http.bytes': 150}
+    assert summary['gauges'] == {'workers': 4}
+    assert metrics.counter('http.bytes') == 150
+    assert metrics.counter('missing') == 0
+    assert json.loads(metrics.to_json()) == summary
+
+
+def test_prometheus():
+    metrics = Metrics()
+    metrics.observe('parse', 0.5)
+    metrics.increment('cache.hit')
+    lines = metrics.to_prometheus().splitlines()
+    assert 'huji_scrape_stage_seconds{stage="parse",quantile="0.5"} 0.5' \
+        in lines
+    assert 'huji_scrape_stage_seconds_count{stage="parse"} 1' in lines
+    assert 'huji_scrape_events_total{event="cache.hit"} 1' in lines
+
+
+def test_progress_as_json_lines():
+    metrics = Metrics()
+    metrics.increment('cache.hit', 3)
+    metrics.increment('cache.miss')
+    stream = io.StringIO()
+    progress = ProgressReporter(2, metrics=metrics, stream=stream)
+    progress.update('67504')
+    progress.update('67101', ok=False)
+    first, second = [json.loads(line)
+                     for line in stream.getvalue().splitlines()]
+    assert (first['done'], first['total'], first['course_id']) \
+        == (1, 2, '67504')
+    assert first['cache_hit_ratio'] == 0.75
+    assert (second['done'], second['failed'], second['eta_sec']) \
+        == (2, 1, 0.0)
+
+
+def test_progress_on_a_terminal():
+    stream = TtyStream()
+    progress = ProgressReporter(2, metrics=Metrics(), stream=stream)
+    progress.update('67504')
+    progress.update('67101')
+    output = stream.getvalue()
+    assert output.startswith('\r[###############...............] 1/2')
+    assert output.endswith('\n') and output.count('\r') == 2
@@ -0,0 +1,87 @@
+import csv
+import json
+from datetime import date, time
+
+import pytest
+
+from course import Course
+from coursestore import CourseStore
+from outputsink import FLAT_COLUMNS, flatten_course, open_sink
+
+
+def write_all(path, courses, **options):
+    with open_sink(path, **options) as sink:
+        for course in courses:
+            sink.write(course)
+
+
+def test_jsonl(tmp_path, fixture_courses):
+    path = str(tmp_path / 'courses.jsonl')
+    write_all(path, fixture_courses.values())
+    with open(path, encoding='utf-8') as jsonl_file:
+        courses = [Course.from_record(json.loads(line))
+                   for line in jsonl_file]
+    assert [course.to_dict() for course in courses] \
+        == [course.to_dict() for course in fixture_courses.values()]
+
+
+def test_csv(tmp_path, fixture_courses):
+    path = str(tmp_path / 'courses.csv')
+    write_all(path, fixture_courses.values())
+    with open(path, encoding='utf-8-sig', newline='') as csv_file:
+        reader = csv.DictReader(csv_file)
+        rows = list(reader)
+    assert reader.fieldnames == FLAT_COLUMNS
+    assert [row['Course id'] for row in rows] == list(fixture_courses)
+    assert rows[2]['Course Lectures & Exercises Periods'] \
+        == flatten_course(fixture_courses['67504'])[
+            'Course Lectures & Exercises Periods']
+
+
+def test_flatten_course(fixture_courses):
+    flat = flatten_course(fixture_courses['67504'])
+    assert flat['Semester'] == 'קורס שנתי'
+    assert flat['Course Lectures & Exercises Periods'].split('\n') == [
+        "שיעור: יום א' 10:00-11:45", "שיעור: יום ג' 10:00-11:45",
+        "תרגיל: יום ה' 14:30-16:00", "מעבדה: יום ש' 00:00-00:00"]
+    assert flat['Final Exam Due Date'].startswith(
+        "סמסטר א' מועד א: 24/01/24\r\n")
+    assert flat['coordinator mail'] == 'ronit.cohen@mail.huji.ac.il'
+
+
+def test_parquet(tmp_path, fixture_courses):
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'courses.parquet')
+    write_all(path, fixture_courses.values(), row_group_size=2)
+    parquet_file = pq.ParquetFile(path)
+    assert parquet_file.metadata.num_row_groups == 2
+    rows = parquet_file.read().to_pylist()
+    assert [row['id'] for row in rows] == list(fixture_courses)
+    assert rows[2]['periods'][0] == {'type': 'שיעור', 'weekday': 1,
+                                     'start_time': time(10),
+                                     'end_time': time(11, 45)}
+    assert rows[2]['exam_dates'][0] == {'date': date(2024, 1, 24),
+                                        'semester': ['A'], 'moed': 'א'}
+    assert rows[1]['exam_dates'] is None
+
+
+def test_excel(tmp_path, fixture_courses):
+    pd = pytest.importorskip('pandas')
+    pytest.importorskip('openpyxl')
+    path = str(tmp_path / 'courses.xlsx')
+    write_all(path, fixture_courses.values())
+    table = pd.read_excel(path, dtype={'Course id': str})
+    assert list(table['Course id']) == list(fixture_courses)
+
+
+def test_sqlite(tmp_path, fixture_courses):
+    path = str(tmp_path / 'courses.sqlite')
+    write_all(path, fixture_courses.values(), year=2024, batch_size=2)
+    with CourseStore(path) as store:
+        assert store.get('67392', 2024).to_dict() \
+            == fixture_courses['67392'].to_dict()
+
+
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValueError, match='.txt'):
+        open_sink(str(tmp_path / 'courses.txt'))
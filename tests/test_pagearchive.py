@@ -0,0 +1,83 @@
+import os
+
+from metrics import Metrics
+from pagearchive import ArchivingTransport, PageArchive, reparse_archive
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'fixtures')
+URL = 'https://catalog.huji.ac.il/pages/wfrCourse.aspx?courseId={}'
+
+
+def test_newest_version_is_kept(tmp_path):
+    directory = str(tmp_path)
+    with PageArchive(directory) as archive:
+        assert archive.append('1', 2024, 'catalog', URL.format(1), b'v1')
+        assert not archive.append('1', 2024, 'catalog', URL.format(1), b'v1')
+        assert archive.append('1', 2024, 'catalog', URL.format(1), b'v2')
+        assert archive.append('1', 2023, 'catalog', URL.format(1), b'old')
+        assert archive.get('1', 2024, 'catalog') == b'v2'
+        assert archive.get('1', 2024, 'syllabus') is None
+        assert archive.stats()['pages'] == 2
+    with PageArchive(directory, writable=False) as archive:
+        header, content = archive.get_record('1', 2023, 'catalog')
+        assert (header['url'], content) == (URL.format(1), b'old')
+        assert len(list(archive.records())) == 3
+        assert archive.courses() == [('1', 2024), ('1', 2023)]
+        assert archive.courses(2023) == [('1', 2023)]
+
+
+def test_index_grows(tmp_path):
+    with PageArchive(str(tmp_path)) as archive:
+        for number in range(1500):
+            archive.append(number, 2024, 'catalog', URL.format(number),
+                           str(number).encode())
+        assert archive.stats()['pages'] == 1500
+        assert all(archive.get(number, 2024, 'catalog')
+                   == str(number).encode() for number in range(1500))
+
+
+def test_recovery_after_a_crash(tmp_path):
+    directory = str(tmp_path)
+    with PageArchive(directory) as archive:
+        for number in range(3):
+            archive.append(number, 2024, 'catalog', URL.format(number),
+                           b'page %d' % number)
+    # the index is lost and the last record is torn
+    os.remove(os.path.join(directory, 'pages.idx'))
+    with open(os.path.join(directory, 'pages.arc'), 'ab') as data_file:
+        data_file.write(b'HSREC {"course_id": "3"')
+    with PageArchive(directory) as archive:
+        assert [archive.get(number, 2024, 'catalog')
+                for number in range(4)] == [b'page 0', b'page 1', b'page 2',
+                                            None]
+        assert archive.append(3, 2024, 'catalog', URL.format(3), b'page 3')
+    with PageArchive(directory, writable=False) as archive:
+        assert [header['course_id'] for header in archive.records()] \
+            == ['0', '1', '2', '3']
+
+
+def test_archived_pages_reparse(tmp_path, fixture_courses, transport,
+                                standin_options):
+    directory = str(tmp_path)
+    metrics = Metrics()
+    with PageArchive(directory) as archive:
+        archiving = ArchivingTransport(transport, archive, metrics=metrics)
+        for course_id in fixture_courses:
+            for url in (standin_options['catalog_base_url']
+                        + '/pages/wfrCourse.aspx?year=2024&faculty=12'
+                        '&courseId=' + course_id,
+                        standin_options['syllabus_base_url']
+                        + '/index.php/NewSyl/{}/1/2024/'.format(course_id)):
+                archiving.fetch(url)
+        # not a course page, not archived
+        archiving.fetch(standin_options['catalog_base_url']
+                        + '/pages/wfrFaculties.aspx?year=2024')
+    assert metrics.counter('archive.records') == 6
+
+    courses = list(reparse_archive(directory, 2024, workers=1))
+    assert [course.get_id() for course in courses] == list(fixture_courses)
+    for course in courses:
+        assert course.to_tuple() \
+            == fixture_courses[course.get_id()].to_tuple()
+        assert course.other_data['catalog_url'].startswith(
+            standin_options['catalog_base_url'])
@@ -0,0 +1,96 @@
+import os
+from datetime import date, time
+from typing import Dict
+
+import pytest
+
+from course import Course
+from huji_he_coursescraper import HujiHebrewCourseScraper, PARSERS, \
+    is_catalog_element
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'fixtures')
+COURSE_IDS = ('67101', '67392', '67504')
+YEAR = 2024
+
+GETTERS = ('get_course_id', 'get_institute', 'get_name', 'get_department',
+           'get_credits', 'get_semesters', 'get_periods',
+           'get_teaching_languages', 'get_staff', 'get_description',
+           'get_attendance_requirements', 'get_exam_type', 'get_exam_dates',
+           'get_coordinator', 'get_coordinator_mail')
+
+
+def read_fixture(course_id: str, page: str) -> bytes:
+    with open(os.path.join(FIXTURES, '{}.{}.html'.format(course_id, page)),
+              'rb') as fixture:
+        return fixture.read()
+
+
+def fixture_scraper(course_id: str, parser: str = 'html5lib',
+                    partial: bool = False) -> HujiHebrewCourseScraper:
+    return HujiHebrewCourseScraper(
+        course_id, YEAR, parser=parser, partial=partial,
+        catalog_content=read_fixture(course_id, 'catalog'),
+        syllabus_content=read_fixture(course_id, 'syllabus'))
+
+
+def scraped(scraper: HujiHebrewCourseScraper) -> Dict:
+    course = Course()
+    scraper.update_course(course)
+    return course.to_dict()
+
+
+@pytest.mark.parametrize('course_id', COURSE_IDS)
+@pytest.mark.parametrize('partial', (True, False))
+@pytest.mark.parametrize('parser', PARSERS)
+def test_parsers_agree_with_html5lib(course_id, parser, partial):
+    # html5lib parses like a browser and was the scraper's original parser
+    assert scraped(fixture_scraper(course_id, parser, partial)) \
+        == scraped(fixture_scraper(course_id))
+
+
+@pytest.mark.parametrize('getter', GETTERS)
+def test_fixtures_cover_every_getter(getter):
+    values = [getattr(fixture_scraper(course_id, 'lxml'), getter)()
+              for course_id in COURSE_IDS]
+    assert any(value not in (None, [], '') for value in values)
+
+
+def test_scraped_values():
+    course = scraped(fixture_scraper('67504', 'lxml'))
+    assert course['Course name'] == 'מבני נתונים'
+    assert course['Course Credits Amount'] == 5
+    assert course['Semester [A, B, yearly or other]'] == ['yearly']
+    assert course['Attendance Requirements'] == 0.8
+    # the repeated period row is kept once, an unknown time is midnight
+    periods = course['Course Lectures & Exercises Periods']
+    assert len(periods) == 4
+    assert periods[-1] == {'type': 'מעבדה', 'weekday': 7,
+                           'start_time': time(), 'end_time': time()}
+    assert course['Final Exam Due Date'][0] \
+        == (date(2024, 1, 24), {'semester': ['A'], 'MOED': 'א'})
+    assert course['other_data']['coordinator mail'] \
+        == 'ronit.cohen@mail.huji.ac.il'
+
+    assert scraped(fixture_scraper('67101', 'lxml'))[
+        'Attendance Requirements'] == 0
+    assert fixture_scraper('67392', 'lxml').get_exam_dates() is None
+
+
+@pytest.mark.parametrize('parser', ('lxml', 'html.parser'))
+def test_partial_catalog_tree(parser):
+    scraper = fixture_scraper('67504', parser, partial=True)
+    page = scraper._get_huji_he_course_catalog_page('67504', YEAR)
+    # only the elements the getters read, the rest of the form left out
+    assert page.find('input') is None and page.find('form') is None
+    assert all(is_catalog_element(tag.attrs)
+               for tag in page.find_all(recursive=False))
+    assert page.find('span', id='lblCourseName').text == 'מבני נתונים'
+
+
+def test_is_catalog_element():
+    assert is_catalog_element({'id': 'grdBhinot'})
+    assert is_catalog_element({'class': ['header', 'toarTitle']})
+    assert is_catalog_element({'class': 'toarTitle'})
+    assert not is_catalog_element({'id': '__VIEWSTATE'})
+    assert not is_catalog_element({})
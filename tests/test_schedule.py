@@ -0,0 +1,84 @@
+import random
+from datetime import time
+
+import numpy as np
+import pytest
+
+import schedule
+from course import Course
+from schedule import SLOT_MINUTES, conflict_free_schedules, \
+    conflict_matrix, conflicting_pairs, overlap_matrix, semester_codes, \
+    week_mask
+
+
+def make_course(course_id: str, weekday: int, start: time, end: time,
+                semesters=('A',)) -> Course:
+    course = Course()
+    course.set_id(course_id)
+    course.set_semesters(list(semesters))
+    course.set_periods([{'type': 'שיעור', 'weekday': weekday,
+                         'start_time': start, 'end_time': end}])
+    return course
+
+
+@pytest.fixture
+def courses():
+    return [make_course('1', 1, time(10), time(12)),
+            # clashes with 1 for half an hour
+            make_course('2', 1, time(11, 30), time(13)),
+            make_course('3', 2, time(10), time(12)),
+            # same slot as 1, but in the other semester
+            make_course('4', 1, time(10), time(12), semesters=('B',))]
+
+
+def ids(schedules):
+    return sorted(tuple(course.get_id() for course in schedule)
+                  for schedule in schedules)
+
+
+def test_conflicting_pairs(courses):
+    assert conflicting_pairs(courses) == [('1', '2', 30)]
+    assert ('1', '4', 120) in conflicting_pairs(courses, by_semester=False)
+
+
+
+def test_overlaps_computed_in_blocks(monkeypatch):
+    rng = random.Random(0)
+    courses = [make_course(str(number), rng.randint(1, 3),
+                           time(rng.randint(8, 15)),
+                           time(rng.randint(16, 18)),
+                           semesters=rng.choice([('A',), ('B',),
+                                                 ('yearly',)]))
+               for number in range(50)]
+    masks = [week_mask(course) for course in courses]
+    codes = semester_codes(courses)
+    expected = np.array([[bin(masks[i] & masks[j]).count('1') * SLOT_MINUTES
+                          if i != j and codes[i] & codes[j] else 0
+                          for j in range(len(courses))]
+                         for i in range(len(courses))])
+    # blocks of 3 rows, the last one shorter
+    monkeypatch.setattr(schedule, 'CLASH_BLOCK_CELLS', 3 * len(courses))
+    assert (overlap_matrix(courses) == expected).all()
+    assert (conflict_matrix(courses) == (expected > 0)).all()
+    assert conflicting_pairs(courses) \
+        == [(str(i), str(j), int(expected[i, j]))
+            for i, j in zip(*np.nonzero(np.triu(expected)))]
+
+def test_schedules(courses):
+    assert ids(conflict_free_schedules(courses, min_courses=3)) \
+        == [('1', '3', '4'), ('2', '3', '4')]
+    assert ids(conflict_free_schedules(courses, required=['2'],
+                                       max_courses=2)) \
+        == [('2',), ('2', '3'), ('2', '4')]
+    assert ids(conflict_free_schedules(courses, required=['1', '2'])) == []
+    assert len(list(conflict_free_schedules(courses, limit=3))) == 3
+
+
+def test_required_course_given_twice(courses):
+    assert ids(conflict_free_schedules(courses, required=['1', 1],
+                                       min_courses=3)) == [('1', '3', '4')]
+
+
+def test_unknown_required_course(courses):
+    with pytest.raises(ValueError, match='9, 8'):
+        list(conflict_free_schedules(courses, required=['9', '1', '8']))
@@ -0,0 +1,59 @@
+import os
+
+import pytest
+import requests
+
+from benchmark import load_test
+from huji_he_coursescraper import HujiHebrewCourseScraper
+from standinserver import StandInServer
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'fixtures')
+CATALOG_URL = '/pages/wfrCourse.aspx?year=2024&faculty=12&courseId={}'
+SYLLABUS_URL = '/index.php/NewSyl/{}/1/2024/'
+
+
+def test_recorded_and_synthesized_pages(standin):
+    with open(os.path.join(FIXTURES, '67504.syllabus.html'),
+              'rb') as page_file:
+        recorded = page_file.read()
+    response = requests.get(standin.base_url + SYLLABUS_URL.format(67504))
+    assert response.headers['Content-Type'] \
+        == 'text/html; charset=windows-1255'
+    assert response.content == recorded
+
+    url = standin.base_url + CATALOG_URL.format(12345)
+    first = requests.get(url)
+    assert first.status_code == 200
+    # the same page every time, unchanged since its etag
+    assert requests.get(url).content == first.content
+    assert requests.get(url, headers={
+        'If-None-Match': first.headers['ETag']}).status_code == 304
+    assert requests.get(standin.base_url + '/elsewhere').status_code == 404
+
+
+def test_synthesized_pages_scrape(standin_options, transport):
+    scraper = HujiHebrewCourseScraper('12345', 2024, transport=transport,
+                                      **standin_options)
+    assert scraper.get_name() == 'קורס 12345'
+    assert 1 <= scraper.get_credits() <= 6
+    assert len(scraper.get_exam_dates()) == 2
+    assert scraper.get_staff().startswith('ד"ר מרצה')
+    assert scraper.get_attendance_requirements() in (0, 0.8, 1.0)
+
+
+@pytest.mark.parametrize('options, status', [
+    ({'throttle_rate': 1.0}, 429), ({'error_rate': 1.0}, 503)])
+def test_failures(options, status):
+    server = StandInServer(seed=0, **options).start()
+    try:
+        response = requests.get(server.base_url + CATALOG_URL.format(1))
+    finally:
+        server.stop()
+    assert response.status_code == status
+
+
+def test_load_test():
+    results = load_test(6, 2024, concurrency=3, latency=0.0)
+    assert results['courses'] == 6
+    assert results['metrics']['counters']['http.status.200'] == 12
@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from metrics import Metrics
+from transport import AdaptiveLimiter, HostLimiter, HttpStatusError, \
+    HttpTransport, retry_after_seconds
+
+
+class PagesHandler(BaseHTTPRequestHandler):
+    """serves /ok and /missing, answers /flaky/<n>/<name> with 503 its
+    first n times and redirects every other path back to itself"""
+
+    requests_seen = Counter()
+
+    def do_GET(self):
+        self.requests_seen[self.path] += 1
+        if self.path.startswith('/flaky/'):
+            failures = int(self.path.split('/')[2])
+            ok = self.requests_seen[self.path] > failures
+            self.send_response(200 if ok else 503)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif self.path == '/missing':
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif self.path == '/ok':
+            self.send_response(200)
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'ok')
+        else:
+            self.send_response(302)
+            self.send_header('Location', self.path)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    PagesHandler.requests_seen.clear()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PagesHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield 'http://127.0.0.1:{}'.format(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+def test_failed_requests_give_back_their_slot(base_url):
+    limiter = AdaptiveLimiter(max_per_host=1, initial_concurrency=1,
+                              initial_rate=100, metrics=Metrics())
+    transport = HttpTransport(retries=0, limiter=limiter, metrics=Metrics())
+    errors, results = [], []
+
+    def scrape():
+        for _ in range(3):
+            try:
+                transport.get(base_url + '/loop')
+            except requests.TooManyRedirects as error:
+                errors.append(error)
+        results.append(transport.get(base_url + '/ok'))
+
+    # with a leaked slot the second request blocks forever
+    thread = threading.Thread(target=scrape, daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+    assert len(errors) == 3
+    assert results and results[0].status_code == 200
+    transport.close()
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds('3') == 3.0
+    assert retry_after_seconds(None) is None
+    assert retry_after_seconds('soon') is None
+    assert 55 < retry_after_seconds(formatdate(time.time() + 60,
+                                               usegmt=True)) <= 60
+
+
+def test_transient_failures_are_retried(base_url):
+    metrics = Metrics()
+    transport = HttpTransport(retries=3, backoff=0.01, metrics=metrics,
+                              limiter=HostLimiter(4))
+    result = transport.fetch(base_url + '/flaky/2/retried')
+    assert result.status == 200
+    assert metrics.counter('http.retries') == 2
+    assert metrics.counter('http.status.503') == 2
+
+    # out of retries, the error status raises
+    with pytest.raises(HttpStatusError) as error:
+        transport.fetch(base_url + '/flaky/5/given-up')
+    assert error.value.status == 503
+    assert PagesHandler.requests_seen['/flaky/5/given-up'] == 4
+    # an error that won't go away isn't retried
+    with pytest.raises(HttpStatusError) as error:
+        transport.fetch(base_url + '/missing')
+    assert error.value.status == 404
+    assert PagesHandler.requests_seen['/missing'] == 1
+    transport.close()
+
+
+def test_connections_are_reused(base_url):
+    transport = HttpTransport(metrics=Metrics(), limiter=HostLimiter(1))
+    for _ in range(5):
+        transport.get(base_url + '/ok')
+    assert transport.connection_stats() \
+        == {'requests': 5, 'connections': 1, 'reused': 4}
+    transport.close()
+
+
+def limits_after(limiter, url, statuses, latency=0.01):
+    for status in statuses:
+        limiter.acquire(url)
+        limiter.release(url, status, latency)
+    return limiter.limits()['host']
+
+
+def test_limits_grow_until_the_host_pushes_back():
+    limiter = AdaptiveLimiter(max_per_host=8, initial_concurrency=2,
+                              initial_rate=40, metrics=Metrics())
+    url = 'http://host/page'
+    # slow start: both limits double every round of requests
+    assert limits_after(limiter, url, [200] * 3) \
+        == {'concurrency': 5, 'rate': pytest.approx(100)}
+    limiter = AdaptiveLimiter(max_per_host=8, initial_concurrency=4,
+                              initial_rate=100, rate_step=1,
+                              metrics=Metrics())
+    # a 429 halves both limits, once for the requests of a round trip
+    assert limits_after(limiter, url, [429, 503], latency=1.0) \
+        == {'concurrency': 2, 'rate': 50}
+    # then they grow additively
+    assert limits_after(limiter, url, [200, 200]) \
+        == {'concurrency': pytest.approx(2 + 1 / 2 + 1 / 2.5),
+            'rate': 52}
+    # a failed request counts as pushing back
+    time.sleep(0.02)
+    assert limits_after(limiter, url, [None])['concurrency'] \
+        == pytest.approx((2 + 1 / 2 + 1 / 2.5) / 2)
+
+
+def test_concurrency_limit_holds_requests_back():
+    limiter = AdaptiveLimiter(max_per_host=1, initial_concurrency=1,
+                              initial_rate=1000, metrics=Metrics())
+    url = 'http://host/page'
+    limiter.acquire(url)
+    acquired = threading.Event()
+    waiter = threading.Thread(target=lambda: (limiter.acquire(url),
+                                              acquired.set()))
+    waiter.start()
+    assert not acquired.wait(0.1)
+    limiter.release(url, 200, 0.01)
+    assert acquired.wait(5)
+    waiter.join()
+
+
+def test_retry_after_holds_back_the_host():
+    limiter = AdaptiveLimiter(initial_rate=1000, metrics=Metrics())
+    limiter.acquire('http://host/a')
+    limiter.release('http://host/a', 429, 0.01, retry_after=0.3)
+    start = time.monotonic()
+    limiter.acquire('http://host/b')
+    assert time.monotonic() - start >= 0.25
+    # other hosts aren't held back
+    start = time.monotonic()
+    limiter.acquire('http://other/a')
+    assert time.monotonic() - start < 0.2
@@ -0,0 +1,113 @@
+import os
+import time
+
+import pytest
+
+from course import Course
+from workqueue import DONE, FAILED, LEASED, PENDING, WorkQueue, run_worker
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'fixtures')
+LEASE = 0.05
+
+
+@pytest.fixture
+def queue_path(tmp_path):
+    return str(tmp_path / 'queue.sqlite')
+
+
+def make_course(course_id: str) -> Course:
+    course = Course()
+    course.set_id(course_id)
+    course.set_course_name('course ' + course_id)
+    return course
+
+
+def test_add_skips_queued_courses(queue_path):
+    with WorkQueue(queue_path) as queue:
+        assert queue.add(['1', '2', '1'], 2024) == 2
+        assert queue.add([2, 3], 2024, faculties={'3': 8}) == 1
+        assert queue.claim('a', 5) == [('1', 2024, None), ('2', 2024, None),
+                                       ('3', 2024, 8)]
+
+
+def test_expired_lease_is_reclaimed(queue_path):
+    with WorkQueue(queue_path, lease_seconds=LEASE) as queue:
+        queue.add(['1'], 2024)
+        assert queue.claim('a') == [('1', 2024, None)]
+        # held by a, until its lease runs out
+        assert queue.claim('b') == []
+        assert queue.heartbeat('a', [('1', 2024)]) == []
+        time.sleep(2 * LEASE)
+        assert queue.claim('b') == [('1', 2024, None)]
+        assert queue.heartbeat('a', [('1', 2024)]) == [('1', 2024)]
+        assert queue.counts()[LEASED] == 1
+
+
+def test_task_fails_after_max_attempts(queue_path):
+    with WorkQueue(queue_path, lease_seconds=LEASE,
+                   max_attempts=2) as queue:
+        queue.add(['1', '2'], 2024)
+        # 1's workers die, 2's worker gives up on it twice
+        assert len(queue.claim('a', 2)) == 2
+        queue.fail('a', '2', 2024, 'timeout')
+        time.sleep(2 * LEASE)
+        assert len(queue.claim('b', 2)) == 2
+        queue.fail('b', '2', 2024, 'timeout again')
+        time.sleep(2 * LEASE)
+        assert queue.claim('c', 2) == []
+        assert queue.unfinished() == 0
+        assert queue.counts() == {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 2}
+        assert queue.failures() == [('1', 2024, 'lease expired'),
+                                    ('2', 2024, 'timeout again')]
+
+        assert queue.retry_failed() == 2
+        assert [task[0] for task in queue.claim('d', 2)] == ['1', '2']
+
+
+def test_complete_is_idempotent(queue_path):
+    with WorkQueue(queue_path, lease_seconds=LEASE) as queue:
+        queue.add(['1'], 2024)
+        queue.claim('a')
+        time.sleep(2 * LEASE)
+        queue.claim('b')
+        # both workers finish the course, the first result is kept
+        assert queue.complete('b', '1', 2024, make_course('1'))
+        assert not queue.complete('a', '1', 2024, make_course('other'))
+        queue.fail('a', '1', 2024, 'late failure')
+        assert queue.counts()[DONE] == 1
+        assert [course.get_course_name() for course in queue.results(2024)] \
+            == ['course 1']
+
+
+def test_run_worker(queue_path):
+    with open(os.path.join(FIXTURES, '67504.catalog.html'), 'rb') as page:
+        catalog_content = page.read()
+    with open(os.path.join(FIXTURES, '67504.syllabus.html'), 'rb') as page:
+        syllabus_content = page.read()
+    with WorkQueue(queue_path) as queue:
+        queue.add(['67504'], 2024)
+    counts = run_worker(queue_path, 'w', concurrency=2, poll_interval=0.01,
+                        scraper_options={
+                            'catalog_content': catalog_content,
+                            'syllabus_content': syllabus_content})
+    assert counts == {'completed': 1, 'failed': 0}
+    with WorkQueue(queue_path) as queue:
+        course, = queue.results()
+    assert course.get_course_name() == 'מבני נתונים'
+
+
+def test_server_errors_fail_the_task(queue_path, standin, standin_options,
+                                     transport):
+    standin.error_rate = 1.0
+    with WorkQueue(queue_path) as queue:
+        queue.add(['67101', '67504'], 2024)
+    counts = run_worker(queue_path, 'w', concurrency=2, max_attempts=2,
+                        transport=transport, poll_interval=0.01,
+                        scraper_options=standin_options)
+    # every task was tried max_attempts times, none completed
+    assert counts == {'completed': 0, 'failed': 4}
+    with WorkQueue(queue_path) as queue:
+        assert queue.counts()[FAILED] == 2
+        assert all('HttpStatusError' in error
+                   for _, _, error in queue.failures())
@@ -0,0 +1,335 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+from threading import BoundedSemaphore, Condition, Lock
+from typing import Dict, Tuple
+from urllib.parse import urlsplit
+
+from metrics import Metrics, default_metrics
+
+# responses worth another try, anything else is returned as is
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+# responses telling the client to slow down
+THROTTLE_STATUS_CODES = {429, 503}
+
+
+def retry_after_seconds(value: str|None) -> float|None:
+    """return the delay of a Retry-After header (seconds or http date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp()
+                   - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HttpStatusError(IOError):
+    """raised when a page still answers with an error status after the
+    transport's retries"""
+
+    def __init__(self, url: str, status: int):
+        super().__init__('{} answered {}'.format(url, status))
+        self.url = url
+        self.status = status
+
+
+class HostLimiter:
+    """limit the number of concurrent requests sent to each host"""
+
+    def __init__(self, max_per_host: int):
+        self.__max_per_host = max_per_host
+        self.__slots: Dict[str, BoundedSemaphore] = {}
+        self.__lock = Lock()
+
+    def slot(self, url: str) -> BoundedSemaphore:
+        """return the semaphore guarding the url's host"""
+        host = urlsplit(url).netloc
+        with self.__lock:
+            if host not in self.__slots:
+                self.__slots[host] = BoundedSemaphore(self.__max_per_host)
+            return self.__slots[host]
+
+    def acquire(self, url: str) -> None:
+        """wait until a request may be sent to the url's host"""
+        self.slot(url).acquire()
+
+    def release(self, url: str, status: int|None, latency: float,
+                retry_after: float|None = None) -> None:
+        """end a request started with acquire; status is None for a
+        request that failed without a response"""
+        self.slot(url).release()
+
+    def limits(self) -> Dict[str, Dict[str, float]]:
+        """return the current {host: {'concurrency': ...}} limits"""
+        with self.__lock:
+            return {host: {'concurrency': self.__max_per_host}
+                    for host in self.__slots}
+
+
+class _HostState:
+    """limits and token bucket of a single host, see AdaptiveLimiter"""
+
+    def __init__(self, concurrency: float, rate: float):
+        self.condition = Condition()
+        self.concurrency = concurrency
+        self.rate = rate
+        self.tokens = 1.0
+        self.refilled_at = time.monotonic()
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.decreased_at = 0.0
+        self.base_latency: float|None = None
+        self.latency: float|None = None
+        self.slow_start = True
+
+
+class AdaptiveLimiter(HostLimiter):
+    """per-host token bucket and concurrency limit, adjusted by AIMD.
+
+    Both limits start low and double every round of requests until the
+    host first pushes back (slow start). From then on, every successful
+    response raises a host's concurrency limit by about
+    one per round of requests and its request rate by rate_step
+    requests/sec (additive increase). A 429/503 response, a
+    failed request, or a smoothed latency above latency_factor times the
+    host's best one cuts both by decrease_factor (multiplicative decrease),
+    at most once per round trip. A Retry-After header holds back every
+    request to the host until it passes."""
+
+    def __init__(self, max_per_host: int = 16, initial_concurrency: int = 2,
+                 min_rate: float = 0.5, initial_rate: float = 10.0,
+                 max_rate: float = 200.0, rate_step: float = 1.0,
+                 decrease_factor: float = 0.5, latency_factor: float = 3.0,
+                 metrics: Metrics|None = None):
+        super().__init__(max_per_host)
+        self.__max_concurrency = max_per_host
+        self.__initial_concurrency = min(initial_concurrency, max_per_host)
+        self.__min_rate = min_rate
+        self.__initial_rate = initial_rate
+        self.__max_rate = max_rate
+        self.__rate_step = rate_step
+        self.__decrease_factor = decrease_factor
+        self.__latency_factor = latency_factor
+        self.__metrics = metrics if metrics is not None else default_metrics
+        self.__hosts: Dict[str, _HostState] = {}
+        self.__lock = Lock()
+
+    def _state(self, url: str) -> Tuple[str, _HostState]:
+        host = urlsplit(url).netloc
+        with self.__lock:
+            if host not in self.__hosts:
+                self.__hosts[host] = _HostState(self.__initial_concurrency,
+                                                self.__initial_rate)
+            return host, self.__hosts[host]
+
+    def acquire(self, url: str) -> None:
+        _, state = self._state(url)
+        with state.condition:
+            while True:
+                now = time.monotonic()
+                state.tokens = min(1.0, state.tokens + (now - state.refilled_at)
+                                   * state.rate)
+                state.refilled_at = now
+                if now < state.blocked_until:
+                    wait = state.blocked_until - now
+                elif state.in_flight >= int(state.concurrency):
+                    wait = None
+                elif state.tokens < 1.0:
+                    wait = (1.0 - state.tokens) / state.rate
+                else:
+                    state.tokens -= 1.0
+                    state.in_flight += 1
+                    return
+                state.condition.wait(wait)
+
+    def release(self, url: str, status: int|None, latency: float,
+                retry_after: float|None = None) -> None:
+        host, state = self._state(url)
+        with state.condition:
+            state.in_flight -= 1
+            now = time.monotonic()
+            if retry_after is not None:
+                state.blocked_until = max(state.blocked_until,
+                                          now + retry_after)
+            if status is not None and status not in THROTTLE_STATUS_CODES:
+                # smoothed latency, and the best it has been
+                state.latency = latency if state.latency is None \
+                    else 0.9 * state.latency + 0.1 * latency
+                state.base_latency = state.latency \
+                    if state.base_latency is None \
+                    else min(state.base_latency, state.latency)
+            slow = state.latency is not None \
+                and state.latency > self.__latency_factor \
+                * max(state.base_latency, 0.001)
+            if status is None or status in THROTTLE_STATUS_CODES or slow:
+                # one decrease per round trip, for the requests sent together
+                if now - state.decreased_at > (state.latency or latency):
+                    state.decreased_at = now
+                    state.slow_start = False
+                    state.concurrency = max(
+                        1.0, state.concurrency * self.__decrease_factor)
+                    state.rate = max(self.__min_rate,
+                                     state.rate * self.__decrease_factor)
+            elif state.slow_start:
+                # double both limits every round until the first decrease
+                state.rate = min(self.__max_rate,
+                                 state.rate + state.rate / state.concurrency)
+                state.concurrency = min(self.__max_concurrency,
+                                        state.concurrency + 1)
+            else:
+                state.concurrency = min(
+                    self.__max_concurrency,
+                    state.concurrency + 1 / state.concurrency)
+                state.rate = min(self.__max_rate,
+                                 state.rate + self.__rate_step)
+            state.condition.notify_all()
+            concurrency, rate = state.concurrency, state.rate
+        self.__metrics.set_gauge('ratelimit.{}.concurrency'.format(host),
+                                 concurrency)
+        self.__metrics.set_gauge('ratelimit.{}.rate'.format(host), rate)
+
+    def limits(self) -> Dict[str, Dict[str, float]]:
+        with self.__lock:
+            states = dict(self.__hosts)
+        return {host: {'concurrency': state.concurrency, 'rate': state.rate}
+                for host, state in states.items()}
+
+
+class FetchResult:
+    """a fetched page: status, headers and raw body"""
+
+    def __init__(self, url: str, status: int, content: bytes,
+                 headers: Dict[str, str], elapsed: float = 0.0,
+                 from_cache: bool = False):
+        self.url = url
+        self.status = status
+        self.content = content
+        self.headers = headers                  # case insensitive mapping
+        self.elapsed = elapsed                  # seconds, including retries
+        self.from_cache = from_cache
+
+
+class HttpTransport:
+    """keep-alive HTTP client shared between scrapers.
+
+    Holds one connection pool per host, limits the requests to each host
+    and retries timeouts, connection errors and 5xx/429 responses with
+    exponential backoff and full jitter, waiting at least as long as a
+    Retry-After header asks. By default the limits adapt to how each host
+    responds (see AdaptiveLimiter), up to max_per_host concurrent
+    requests; pass HostLimiter(max_per_host) for a fixed limit."""
+
+    def __init__(self, timeout: float|Tuple[float, float] = (5, 30),
+                 retries: int = 3, backoff: float = 0.5,
+                 max_backoff: float = 30, max_per_host: int = 16,
+                 metrics: Metrics|None = None,
+                 limiter: HostLimiter|None = None):
+        self.__timeout = timeout
+        self.__metrics = metrics if metrics is not None else default_metrics
+        self.__retries = retries
+        self.__backoff = backoff
+        self.__max_backoff = max_backoff
+        self.__host_limiter = limiter if limiter is not None \
+            else AdaptiveLimiter(max_per_host, metrics=self.__metrics)
+        # imported here, importing this module shouldn't load requests
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.__session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max_per_host)
+        self.__session.mount('http://', adapter)
+        self.__session.mount('https://', adapter)
+
+    def get(self, url: str, headers: Dict|None = None) -> 'requests.Response':
+        """GET url, retrying transient failures"""
+        import requests
+
+        host = urlsplit(url).netloc
+        attempt = 0
+        while True:
+            response, retry_after = None, None
+            self.__host_limiter.acquire(url)
+            start = time.perf_counter()
+            try:
+                response = self.__session.get(url, headers=headers,
+                                              timeout=self.__timeout)
+                if response.status_code in THROTTLE_STATUS_CODES:
+                    retry_after = retry_after_seconds(
+                        response.headers.get('Retry-After'))
+            except (requests.ConnectionError, requests.Timeout):
+                self.__metrics.increment('http.errors')
+                if attempt >= self.__retries:
+                    raise
+            finally:
+                # the slot is given back however the request ended, one
+                # that raised counting as a failure without a response
+                latency = time.perf_counter() - start
+                self.__host_limiter.release(
+                    url, response.status_code if response is not None
+                    else None, latency, retry_after)
+            if response is not None:
+                self.__metrics.observe('http.' + host, latency)
+                self.__metrics.increment(
+                    'http.status.{}'.format(response.status_code))
+                if response.status_code not in RETRY_STATUS_CODES \
+                        or attempt >= self.__retries:
+                    return response
+            self.__metrics.increment('http.retries')
+            time.sleep(max(self._backoff_delay(attempt),
+                           min(retry_after or 0, self.__max_backoff)))
+            attempt += 1
+
+    def fetch(self, url: str, headers: Dict|None = None) -> FetchResult:
+        """GET url and return its body as a FetchResult. An error status
+        (4xx/5xx) left after the retries raises HttpStatusError"""
+        start = time.perf_counter()
+        response = self.get(url, headers=headers)
+        self.__metrics.increment('http.bytes', len(response.content))
+        if response.status_code >= 400:
+            raise HttpStatusError(url, response.status_code)
+        return FetchResult(url, response.status_code, response.content,
+                           response.headers,
+                           time.perf_counter() - start)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        cap = min(self.__max_backoff, self.__backoff * 2 ** attempt)
+        return random.uniform(0, cap)
+
+    def limits(self) -> Dict[str, Dict[str, float]]:
+        """return the current request limits of each host"""
+        return self.__host_limiter.limits()
+
+    def connection_stats(self) -> Dict[str, int]:
+        """return the amount of requests sent, connections opened and
+        connections reused, summed over all hosts"""
+        stats = {'requests': 0, 'connections': 0, 'reused': 0}
+        for adapter in set(self.__session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                stats['requests'] += pool.num_requests
+                stats['connections'] += pool.num_connections
+        stats['reused'] = stats['requests'] - stats['connections']
+        return stats
+
+    def close(self) -> None:
+        self.__session.close()
+
+
+__default_transport: HttpTransport|None = None
+__default_transport_lock = Lock()
+
+
+def get_default_transport() -> HttpTransport:
+    """return the transport shared by all scrapers that weren't given one"""
+    global __default_transport
+    with __default_transport_lock:
+        if __default_transport is None:
+            __default_transport = HttpTransport()
+        return __default_transport
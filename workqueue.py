@@ -0,0 +1,285 @@
+import json
+import os
+import socket
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, \
+    wait
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from course import Course
+from metrics import Metrics, default_metrics
+from transport import HttpTransport
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS tasks (
+    course_id TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    faculty INTEGER,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    result TEXT,
+    updated_at REAL,
+    PRIMARY KEY (course_id, year));
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_expires);
+'''
+
+# a task is one of
+PENDING, LEASED, DONE, FAILED = 'pending', 'leased', 'done', 'failed'
+
+
+def default_worker_id() -> str:
+    """return an id naming this process on this machine"""
+    return '{}:{}'.format(socket.gethostname(), os.getpid())
+
+
+class WorkQueue:
+    """sqlite queue of (course id, year) scraping tasks shared by worker
+    processes, on one machine or on several through a shared filesystem
+    (with working file locks; pass wal=False on a network filesystem).
+
+    A worker claims tasks with a lease of lease_seconds and renews it with
+    heartbeat while it works on them. A task whose lease ran out, its
+    worker having died, is claimed again by another worker, up to
+    max_attempts claims in all. The scraped course of each done task is
+    kept in the queue, so every worker's results merge into one output."""
+
+    def __init__(self, path: str, lease_seconds: float = 60,
+                 max_attempts: int = 3, wal: bool = True):
+        self.__lease_seconds = lease_seconds
+        self.__max_attempts = max_attempts
+        # transactions are explicit, a claim locks the database right away
+        self.__db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        if wal:
+            self.__db.execute('PRAGMA journal_mode=WAL')
+        self.__db.executescript(SCHEMA)
+
+    def add(self, course_ids: Iterable, year: int,
+            faculties: Dict[str, int]|None = None) -> int:
+        """queue the given courses of year (with the faculty of each, if
+        known), skipping courses already queued. Return how many were
+        added"""
+        faculties = faculties or {}
+        rows = [(str(course_id), year, faculties.get(str(course_id)))
+                for course_id in course_ids]
+        self.__db.execute('BEGIN IMMEDIATE')
+        try:
+            before = self.__db.total_changes
+            self.__db.executemany(
+                'INSERT OR IGNORE INTO tasks (course_id, year, faculty) '
+                'VALUES (?, ?, ?)', rows)
+            added = self.__db.total_changes - before
+            self.__db.execute('COMMIT')
+        except BaseException:
+            self.__db.execute('ROLLBACK')
+            raise
+        return added
+
+    def claim(self, worker_id: str, count: int = 1) \
+            -> List[Tuple[str, int, int|None]]:
+        """lease up to count tasks (pending ones, or ones whose lease ran
+        out) to worker_id and return their (course id, year, faculty),
+        oldest first"""
+        now = time.time()
+        self.__db.execute('BEGIN IMMEDIATE')
+        try:
+            # leases run out on their last allowed attempt fail for good
+            self.__db.execute(
+                'UPDATE tasks SET status = ?, error = ?, updated_at = ? '
+                'WHERE status = ? AND lease_expires < ? AND attempts >= ?',
+                (FAILED, 'lease expired', now, LEASED, now,
+                 self.__max_attempts))
+            rows = self.__db.execute(
+                'SELECT rowid, course_id, year, faculty FROM tasks '
+                'WHERE status = ? OR (status = ? AND lease_expires < ?) '
+                'ORDER BY rowid LIMIT ?',
+                (PENDING, LEASED, now, count)).fetchall()
+            self.__db.executemany(
+                'UPDATE tasks SET status = ?, worker = ?, lease_expires = ?, '
+                'attempts = attempts + 1, updated_at = ? WHERE rowid = ?',
+                [(LEASED, worker_id, now + self.__lease_seconds, now, row[0])
+                 for row in rows])
+            self.__db.execute('COMMIT')
+        except BaseException:
+            self.__db.execute('ROLLBACK')
+            raise
+        return [row[1:] for row in rows]
+
+    def heartbeat(self, worker_id: str,
+                  tasks: Iterable[Tuple[str, int]]) -> List[Tuple[str, int]]:
+        """renew the leases worker_id holds on the given (course id, year)
+        tasks. Return the tasks it no longer holds"""
+        tasks = [(str(course_id), year) for course_id, year in tasks]
+        now = time.time()
+        lost = []
+        self.__db.execute('BEGIN IMMEDIATE')
+        try:
+            for course_id, year in tasks:
+                cursor = self.__db.execute(
+                    'UPDATE tasks SET lease_expires = ?, updated_at = ? '
+                    'WHERE course_id = ? AND year = ? AND status = ? '
+                    'AND worker = ?',
+                    (now + self.__lease_seconds, now, course_id, year,
+                     LEASED, worker_id))
+                if cursor.rowcount == 0:
+                    lost.append((course_id, year))
+            self.__db.execute('COMMIT')
+        except BaseException:
+            self.__db.execute('ROLLBACK')
+            raise
+        return lost
+
+    def complete(self, worker_id: str, course_id, year: int,
+                 course: Course) -> bool:
+        """store the scraped course of a task and mark it done. A task
+        done already (by a worker its lease was handed over to) is left as
+        is. Return True if the result was stored"""
+        cursor = self.__db.execute(
+            'UPDATE tasks SET status = ?, worker = ?, lease_expires = NULL, '
+            'error = NULL, result = ?, updated_at = ? '
+            'WHERE course_id = ? AND year = ? AND status != ?',
+            (DONE, worker_id,
+             json.dumps(course.to_record(), ensure_ascii=False),
+             time.time(), str(course_id), year, DONE))
+        return cursor.rowcount > 0
+
+    def fail(self, worker_id: str, course_id, year: int, error: str) -> None:
+        """give back a task worker_id couldn't do, to be claimed again
+        unless it ran out of attempts"""
+        self.__db.execute(
+            'UPDATE tasks SET status = CASE WHEN attempts >= ? THEN ? '
+            'ELSE ? END, lease_expires = NULL, error = ?, updated_at = ? '
+            'WHERE course_id = ? AND year = ? AND status = ? AND worker = ?',
+            (self.__max_attempts, FAILED, PENDING, error, time.time(),
+             str(course_id), year, LEASED, worker_id))
+
+    def retry_failed(self) -> int:
+        """queue the failed tasks again, with new attempts. Return their
+        number"""
+        return self.__db.execute(
+            'UPDATE tasks SET status = ?, attempts = 0, updated_at = ? '
+            'WHERE status = ?', (PENDING, time.time(), FAILED)).rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """return the number of tasks of each status"""
+        counts = dict.fromkeys((PENDING, LEASED, DONE, FAILED), 0)
+        counts.update(self.__db.execute(
+            'SELECT status, COUNT(*) FROM tasks GROUP BY status'))
+        return counts
+
+    def unfinished(self) -> int:
+        """return the number of tasks pending or leased"""
+        return self.__db.execute(
+            'SELECT COUNT(*) FROM tasks WHERE status IN (?, ?)',
+            (PENDING, LEASED)).fetchone()[0]
+
+    def failures(self) -> List[Tuple[str, int, str]]:
+        """return the (course id, year, last error) of the failed tasks"""
+        return self.__db.execute(
+            'SELECT course_id, year, error FROM tasks WHERE status = ? '
+            'ORDER BY rowid', (FAILED,)).fetchall()
+
+    def results(self, year: int|None = None) -> Iterator[Course]:
+        """yield the scraped course of every done task (of year), in the
+        order the tasks were added"""
+        for record, in self.__db.execute(
+                'SELECT result FROM tasks WHERE status = ? '
+                'AND (? IS NULL OR year = ?) ORDER BY rowid',
+                (DONE, year, year)):
+            yield Course.from_record(json.loads(record))
+
+    def close(self) -> None:
+        self.__db.close()
+
+    def __enter__(self) -> 'WorkQueue':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def run_worker(queue_path: str, worker_id: str|None = None,
+               concurrency: int = 8, lease_seconds: float = 60,
+               max_attempts: int = 3,
+               transport: HttpTransport|None = None, parser: str = 'lxml',
+               scraper_options: Dict|None = None,
+               poll_interval: float = 1.0,
+               metrics: Metrics|None = None) -> Dict[str, int]:
+    """work on the tasks of a WorkQueue until none is left unfinished and
+    return the number of tasks this worker completed and of its attempts
+    that failed.
+
+    Up to concurrency courses are scraped at once, with tasks claimed as
+    others finish. A course that raises, e.g. HttpStatusError for a page
+    the server kept failing, is given back with WorkQueue.fail. The main
+    thread renews the leases of the tasks in progress every
+    lease_seconds / 3, so they're only reclaimed when this process dies
+    (or hangs). When every remaining task is leased to other workers, it
+    polls in case their leases run out."""
+    from batchscraper import scrape_course
+
+    metrics = metrics if metrics is not None else default_metrics
+    worker_id = worker_id or default_worker_id()
+    counts = {'completed': 0, 'failed': 0}
+    in_flight: Dict[Future, Tuple[str, int]] = {}
+    with WorkQueue(queue_path, lease_seconds, max_attempts) as queue, \
+            ThreadPoolExecutor(max_workers=concurrency) as executor:
+        last_heartbeat = time.monotonic()
+        while True:
+            if len(in_flight) < concurrency:
+                for course_id, year, faculty in queue.claim(
+                        worker_id, 2 * concurrency - len(in_flight)):
+                    options = dict(scraper_options or {})
+                    if faculty is not None:
+                        options['faculty'] = faculty
+                    in_flight[executor.submit(
+                        scrape_course, course_id, year, transport, parser,
+                        None, options)] = (course_id, year)
+                    metrics.increment('queue.claimed')
+            if not in_flight:
+                if not queue.unfinished():
+                    return counts
+                time.sleep(poll_interval)
+                continue
+
+            done, _ = wait(in_flight, timeout=poll_interval,
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                course_id, year = in_flight.pop(future)
+                try:
+                    course = future.result()
+                except Exception as error:
+                    queue.fail(worker_id, course_id, year, repr(error))
+                    metrics.increment('queue.failed')
+                    counts['failed'] += 1
+                else:
+                    queue.complete(worker_id, course_id, year, course)
+                    metrics.increment('queue.completed')
+                    counts['completed'] += 1
+            if time.monotonic() - last_heartbeat >= lease_seconds / 3:
+                lost = queue.heartbeat(worker_id, in_flight.values())
+                metrics.increment('queue.leases_lost', len(lost))
+                last_heartbeat = time.monotonic()
+
+
+def run_workers(queue_path: str, processes: int,
+                **worker_options) -> Dict[str, int]:
+    """run run_worker in processes processes (each with its own
+    transport) until the queue is done, and return their summed counts.
+    A given worker_id is suffixed with each process' number"""
+    from concurrent.futures import ProcessPoolExecutor
+
+    worker_id = worker_options.pop('worker_id', None)
+    counts = {'completed': 0, 'failed': 0}
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [pool.submit(run_worker, queue_path,
+                               '{}-{}'.format(worker_id, number)
+                               if worker_id else None, **worker_options)
+                   for number in range(processes)]
+        for future in futures:
+            for name, count in future.result().items():
+                counts[name] += count
+    return counts